@@ -1,26 +1,112 @@
-"""Lightweight pydantic wrappers for Synthea CSV format."""
+"""Lightweight pydantic wrappers for Synthea CSV format.
+
+Public names are imported lazily (PEP 562) on first attribute access, so
+``import synthea_pydantic`` does not import pydantic or build any model
+schema until a model is actually used.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
 
 __version__ = "0.1.0"
 
-from .allergies import Allergy
-from .base import SyntheaBaseModel
-from .careplans import CarePlan
-from .claims import Claim
-from .claims_transactions import ClaimTransaction
-from .conditions import Condition
-from .devices import Device
-from .encounters import Encounter
-from .imaging_studies import ImagingStudy
-from .immunizations import Immunization
-from .medications import Medication
-from .observations import Observation
-from .organizations import Organization
-from .patients import Patient
-from .payer_transitions import PayerTransition
-from .payers import Payer
-from .procedures import Procedure
-from .providers import Provider
-from .supplies import Supply
+if TYPE_CHECKING:
+    from ._io import open_csv
+    from ._partition import partition_export
+    from .aggregates import CostRollup, CostTotals
+    from .allergies import Allergy
+    from .base import SyntheaBaseModel
+    from .careplans import CarePlan
+    from .claims import Claim
+    from .claims_transactions import ClaimTransaction
+    from .code_index import CodeIndex, Cohort
+    from .conditions import Condition
+    from .coverage import Coverage, CoverageTimeline
+    from .deidentify import Pseudonymizer, pseudonymize_export
+    from .diff import Change, diff_exports
+    from .devices import Device
+    from .encounters import Encounter
+    from .fhir import iter_bundles, write_bundles
+    from .imaging_studies import ImagingStudy
+    from .immunizations import Immunization
+    from .incremental import IncrementalLoader
+    from .intervals import IntervalIndex
+    from .medications import Medication
+    from .observation_columns import ObservationColumns
+    from .observations import Observation
+    from .organizations import Organization
+    from .patients import Patient
+    from .pipeline import Pipeline, Stage, ingest
+    from .profiling import ColumnStats, HyperLogLog, TableProfile, profile_export
+    from .payer_transitions import PayerTransition
+    from .payers import Payer
+    from .procedures import Procedure
+    from .providers import Provider
+    from .query import Export, col
+    from .shared import SharedTable, load_shared
+    from .sql import load_tables, to_sql
+    from .supplies import Supply
+    from .timeseries import ObservationSeries
+    from .versions import HeaderSchema, SchemaMatch, register_schema
+    from .warmup import warm_up, worker_context
+
+_LAZY_ATTRIBUTES = {
+    "Allergy": ".allergies",
+    "SyntheaBaseModel": ".base",
+    "CarePlan": ".careplans",
+    "Claim": ".claims",
+    "ClaimTransaction": ".claims_transactions",
+    "Condition": ".conditions",
+    "Device": ".devices",
+    "Encounter": ".encounters",
+    "ImagingStudy": ".imaging_studies",
+    "Immunization": ".immunizations",
+    "Medication": ".medications",
+    "Observation": ".observations",
+    "Organization": ".organizations",
+    "Patient": ".patients",
+    "PayerTransition": ".payer_transitions",
+    "Payer": ".payers",
+    "Procedure": ".procedures",
+    "Provider": ".providers",
+    "Supply": ".supplies",
+    "CostRollup": ".aggregates",
+    "CostTotals": ".aggregates",
+    "ObservationSeries": ".timeseries",
+    "ObservationColumns": ".observation_columns",
+    "IntervalIndex": ".intervals",
+    "IncrementalLoader": ".incremental",
+    "open_csv": "._io",
+    "partition_export": "._partition",
+    "warm_up": ".warmup",
+    "worker_context": ".warmup",
+    "HeaderSchema": ".versions",
+    "SchemaMatch": ".versions",
+    "register_schema": ".versions",
+    "to_sql": ".sql",
+    "load_tables": ".sql",
+    "Export": ".query",
+    "col": ".query",
+    "iter_bundles": ".fhir",
+    "write_bundles": ".fhir",
+    "CodeIndex": ".code_index",
+    "Cohort": ".code_index",
+    "SharedTable": ".shared",
+    "load_shared": ".shared",
+    "Pipeline": ".pipeline",
+    "Stage": ".pipeline",
+    "ingest": ".pipeline",
+    "Coverage": ".coverage",
+    "CoverageTimeline": ".coverage",
+    "Pseudonymizer": ".deidentify",
+    "pseudonymize_export": ".deidentify",
+    "ColumnStats": ".profiling",
+    "HyperLogLog": ".profiling",
+    "TableProfile": ".profiling",
+    "profile_export": ".profiling",
+    "Change": ".diff",
+    "diff_exports": ".diff",
+}
 
 __all__ = [
     "Allergy",
@@ -42,4 +128,54 @@ __all__ = [
     "Procedure",
     "Provider",
     "Supply",
-]
\ No newline at end of file
+    "CostRollup",
+    "CostTotals",
+    "ObservationSeries",
+    "ObservationColumns",
+    "IntervalIndex",
+    "IncrementalLoader",
+    "open_csv",
+    "partition_export",
+    "warm_up",
+    "worker_context",
+    "HeaderSchema",
+    "SchemaMatch",
+    "register_schema",
+    "to_sql",
+    "load_tables",
+    "Export",
+    "col",
+    "iter_bundles",
+    "write_bundles",
+    "CodeIndex",
+    "Cohort",
+    "SharedTable",
+    "load_shared",
+    "Pipeline",
+    "Stage",
+    "ingest",
+    "Coverage",
+    "CoverageTimeline",
+    "Pseudonymizer",
+    "pseudonymize_export",
+    "ColumnStats",
+    "HyperLogLog",
+    "TableProfile",
+    "profile_export",
+    "Change",
+    "diff_exports",
+]
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Cache on the package so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,356 @@
+"""Compact schema-driven binary encoding of model instances.
+
+A record is encoded as
+
+* a varint bitmap of the fields that are None and a varint bitmap of the
+  fields missing from ``model_fields_set`` (usually 0, one byte);
+* one ``struct`` block with the fixed-width fields that are not None, in
+  declaration order: UUIDs as 16 raw bytes, datetimes as the 10-byte
+  state ``datetime`` pickles (local date and time) plus a 16-bit UTC
+  offset in minutes (-32768 for naive values), dates as ordinals, floats
+  as doubles and Literal values as their index in the annotation;
+* the variable-width fields that are not None, in declaration order:
+  zigzag-varint ints, decimals as exact fixed point (one varint holding the
+  zigzag unscaled integer and up to 14 decimal places, with a separate
+  exponent only for other scales), length-prefixed UTF-8 strings and
+  tagged union values.
+
+The layout follows from the model's fields, so it carries no names or
+types. Batches start with the model's schema fingerprint, and pickles
+(``SyntheaBaseModel.__reduce__``) carry it too, so data written under
+another model definition is refused rather than misread.
+"""
+
+import pickle
+import struct
+from datetime import date, datetime, timedelta, timezone
+from decimal import MAX_PREC, Context, Decimal
+from functools import cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, NamedTuple
+from uuid import UUID, SafeUUID
+
+from ._codec import read_varint, unzigzag, write_varint, zigzag
+from ._fields import FieldSpec, field_specs
+from ._trusted import check_fingerprint, schema_fingerprint
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+_NAIVE = -32768
+_PLACES = 15
+_FLOAT = struct.Struct('<d')
+
+_FIXED_FORMATS = {'uuid': '16s', 'datetime': '10sh', 'date': 'i', 'float': 'd', 'bool': '?', 'literal': 'B'}
+"""struct format of each fixed-width kind."""
+
+_EXACT = Context(prec=MAX_PREC)
+_new = object.__new__
+_setattr = object.__setattr__
+
+
+def _uuid(data: bytes) -> UUID:
+    """``UUID(bytes=data)`` without the generic checks of ``UUID.__init__``."""
+    uuid = _new(UUID)
+    _setattr(uuid, 'int', int.from_bytes(data, 'big'))
+    _setattr(uuid, 'is_safe', SafeUUID.unknown)
+    return uuid
+
+
+def _datetime_state(value: datetime) -> bytes:
+    # The state pickle stores, which ``datetime(state)`` accepts back
+    return value.__reduce__()[1][0]
+
+
+def _offset_minutes(value: datetime) -> int:
+    if value.tzinfo is None:
+        return _NAIVE
+    offset = value.utcoffset()
+    if not offset:
+        return 0
+    minutes, remainder = divmod(offset, timedelta(minutes=1))
+    if remainder:
+        raise ValueError(f"UTC offset {offset} is not a whole number of minutes")
+    return minutes
+
+
+@cache
+def _timezone(minutes: int) -> timezone:
+    return timezone.utc if not minutes else timezone(timedelta(minutes=minutes))
+
+
+def _decode_datetime(values: Iterator[Any]) -> datetime:
+    state, minutes = next(values), next(values)
+    if minutes == _NAIVE:
+        return datetime(state)
+    return datetime(state, _timezone(minutes))
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    encoded = value.encode()
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_str(buffer: bytes, pos: int) -> tuple[str, int]:
+    length, pos = read_varint(buffer, pos)
+    end = pos + length
+    return buffer[pos:end].decode(), end
+
+
+def _write_int(out: bytearray, value: int) -> None:
+    write_varint(out, zigzag(value))
+
+
+def _read_int(buffer: bytes, pos: int) -> tuple[int, int]:
+    value, pos = read_varint(buffer, pos)
+    return unzigzag(value), pos
+
+
+def _write_decimal(out: bytearray, value: Decimal) -> None:
+    text = str(value)
+    if 'E' in text or not text[-1].isdigit():
+        exponent = value.as_tuple().exponent
+        if not isinstance(exponent, int):
+            raise ValueError(f"Cannot encode non-finite decimal {value}")
+        unscaled, places = int(value.scaleb(-exponent, _EXACT)), -exponent
+    else:
+        dot = text.find('.')
+        if dot < 0:
+            unscaled, places = int(text), 0
+        else:
+            unscaled, places = int(text[:dot] + text[dot + 1:]), len(text) - dot - 1
+    if 0 <= places < _PLACES:
+        write_varint(out, zigzag(unscaled) << 4 | places)
+    else:
+        write_varint(out, zigzag(unscaled) << 4 | _PLACES)
+        write_varint(out, zigzag(-places))
+
+
+def _read_decimal(buffer: bytes, pos: int) -> tuple[Decimal, int]:
+    packed, pos = read_varint(buffer, pos)
+    places = packed & _PLACES
+    if places == _PLACES:
+        exponent, pos = read_varint(buffer, pos)
+        places = -unzigzag(exponent)
+    return Decimal(unzigzag(packed >> 4)).scaleb(-places, _EXACT), pos
+
+
+def _write_union(out: bytearray, value: Any) -> None:
+    if isinstance(value, str):
+        out.append(0)
+        _write_str(out, value)
+    elif isinstance(value, float):
+        out.append(1)
+        out += _FLOAT.pack(value)
+    elif isinstance(value, int):
+        out.append(2)
+        _write_int(out, value)
+    else:
+        out.append(3)
+        _write_other(out, value)
+
+
+def _read_union(buffer: bytes, pos: int) -> tuple[Any, int]:
+    tag = buffer[pos]
+    pos += 1
+    if tag == 0:
+        return _read_str(buffer, pos)
+    if tag == 1:
+        return _FLOAT.unpack_from(buffer, pos)[0], pos + _FLOAT.size
+    if tag == 2:
+        return _read_int(buffer, pos)
+    return _read_other(buffer, pos)
+
+
+def _write_other(out: bytearray, value: Any) -> None:
+    encoded = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_other(buffer: bytes, pos: int) -> tuple[Any, int]:
+    length, pos = read_varint(buffer, pos)
+    end = pos + length
+    return pickle.loads(buffer[pos:end]), end
+
+
+_VARIABLE: dict[str, tuple[Callable[[bytearray, Any], None], Callable[[bytes, int], tuple[Any, int]]]] = {
+    'int': (_write_int, _read_int),
+    'decimal': (_write_decimal, _read_decimal),
+    'str': (_write_str, _read_str),
+    'union': (_write_union, _read_union),
+    'other': (_write_other, _read_other),
+}
+"""Writer and reader of each variable-width kind."""
+
+
+def _literal_encoder(literals: tuple) -> Callable[[Any], int]:
+    return {value: code for code, value in enumerate(literals)}.__getitem__
+
+
+def _fixed_codecs(spec: FieldSpec) -> tuple[list[Callable[[Any], Any]], Callable[[Iterator[Any]], Any]]:
+    """Functions producing a fixed field's struct values, and the one reading them back."""
+    kind = spec.kind
+    if kind == 'uuid':
+        return [attrgetter('bytes')], lambda values: _uuid(next(values))
+    if kind == 'datetime':
+        return [_datetime_state, _offset_minutes], _decode_datetime
+    if kind == 'date':
+        return [date.toordinal], lambda values: date.fromordinal(next(values))
+    if kind == 'literal':
+        literals = spec.literals
+        return [_literal_encoder(literals)], lambda values: literals[next(values)]
+    return [_identity], next
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+class _Layout(NamedTuple):
+    """Encoding steps for the records sharing one null bitmap."""
+
+    struct: struct.Struct
+    fixed_encoders: tuple[tuple[str, Callable[[Any], Any]], ...]
+    fixed_decoders: tuple[tuple[str, Callable[[Iterator[Any]], Any]], ...]
+    variable: tuple[tuple[str, Callable[[bytearray, Any], None], Callable[[bytes, int], tuple[Any, int]]], ...]
+
+
+class BinaryCodec:
+    """Encoder and decoder of one model's binary layout.
+
+    Args:
+        model: Model class to encode
+    """
+
+    def __init__(self, model: type['SyntheaBaseModel']):
+        self.model = model
+        self.specs = field_specs(model)
+        self.names = tuple(spec.name for spec in self.specs)
+        self.fingerprint = schema_fingerprint(model)
+        self._all_fields = frozenset(self.names)
+        self._bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self._layouts: dict[int, _Layout] = {}
+
+    def _layout(self, nulls: int) -> _Layout:
+        """Encoding steps for a null bitmap, built on first use."""
+        layout = self._layouts.get(nulls)
+        if layout is None:
+            formats, encoders, decoders, variable = ['<'], [], [], []
+            for i, spec in enumerate(self.specs):
+                if nulls >> i & 1:
+                    continue
+                fmt = _FIXED_FORMATS.get(spec.kind)
+                if fmt is not None and (spec.kind != 'literal' or len(spec.literals) <= 256):
+                    formats.append(fmt)
+                    encode, decode = _fixed_codecs(spec)
+                    encoders.extend((spec.name, function) for function in encode)
+                    decoders.append((spec.name, decode))
+                else:
+                    kind = spec.kind if spec.kind in _VARIABLE else 'other'
+                    variable.append((spec.name, *_VARIABLE[kind]))
+            layout = self._layouts.setdefault(nulls, _Layout(
+                struct.Struct(''.join(formats)), tuple(encoders), tuple(decoders), tuple(variable),
+            ))
+        return layout
+
+    def encode_into(self, out: bytearray, record: 'SyntheaBaseModel') -> None:
+        """Append the encoding of one record."""
+        values = record.__dict__
+        nulls = 0
+        bit = 1
+        for name in self.names:
+            if values[name] is None:
+                nulls |= bit
+            bit <<= 1
+        unset = 0
+        fields_set = record.__pydantic_fields_set__
+        if len(fields_set) != len(self.names) or fields_set != self._all_fields:
+            bits = self._bits
+            for name in self._all_fields - fields_set:
+                unset |= bits[name]
+        write_varint(out, nulls)
+        write_varint(out, unset)
+        layout = self._layout(nulls)
+        out += layout.struct.pack(*[encode(values[name]) for name, encode in layout.fixed_encoders])
+        for name, write, _ in layout.variable:
+            write(out, values[name])
+
+    def decode_from(self, buffer: bytes, pos: int = 0) -> tuple['SyntheaBaseModel', int]:
+        """Decode one record at ``pos``.
+
+        Returns:
+            The record and the position after it
+        """
+        nulls, pos = read_varint(buffer, pos)
+        unset, pos = read_varint(buffer, pos)
+        layout = self._layout(nulls)
+        unpacked = iter(layout.struct.unpack_from(buffer, pos))
+        pos += layout.struct.size
+        values = dict.fromkeys(self.names)
+        for name, decode in layout.fixed_decoders:
+            values[name] = decode(unpacked)
+        for name, _, read in layout.variable:
+            values[name], pos = read(buffer, pos)
+        names = self.names
+        if unset:
+            fields_set = {name for i, name in enumerate(names) if not unset >> i & 1}
+        else:
+            fields_set = set(names)
+        record = _new(self.model)
+        _setattr(record, '__dict__', values)
+        _setattr(record, '__pydantic_fields_set__', fields_set)
+        _setattr(record, '__pydantic_extra__', None)
+        _setattr(record, '__pydantic_private__', None)
+        return record, pos
+
+    def encode(self, record: 'SyntheaBaseModel') -> bytes:
+        """Encode one record."""
+        out = bytearray()
+        self.encode_into(out, record)
+        return bytes(out)
+
+    def decode(self, data: bytes) -> 'SyntheaBaseModel':
+        """Decode one record encoded by ``encode``."""
+        record, pos = self.decode_from(data)
+        if pos != len(data):
+            raise ValueError(f"{len(data) - pos} trailing bytes after a {self.model.__name__} record")
+        return record
+
+    def encode_batch(self, records: Iterable['SyntheaBaseModel']) -> bytes:
+        """Encode records behind the schema fingerprint and a count."""
+        body = bytearray()
+        count = 0
+        for record in records:
+            self.encode_into(body, record)
+            count += 1
+        out = bytearray(bytes.fromhex(self.fingerprint))
+        write_varint(out, count)
+        return bytes(out + body)
+
+    def decode_batch(self, data: bytes) -> list['SyntheaBaseModel']:
+        """Decode records encoded by ``encode_batch``.
+
+        Raises:
+            ValueError: If the batch was written under another model definition
+        """
+        check_fingerprint(self.model, data[:8].hex())
+        count, pos = read_varint(data, 8)
+        records = []
+        for _ in range(count):
+            record, pos = self.decode_from(data, pos)
+            records.append(record)
+        return records
+
+
+@cache
+def codec(model: type['SyntheaBaseModel']) -> BinaryCodec:
+    """Return the (cached) BinaryCodec of a model."""
+    return BinaryCodec(model)
+
+
+def restore(model: type['SyntheaBaseModel'], fingerprint: str, data: bytes) -> 'SyntheaBaseModel':
+    """Unpickle a record reduced by ``SyntheaBaseModel.__reduce__``."""
+    check_fingerprint(model, fingerprint)
+    return codec(model).decode(data)
@@ -0,0 +1,140 @@
+"""Integer codecs: varints, zigzag and block-packed integer sequences.
+
+Varints are the usual base-128 little-endian encoding (seven bits per byte,
+high bit set on every byte but the last); zigzag maps signed integers onto
+unsigned ones so small negative numbers stay short.
+
+Long integer sequences are packed in blocks instead, so they can be decoded
+without a Python-level loop per value: each block of up to ``BLOCK_SIZE``
+values stores a varint base and the offsets from it at the smallest byte
+width that fits. Sorted sequences are delta-encoded from the block's first
+value, unsorted ones are stored as offsets from the block minimum ("frame
+of reference").
+"""
+
+import sys
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+from typing import Iterable, Sequence
+
+BLOCK_SIZE = 1024
+"""Values per packed block."""
+
+_WIDTHS: dict[int, str] = {}
+for _typecode in 'BHILQ':
+    _WIDTHS.setdefault(array(_typecode).itemsize, _typecode)
+del _typecode
+
+_SWAP = sys.byteorder != 'little'
+
+
+def zigzag(value: int) -> int:
+    """Map a signed integer to an unsigned one (0, -1, 1, -2 -> 0, 1, 2, 3)."""
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value: int) -> int:
+    """Inverse of ``zigzag``."""
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    """Append an unsigned integer as a varint."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(buffer: Sequence[int], pos: int) -> tuple[int, int]:
+    """Read a varint at ``pos``.
+
+    Returns:
+        The value and the position after it
+    """
+    result = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _width(largest: int) -> int:
+    for width in sorted(_WIDTHS):
+        if largest < 1 << (8 * width):
+            return width
+    raise OverflowError(f"{largest} does not fit in 64 bits")
+
+
+def pack_ints(values: Iterable[int], *, sorted_: bool = False) -> bytes:
+    """Pack integers into blocks of fixed-width offsets.
+
+    Args:
+        values: Integers to pack; non-decreasing when ``sorted_`` is set
+        sorted_: Delta-encode the values, which must then be non-decreasing
+
+    Returns:
+        Packed bytes, starting with the value count as a varint
+
+    Raises:
+        ValueError: If ``sorted_`` is set and the values decrease
+    """
+    values = values if isinstance(values, (list, array)) else list(values)
+    out = bytearray()
+    write_varint(out, len(values))
+    for start in range(0, len(values), BLOCK_SIZE):
+        block = values[start:start + BLOCK_SIZE]
+        if sorted_:
+            base = block[0]
+            offsets = [b - a for a, b in zip([base, *block[:-1]], block)]
+            if min(offsets) < 0:
+                raise ValueError("sorted_ values must be non-decreasing")
+        else:
+            base = min(block)
+            offsets = [value - base for value in block]
+        width = _width(max(offsets))
+        write_varint(out, zigzag(base))
+        out.append(width)
+        packed = array(_WIDTHS[width], offsets)
+        if _SWAP:
+            packed.byteswap()
+        out += packed.tobytes()
+    return bytes(out)
+
+
+def unpack_ints(buffer: Sequence[int], pos: int = 0, *, sorted_: bool = False) -> tuple[array, int]:
+    """Decode integers written by ``pack_ints``.
+
+    ``buffer`` may be bytes, a memoryview or an mmap; each block is decoded
+    with ``array.frombytes`` and ``accumulate``/``map``, not per value.
+
+    Returns:
+        ``array('q')`` of the values and the position after them
+    """
+    count, pos = read_varint(buffer, pos)
+    values = array('q')
+    remaining = count
+    while remaining:
+        n = min(remaining, BLOCK_SIZE)
+        base, pos = read_varint(buffer, pos)
+        base = unzigzag(base)
+        width = buffer[pos]
+        pos += 1
+        offsets = array(_WIDTHS[width])
+        offsets.frombytes(buffer[pos:pos + n * width])
+        if _SWAP:
+            offsets.byteswap()
+        pos += n * width
+        if sorted_:
+            # The first offset is 0, so the block starts at its base
+            block = array('q', accumulate(offsets, initial=base))
+            del block[0]
+        else:
+            block = array('q', map(add, offsets, repeat(base)))
+        values += block
+        remaining -= n
+    return values, pos
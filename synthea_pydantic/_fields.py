@@ -0,0 +1,118 @@
+"""Per-model field metadata derived once from the model annotations."""
+
+import types
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cache
+from typing import Any, Literal, Union, get_args, get_origin
+from uuid import UUID
+
+from pydantic import BaseModel
+
+_KINDS: tuple[tuple[type, str], ...] = (
+    # datetime before date: datetime is a date subclass
+    (UUID, 'uuid'),
+    (datetime, 'datetime'),
+    (date, 'date'),
+    (Decimal, 'decimal'),
+    (bool, 'bool'),
+    (int, 'int'),
+    (float, 'float'),
+    (str, 'str'),
+)
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Resolved type information for one model field."""
+
+    name: str
+    """Python attribute name."""
+    alias: str
+    """CSV column name."""
+    kind: str
+    """One of uuid, datetime, date, decimal, bool, int, float, str, literal, union or other."""
+    nullable: bool
+    """Whether the annotation allows None."""
+    required: bool
+    """Whether the field has no default."""
+    literals: tuple = ()
+    """Allowed values of a Literal field."""
+    members: tuple[str, ...] = ()
+    """Kinds of the members of a non-Optional Union field."""
+    phi: bool = False
+    """Whether the field holds identifying patient data (``json_schema_extra={'phi': True}``)."""
+
+    @property
+    def lower_literals(self) -> dict[str, str]:
+        """Map of lowercased string literals to their canonical spelling."""
+        return _lower_literals(self.literals)
+
+
+@cache
+def _lower_literals(literals: tuple) -> dict[str, str]:
+    lowered: dict[str, str] = {}
+    if literals and all(isinstance(value, str) for value in literals):
+        for value in literals:
+            lowered.setdefault(value.lower(), value)
+    return lowered
+
+
+def _kind_of(annotation: Any) -> str:
+    if get_origin(annotation) is Literal:
+        return 'literal'
+    for tp, kind in _KINDS:
+        if annotation is tp:
+            return kind
+    return 'other'
+
+
+def describe(name: str, field: Any) -> FieldSpec:
+    """Build the FieldSpec of a pydantic ``FieldInfo``."""
+    annotation = field.annotation
+    nullable = False
+    members: tuple[str, ...] = ()
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        nullable = len(args) < len(get_args(annotation))
+        if len(args) == 1:
+            annotation = args[0]
+        else:
+            members = tuple(_kind_of(arg) for arg in args)
+    if members:
+        kind, literals = 'union', ()
+    else:
+        kind = _kind_of(annotation)
+        literals = get_args(annotation) if kind == 'literal' else ()
+    extra = field.json_schema_extra
+    return FieldSpec(
+        name=name,
+        alias=field.alias or name,
+        kind=kind,
+        nullable=nullable,
+        required=field.is_required(),
+        literals=literals,
+        members=members,
+        phi=isinstance(extra, dict) and bool(extra.get('phi')),
+    )
+
+
+@cache
+def field_specs(model: type[BaseModel]) -> tuple[FieldSpec, ...]:
+    """Return the FieldSpecs of a model in declaration order."""
+    return tuple(describe(name, field) for name, field in model.model_fields.items())
+
+
+@cache
+def specs_by_key(model: type[BaseModel]) -> dict[str, FieldSpec]:
+    """Return a model's FieldSpecs keyed by both alias and attribute name.
+
+    Aliases win over attribute names, matching how pydantic resolves input.
+    """
+    by_key: dict[str, FieldSpec] = {}
+    for spec in field_specs(model):
+        by_key.setdefault(spec.name, spec)
+    for spec in field_specs(model):
+        by_key[spec.alias] = spec
+    return by_key
@@ -0,0 +1,423 @@
+"""Opening plain and compressed Synthea CSV exports, and writing compressed output."""
+
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional, Sequence, TextIO
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_BZ2_MAGIC = b'BZh'
+_XZ_MAGIC = b'\xfd7zXZ\x00'
+
+_ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A5E
+
+# Largest BGZF payload, as used by bgzip; leaves room for deflate overhead
+_BGZF_PAYLOAD = 0xFF00
+_BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+_SUFFIXES = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bgz': 'gzip',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+
+def detect_compression(path: str | Path) -> Optional[str]:
+    """Detect the compression of a file from its magic bytes.
+
+    The file extension is only used when the file is too short to carry a
+    magic number.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        One of ``'gzip'``, ``'zstd'``, ``'bz2'``, ``'xz'``, or None for plain
+        files
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    if head.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    if head.startswith(_ZSTD_MAGIC):
+        return 'zstd'
+    if head.startswith(_BZ2_MAGIC):
+        return 'bz2'
+    if head.startswith(_XZ_MAGIC):
+        return 'xz'
+    if len(head) < len(_XZ_MAGIC):
+        return _SUFFIXES.get(Path(path).suffix.lower())
+    return None
+
+
+def _zstd_module():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading .zst files requires the 'zstandard' package: pip install synthea-pydantic[zstd]"
+        ) from None
+    return zstandard
+
+
+def _bgzf_blocks(f: BinaryIO) -> Optional[Iterator[bytes]]:
+    """Return an iterator over raw BGZF members, or None if ``f`` is plain gzip.
+
+    BGZF (blocked gzip, as written by ``bgzip``) stores each member's size in
+    a ``BC`` extra subfield, which lets members be split without inflating.
+    """
+    header = f.read(18)
+    f.seek(0)
+    if len(header) < 18 or not header[3] & 4 or header[12:14] != b'BC':
+        return None
+
+    def blocks() -> Iterator[bytes]:
+        while True:
+            member_header = f.read(18)
+            if not member_header:
+                return
+            if len(member_header) < 18 or member_header[12:14] != b'BC':
+                raise OSError("Corrupt BGZF block header")
+            block_size = struct.unpack_from('<H', member_header, 16)[0] + 1
+            yield member_header + f.read(block_size - 18)
+
+    return blocks()
+
+
+def _zstd_seekable_frames(f: BinaryIO) -> Optional[Iterator[tuple[bytes, int]]]:
+    """Return an iterator over ``(frame, decompressed size)`` for seekable zstd.
+
+    Files in the zstd seekable format end with a seek table listing the
+    compressed and decompressed size of every frame. Returns None when the
+    file has no seek table.
+    """
+    size = f.seek(0, 2)
+    if size < 9:
+        f.seek(0)
+        return None
+    f.seek(size - 9)
+    frame_count, descriptor, magic = struct.unpack('<IBI', f.read(9))
+    if magic != _ZSTD_SEEKABLE_MAGIC:
+        f.seek(0)
+        return None
+    entry_size = 12 if descriptor & 0x80 else 8
+    table_size = frame_count * entry_size
+    f.seek(size - 9 - table_size)
+    table = f.read(table_size)
+    entries = [struct.unpack_from('<II', table, i * entry_size) for i in range(frame_count)]
+    f.seek(0)
+
+    def frames() -> Iterator[tuple[bytes, int]]:
+        for compressed_size, decompressed_size in entries:
+            yield f.read(compressed_size), decompressed_size
+
+    return frames()
+
+
+class _BlockReader(io.RawIOBase):
+    """Raw stream over decompressed blocks produced by a worker pool.
+
+    Up to ``window`` blocks are decoded ahead of the consumer, which bounds
+    memory while keeping every worker busy.
+    """
+
+    def __init__(self, raw: BinaryIO, jobs: Iterator, decode: Callable, threads: int):
+        self._raw = raw
+        self._jobs = jobs
+        self._decode = decode
+        self._executor: Optional[Executor] = ThreadPoolExecutor(max_workers=threads)
+        self._window = threads * 4
+        self._pending: deque = deque()
+        self._buffer = memoryview(b'')
+        self._fill()
+
+    def _fill(self) -> None:
+        while len(self._pending) < self._window:
+            job = next(self._jobs, None)
+            if job is None:
+                break
+            self._pending.append(self._executor.submit(self._decode, job))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            if not self._pending:
+                return 0
+            self._buffer = memoryview(self._pending.popleft().result())
+            self._fill()
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self) -> None:
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._raw.close()
+        super().close()
+
+
+def open_binary(path: str | Path, threads: Optional[int] = None) -> BinaryIO:
+    """Open a plain or compressed file for streaming binary reads.
+
+    Compression is detected by ``detect_compression``. Seekable formats,
+    BGZF gzip and zstd with a seek table, are decoded block-parallel on a
+    thread pool; other compressed files are decoded sequentially.
+
+    Args:
+        path: Path to the file
+        threads: Decoder threads for seekable formats. None uses up to 4 (or
+            the CPU count if lower); 1 decodes sequentially.
+
+    Returns:
+        Binary file object yielding decompressed bytes
+    """
+    compression = detect_compression(path)
+    if threads is None:
+        threads = min(4, os.cpu_count() or 1)
+
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    if compression == 'xz':
+        return lzma.open(path, 'rb')
+
+    raw = open(path, 'rb')
+    try:
+        if compression == 'gzip':
+            blocks = _bgzf_blocks(raw) if threads > 1 else None
+            if blocks is None:
+                raw.close()
+                return gzip.open(path, 'rb')
+            reader = _BlockReader(raw, blocks, lambda block: zlib.decompress(block, 31), threads)
+        else:
+            zstandard = _zstd_module()
+            frames = _zstd_seekable_frames(raw) if threads > 1 else None
+            if frames is None:
+                return io.BufferedReader(
+                    zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+                )
+
+            def decode(job: tuple[bytes, int]) -> bytes:
+                frame, decompressed_size = job
+                return zstandard.ZstdDecompressor().decompress(frame, max_output_size=decompressed_size)
+
+            reader = _BlockReader(raw, frames, decode, threads)
+    except BaseException:
+        raw.close()
+        raise
+    return io.BufferedReader(reader, buffer_size=1 << 20)
+
+
+def compression_for(path: str | Path) -> Optional[str]:
+    """Compression implied by a file name's suffix, None for plain files."""
+    return _SUFFIXES.get(Path(path).suffix.lower())
+
+
+def _bgzf_compress(data: bytes, level: int) -> bytes:
+    """Compress data into BGZF blocks that ``open_binary`` can inflate in parallel."""
+    blocks = []
+    for start in range(0, len(data), _BGZF_PAYLOAD):
+        payload = data[start:start + _BGZF_PAYLOAD]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        deflated = compressor.compress(payload) + compressor.flush()
+        blocks.append(
+            b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+            + struct.pack('<H', len(deflated) + 25)
+            + deflated
+            + struct.pack('<II', zlib.crc32(payload), len(payload))
+        )
+    return b''.join(blocks)
+
+
+class ChunkWriter:
+    """Write chunks of bytes to a file, compressing them on a thread pool.
+
+    Every chunk is compressed independently, so the output can be decoded in
+    parallel again: gzip is written as BGZF blocks and zstd as frames
+    followed by a seek table. bz2 and xz chunks become concatenated streams,
+    which their stdlib readers accept. The compressors release the GIL, so
+    threads compress concurrently while chunks are written in order.
+
+    Args:
+        path: Output file
+        compression: ``'gzip'``, ``'zstd'``, ``'bz2'``, ``'xz'`` or None
+        threads: Compression threads. None uses up to 4 (or the CPU count if
+            lower); 1 compresses on the calling thread.
+        level: Compression level. Defaults to each format's default.
+        executor: Pool to compress on instead of one owned by the writer,
+            for many writers open at once; ``threads`` then only sets how
+            many chunks are queued ahead. It is not shut down on close.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: Optional[str] = None,
+        threads: Optional[int] = None,
+        level: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        if compression not in (None, 'gzip', 'zstd', 'bz2', 'xz'):
+            raise ValueError(f"Unknown compression {compression!r}")
+        self.compression = compression
+        self._compress = self._compressor(compression, level)
+        if threads is None:
+            threads = min(4, os.cpu_count() or 1)
+        self._executor: Optional[Executor] = None
+        self._owns_executor = False
+        if compression is not None and executor is not None:
+            self._executor = executor
+        elif compression is not None and threads > 1:
+            self._executor = ThreadPoolExecutor(max_workers=threads)
+            self._owns_executor = True
+        self._window = threads * 2
+        self._pending: deque = deque()
+        self._frames: list[tuple[int, int]] = []
+        self._file = open(path, 'wb')
+
+    @staticmethod
+    def _compressor(compression: Optional[str], level: Optional[int]) -> Callable[[bytes], bytes]:
+        if compression == 'gzip':
+            return lambda data: _bgzf_compress(data, 6 if level is None else level)
+        if compression == 'zstd':
+            zstandard = _zstd_module()
+            return lambda data: zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+        if compression == 'bz2':
+            return lambda data: bz2.compress(data, 9 if level is None else level)
+        if compression == 'xz':
+            return lambda data: lzma.compress(data, preset=level)
+        return bytes
+
+    def _emit(self, compressed: bytes, size: int) -> None:
+        self._file.write(compressed)
+        if self.compression == 'zstd':
+            self._frames.append((len(compressed), size))
+
+    def write(self, data: bytes) -> None:
+        """Queue one chunk; it is written after all earlier chunks."""
+        if not data:
+            return
+        if self._executor is None:
+            self._emit(self._compress(data), len(data))
+            return
+        self._pending.append((self._executor.submit(self._compress, data), len(data)))
+        while len(self._pending) >= self._window:
+            future, size = self._pending.popleft()
+            self._emit(future.result(), size)
+
+    def close(self) -> None:
+        """Write the pending chunks and the format trailer, then close the file."""
+        if self._file.closed:
+            return
+        try:
+            while self._pending:
+                future, size = self._pending.popleft()
+                self._emit(future.result(), size)
+            if self.compression == 'gzip':
+                self._file.write(_BGZF_EOF)
+            elif self.compression == 'zstd':
+                table = b''.join(struct.pack('<II', *frame) for frame in self._frames)
+                table += struct.pack('<IBI', len(self._frames), 0, _ZSTD_SEEKABLE_MAGIC)
+                self._file.write(struct.pack('<II', _ZSTD_SKIPPABLE_MAGIC, len(table)) + table)
+        finally:
+            if self._executor is not None:
+                for future, _ in self._pending:
+                    future.cancel()
+                if self._owns_executor:
+                    self._executor.shutdown(wait=True)
+            self._file.close()
+
+    def __enter__(self) -> 'ChunkWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+CSV_BUFFER_SIZE = 1 << 18
+"""Characters of CSV text a ``CsvChunkWriter`` buffers before writing a chunk."""
+
+
+class CsvChunkWriter:
+    """CSV writer collecting rows in memory and passing full buffers to a ``ChunkWriter``.
+
+    Each buffer becomes one chunk, so compressed output is written as
+    independently compressed blocks on the writer's (or a shared) pool.
+
+    Args:
+        path: Output file
+        compression: ``'gzip'``, ``'zstd'``, ``'bz2'``, ``'xz'`` or None
+        executor: Shared compression pool; None compresses on the calling
+            thread
+        buffer_size: Characters buffered between writes
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        buffer_size: int = CSV_BUFFER_SIZE,
+    ):
+        self._chunks = ChunkWriter(path, compression, threads=1 if executor is None else None, executor=executor)
+        self._buffer_size = buffer_size
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+
+    def writerow(self, row: Sequence[str]) -> None:
+        self._writer.writerow(row)
+        if self._buffer.tell() >= self._buffer_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._chunks.write(self._buffer.getvalue().encode('utf-8'))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def close(self) -> None:
+        """Write the buffered rows and close the file."""
+        try:
+            self._flush()
+        finally:
+            self._chunks.close()
+
+    def __enter__(self) -> 'CsvChunkWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_csv(path: str | Path, threads: Optional[int] = None) -> TextIO:
+    """Open a plain or compressed CSV file as UTF-8 text for ``csv`` readers.
+
+    Args:
+        path: Path to a ``.csv``, ``.csv.gz``, ``.csv.zst``, ``.csv.bz2`` or
+            ``.csv.xz`` file; the format is detected from the magic bytes
+        threads: Decoder threads for seekable formats, see ``open_binary``
+
+    Returns:
+        Text file object opened with ``newline=''``
+    """
+    return io.TextIOWrapper(open_binary(path, threads), encoding='utf-8', newline='')
@@ -0,0 +1,143 @@
+"""Batched JSON Lines reading and writing for Synthea models."""
+
+from functools import cache, partial
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, Optional, TypeVar
+
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+
+from ._io import ChunkWriter, compression_for, open_binary
+from ._parallel import parallel_map, resolve_workers
+from ._rows import PreparedRow, row_plan
+from ._trusted import check_fingerprint, trusted_plan
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+T = TypeVar('T', bound='SyntheaBaseModel')
+
+DEFAULT_CHUNK_SIZE = 10_000
+"""Records serialized per chunk (one write, one compression job)."""
+
+_READ_SIZE = 4 * 1024 * 1024
+
+
+@cache
+def _list_adapter(model: type['SyntheaBaseModel']) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def write_jsonl(
+    model: type[T],
+    records: Iterable[T],
+    path: str | Path,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    compression: Optional[str] = 'auto',
+    threads: Optional[int] = None,
+) -> int:
+    """Write records as JSON Lines keyed by CSV column names.
+
+    Each chunk is serialized by pydantic-core (one ``to_json`` call per
+    record, no Python-level dumps) and handed to ``ChunkWriter`` as a single
+    buffer, which compresses chunks in parallel when requested.
+
+    Returns:
+        Number of records written
+    """
+    if compression == 'auto':
+        compression = compression_for(path)
+    to_json = model.__pydantic_serializer__.to_json
+    count = 0
+    records = iter(records)
+    with ChunkWriter(path, compression, threads) as writer:
+        while chunk := list(islice(records, chunk_size)):
+            lines = [to_json(record, by_alias=True) for record in chunk]
+            lines.append(b'')
+            writer.write(b'\n'.join(lines))
+            count += len(chunk)
+    return count
+
+
+def _validate_lines(model: type[T], lines: list[bytes]) -> list[T]:
+    """Validate a block of JSON lines into model instances.
+
+    The block is parsed by pydantic-core in one call. Each object is then
+    prepared by the ``RowPlan`` of its key order (the same empty-string,
+    Literal and version handling as CSV rows) and the whole block validated
+    with one ``TypeAdapter(list[model])`` call.
+    """
+    objects = from_json(b'[' + b','.join(lines) + b']')
+    prepared: list[PreparedRow] = []
+    plan = None
+    for obj in objects:
+        if not isinstance(obj, dict):
+            raise ValueError(f"Expected a JSON object per line, got {type(obj).__name__}")
+        keys = tuple(obj)
+        if plan is None or keys != plan.header:
+            plan = row_plan(model, keys)
+        prepared.append(plan.prepare(list(obj.values())))
+    return _list_adapter(model).validate_python(prepared)
+
+
+def _construct_lines(model: type[T], lines: list[bytes]) -> list[T]:
+    """Build model instances from a block of trusted JSON lines, without validation."""
+    objects = from_json(b'[' + b','.join(lines) + b']')
+    records: list[T] = []
+    plan = None
+    for obj in objects:
+        if not isinstance(obj, dict):
+            raise ValueError(f"Expected a JSON object per line, got {type(obj).__name__}")
+        keys = tuple(obj)
+        if plan is None or keys != plan.header:
+            plan = trusted_plan(model, keys)
+        records.append(plan.construct(list(obj.values())))
+    return records
+
+
+def _line_blocks(f: BinaryIO, read_size: int) -> Iterator[list[bytes]]:
+    """Split a stream into blocks of complete, non-blank lines."""
+    remainder = b''
+    while True:
+        block = f.read(read_size)
+        if not block:
+            break
+        block = remainder + block
+        end = block.rfind(b'\n') + 1
+        remainder = block[end:]
+        lines = list(filter(bytes.strip, block[:end].split(b'\n')))
+        if lines:
+            yield lines
+    if remainder.strip():
+        yield [remainder]
+
+
+def iter_jsonl(
+    model: type[T],
+    path: str | Path,
+    *,
+    threads: Optional[int] = None,
+    read_size: int = _READ_SIZE,
+    trusted: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Iterator[T]:
+    """Validate JSON Lines into model instances, one block of lines at a time.
+
+    Blank lines are skipped. With ``trusted`` set to the model's schema
+    fingerprint, lines are constructed without validation instead. With
+    more than one worker, blocks are validated on a thread pool (see
+    ``_parallel``) and yielded in file order.
+    """
+    load = _validate_lines
+    if trusted is not None:
+        check_fingerprint(model, trusted)
+        load = _construct_lines
+    workers = resolve_workers(model, workers)
+    if workers > 1:
+        # Build the cached adapter before threads race to create it
+        _list_adapter(model)
+    with open_binary(path, threads) as f:
+        for records in parallel_map(partial(load, model), _line_blocks(f, read_size), workers, chunk_size=1):
+            yield from records
@@ -0,0 +1,99 @@
+"""Thread-parallel validation of row chunks, for free-threaded CPython.
+
+On a free-threaded build (``python3.13t``) with the GIL disabled, pydantic
+validators run on several threads at once, so chunks of rows can be
+validated by a thread pool without the pickling a process pool needs. With
+the GIL the threads would only take turns, so loaders validate inline by
+default.
+
+Everything a validating thread touches is either immutable once built
+(pydantic-core validators, ``FieldSpec`` tables, ``RowPlan`` columns) or a
+dict updated by single atomic operations: plan caches insert with
+``setdefault`` so racing threads end up sharing one plan, and UUID intern
+tables only ``get``, store or ``clear``.
+"""
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+CHUNK_SIZE = 1000
+"""Rows validated per thread task."""
+
+
+def free_threaded() -> bool:
+    """Whether this interpreter is running without the GIL.
+
+    True only on a free-threaded build whose GIL has not been re-enabled
+    (e.g. by ``PYTHON_GIL=1`` or an extension module that needs it).
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def default_workers() -> int:
+    """Validation threads to use: every CPU without the GIL, else 1 (inline)."""
+    if not free_threaded():
+        return 1
+    count = getattr(os, 'process_cpu_count', os.cpu_count)()
+    return count or 1
+
+
+def resolve_workers(model: type['SyntheaBaseModel'], workers: Optional[int]) -> int:
+    """Number of validation threads, with the model's validator built if threads are used.
+
+    Models defer their schema build to first use, and building is not safe
+    to race, so it happens here before any thread starts.
+    """
+    if workers is None:
+        workers = default_workers()
+    if workers > 1 and not model.__pydantic_complete__:
+        model.model_rebuild()
+    return workers
+
+
+def parallel_map(
+    function: Callable[[T], R],
+    items: Iterable[T],
+    workers: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[R]:
+    """Apply ``function`` to items on a thread pool, yielding results in order.
+
+    Items are grouped into chunks of ``chunk_size``, one thread task each,
+    and at most ``2 * workers`` chunks are in flight, so reading stays only
+    a little ahead of the consumer. With one worker this is a plain ``map``.
+
+    Raises:
+        Exception: The first error raised by ``function``, in item order
+    """
+    if workers <= 1:
+        yield from map(function, items)
+        return
+    items = iter(items)
+    chunks = iter(lambda: list(islice(items, chunk_size)), [])
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='synthea-validate') as pool:
+        pending: deque = deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_apply, function, chunk))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _apply(function: Callable[[T], R], chunk: list[T]) -> list[R]:
+    return [function(item) for item in chunk]
@@ -1,6 +1,7 @@
 """Utility functions for parsing CSV data values."""
 
-from decimal import Decimal
+from datetime import date, datetime, timezone
+from decimal import ROUND_HALF_EVEN, Decimal
 from typing import Any, Optional
 
 
@@ -61,4 +62,53 @@ def int_or_none(value: Any) -> Optional[int]:
     if isinstance(value, float):
         return int(value)
     
-    return None
\ No newline at end of file
+    return None
+
+
+def decimal_to_fixed(value: Any, places: int = 2) -> Optional[int]:
+    """Convert a monetary value to a fixed-point integer.
+    
+    Args:
+        value: Input value to convert (Decimal, number or string)
+        places: Number of decimal places kept in the integer representation
+        
+    Returns:
+        Integer holding ``value * 10**places`` (rounded half-even), or None
+        for empty/invalid values
+    """
+    value = decimal_or_none(value)
+    if value is None:
+        return None
+    return int(value.scaleb(places).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def fixed_to_decimal(value: int, places: int = 2) -> Decimal:
+    """Convert a fixed-point integer back to a Decimal.
+    
+    Args:
+        value: Fixed-point integer as produced by ``decimal_to_fixed``
+        places: Number of decimal places encoded in ``value``
+        
+    Returns:
+        Decimal value
+    """
+    return Decimal(value).scaleb(-places)
+
+
+def to_epoch_seconds(value: date) -> int:
+    """Convert a date or datetime to integer seconds since the Unix epoch.
+    
+    Naive datetimes and plain dates are interpreted as UTC, matching the
+    ``Z``-suffixed timestamps Synthea writes.
+    
+    Args:
+        value: Date or datetime to convert
+        
+    Returns:
+        Seconds since 1970-01-01T00:00:00Z
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
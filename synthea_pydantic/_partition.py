@@ -0,0 +1,184 @@
+"""Hash partitioning of raw export rows by patient."""
+
+import csv
+import os
+import shutil
+import zlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from ._io import CSV_BUFFER_SIZE, CsvChunkWriter, open_csv
+from .tables import TABLES, table_name
+
+PATIENT_COLUMNS: tuple[str, ...] = ('PATIENT', 'PATIENTID')
+"""Columns holding the patient foreign key, in order of preference."""
+
+BUFFER_SIZE = CSV_BUFFER_SIZE
+"""Characters of CSV text buffered per partition before a chunk is written."""
+
+_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst', 'bz2': '.bz2', 'xz': '.xz'}
+
+
+def patient_column(table: str, header: Sequence[str]) -> Optional[int]:
+    """Index of the column identifying the patient of each row, if any."""
+    if table == 'patients':
+        return header.index('Id') if 'Id' in header else None
+    for column in PATIENT_COLUMNS:
+        if column in header:
+            return header.index(column)
+    return None
+
+
+def partition_of(patient: str, partitions: int) -> int:
+    """Stable partition number of a patient id (CRC-32 of its text)."""
+    return zlib.crc32(patient.encode()) % partitions
+
+
+def partition_file(
+    path: str | Path,
+    directories: Sequence[Path],
+    *,
+    replicate: bool = False,
+    compression: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    buffer_size: int = BUFFER_SIZE,
+) -> bool:
+    """Split one CSV file by patient into ``<directory>/<table>.csv`` files.
+
+    Rows are copied as raw text without validation, in one pass over the
+    file. Every partition gets the header, even if no rows hash to it.
+
+    Args:
+        path: CSV file, optionally compressed
+        directories: One output directory per partition
+        replicate: Copy a table without a patient column to every partition
+        compression: Compression of the output files, which then end in
+            ``.csv.gz``, ``.csv.zst``, ``.csv.bz2`` or ``.csv.xz``
+        executor: Thread pool compressing output chunks. None compresses on
+            the calling thread.
+        buffer_size: Characters buffered per partition between writes
+
+    Returns:
+        False if the table has no patient column and is not replicated
+        (nothing is written)
+    """
+    table = table_name(path)
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return False
+        key = patient_column(table, header)
+        if key is None and not replicate:
+            return False
+        name = f"{table}.csv{_EXTENSIONS[compression]}"
+        targets = directories if key is not None else directories[:1]
+        writers = [CsvChunkWriter(directory / name, compression, executor, buffer_size) for directory in targets]
+        try:
+            for writer in writers:
+                writer.writerow(header)
+            if key is None:
+                writerow = writers[0].writerow
+                for row in reader:
+                    if row:
+                        writerow(row)
+            else:
+                partitions = len(writers)
+                crc32 = zlib.crc32
+                for row in reader:
+                    if row:
+                        writers[crc32(row[key].encode()) % partitions].writerow(row)
+        finally:
+            for writer in writers:
+                writer.close()
+    if key is None:
+        for directory in directories[1:]:
+            shutil.copyfile(directories[0] / name, directory / name)
+    return True
+
+
+def _partition_directories(destination: str | Path, partitions: int) -> list[Path]:
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    destination = Path(destination)
+    directories = [destination / f"part-{i:05d}" for i in range(partitions)]
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+    return directories
+
+
+def partition_files(paths: Iterable[str | Path], destination: str | Path, partitions: int) -> list[Path]:
+    """Hash-partition patient-scoped CSV files into ``part-NNNNN`` directories.
+
+    Tables are processed one at a time, so only ``partitions`` files are open
+    at once. Rows of one patient always land in the same partition.
+
+    Returns:
+        The partition directories
+    """
+    directories = _partition_directories(destination, partitions)
+    for path in paths:
+        partition_file(path, directories)
+    return directories
+
+
+def partition_export(
+    src_dir: str | Path,
+    dst_dir: str | Path,
+    n: int,
+    *,
+    compression: Optional[str] = None,
+    threads: Optional[int] = None,
+    buffer_size: int = BUFFER_SIZE,
+) -> list[Path]:
+    """Split an export into ``n`` partitions that can be joined without a shuffle.
+
+    Every table is streamed once and each row goes to partition
+    ``crc32(patient id) % n`` of its patient foreign key (``PATIENT``,
+    ``PATIENTID``, or ``Id`` for patients), so all rows of one patient share
+    a partition number across tables, and the same export always splits the
+    same way. Tables without a patient column (organizations, providers and
+    payers) are reference data and copied to every partition.
+
+    Output rows are buffered per partition and written as chunks; with
+    compression the chunks are compressed on a shared thread pool while
+    the next rows are being split.
+
+    Example:
+        >>> partition_export('output/csv', 'partitioned', 8, compression='zstd')
+        [PosixPath('partitioned/part-00000'), ...]
+        >>> # partitioned/part-00003/{patients,encounters,...,payers}.csv.zst
+
+    Args:
+        src_dir: Export directory with the table CSV files
+        dst_dir: Directory receiving ``part-NNNNN`` subdirectories
+        n: Number of partitions
+        compression: ``'gzip'``, ``'zstd'``, ``'bz2'``, ``'xz'`` or None
+        threads: Compression threads. None uses up to 4 (or the CPU count
+            if lower); 1 compresses on the calling thread.
+        buffer_size: Characters buffered per partition between writes
+
+    Returns:
+        The partition directories
+
+    Raises:
+        ValueError: If ``n`` is less than 1 or the compression is unknown
+    """
+    if compression not in _EXTENSIONS:
+        raise ValueError(f"Unknown compression {compression!r}")
+    directories = _partition_directories(dst_dir, n)
+    paths = sorted(path for path in Path(src_dir).iterdir() if path.is_file() and table_name(path) in TABLES)
+    if threads is None:
+        threads = min(4, os.cpu_count() or 1)
+    executor = ThreadPoolExecutor(max_workers=threads) if compression is not None and threads > 1 else None
+    try:
+        for path in paths:
+            partition_file(
+                path, directories, replicate=True, compression=compression, executor=executor,
+                buffer_size=buffer_size,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return directories
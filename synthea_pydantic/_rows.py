@@ -0,0 +1,105 @@
+"""Header-driven row plans that validate CSV rows without DictReader."""
+
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+
+from ._fields import specs_by_key
+from .versions import SchemaMatch, detect_schema
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+
+class PreparedRow(dict):
+    """Row dict that has already been through ``preprocess_csv``.
+
+    ``SyntheaBaseModel.preprocess_csv`` passes instances through unchanged,
+    so a row prepared by a ``RowPlan`` is not copied again during validation.
+    """
+
+    __slots__ = ()
+
+
+class RowPlan:
+    """Positional mapping from a CSV header to model fields.
+
+    The header is resolved once: it is fingerprinted against the known
+    Synthea layouts (see ``versions``), renamed columns are mapped onto the
+    model aliases, columns that are not model fields are dropped and each
+    Literal column gets its case-folding table up front. Rows are then
+    turned into a single ``PreparedRow`` each, with the same empty-string
+    and Literal handling as ``preprocess_csv`` plus the layout's converters.
+
+    Args:
+        model: Model class the rows are validated against
+        header: CSV header row
+    """
+
+    def __init__(self, model: type['SyntheaBaseModel'], header: Sequence[str]):
+        self.model = model
+        self.header = tuple(header)
+        self.schema: SchemaMatch = detect_schema(model, self.header)
+        specs = specs_by_key(model)
+        converters = self.schema.converters
+        columns = []
+        for i, column in enumerate(self.schema.columns):
+            spec = specs.get(column)
+            if spec is None:
+                continue
+            literals = frozenset(spec.literals) if spec.lower_literals else None
+            columns.append((i, column, literals, spec.lower_literals or None, converters.get(column)))
+        self.columns: tuple[
+            tuple[int, str, Optional[frozenset], Optional[dict[str, str]], Optional[Callable[[str], Any]]], ...
+        ] = tuple(columns)
+        self.width = len(self.header)
+
+    @property
+    def version(self) -> str:
+        """Synthea version label detected from the header."""
+        return self.schema.version
+
+    def prepare(self, row: Sequence[Any]) -> PreparedRow:
+        """Map a raw CSV row (or the values of a JSON object) to a preprocessed row dict keyed by column name."""
+        if len(row) > self.width:
+            raise ValueError(f"Row has {len(row)} values but the header has {self.width} columns")
+        prepared = PreparedRow()
+        short = len(row) < self.width
+        for i, column, literals, lowered, convert in self.columns:
+            if short and i >= len(row):
+                # csv.DictReader fills missing trailing values with None
+                prepared[column] = None
+                continue
+            value = row[i]
+            if not isinstance(value, str):
+                # JSON Lines values: null, numbers and booleans are already typed
+                prepared[column] = value
+            elif value == '':
+                prepared[column] = None
+            elif convert is not None:
+                try:
+                    prepared[column] = convert(value)
+                except ValueError:
+                    # Leave malformed values for the model to report
+                    prepared[column] = value
+            elif lowered is not None and value not in literals:
+                prepared[column] = lowered.get(value.lower(), value)
+            else:
+                prepared[column] = value
+        self.model._preprocess_row(prepared)
+        return prepared
+
+    def validate(self, row: Sequence[str]) -> 'SyntheaBaseModel':
+        """Validate a raw CSV row into a model instance."""
+        return self.model.model_validate(self.prepare(row))
+
+
+_PLANS: dict[tuple[type, tuple[str, ...]], RowPlan] = {}
+
+
+def row_plan(model: type['SyntheaBaseModel'], header: Sequence[str]) -> RowPlan:
+    """Return the (cached) RowPlan for a model and header."""
+    key = (model, tuple(header))
+    plan = _PLANS.get(key)
+    if plan is None:
+        # setdefault keeps one plan per key when threads race to build it
+        plan = _PLANS.setdefault(key, RowPlan(model, header))
+    return plan
@@ -0,0 +1,195 @@
+"""Trusted construction of models from data that was already validated.
+
+Records reloaded from our own stores (CSV or JSON Lines written from model
+instances, database rows) do not need pydantic validation. A ``TrustedPlan``
+converts each value with a single per-field constructor and builds the
+instance the way ``model_construct`` does, without the validators,
+``preprocess_csv`` or Literal case folding. Nothing is checked beyond what
+the constructors themselves reject, so the loaders only take this path when
+the caller presents the ``schema_fingerprint`` the data was written with.
+"""
+
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+from uuid import UUID, SafeUUID
+
+from ._fields import field_specs, specs_by_key
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+_INTERN_LIMIT = 1 << 16
+"""Distinct foreign keys remembered per column before the cache is reset."""
+
+_TRUE = frozenset({'1', 'true', 'True', 'TRUE', 't', 'y', 'yes', 'on'})
+
+
+def _typed(parse: Callable[[str], Any]) -> Callable[[Any], Any]:
+    """Converter that parses strings and passes values of other types through."""
+    def convert(value: Any) -> Any:
+        return parse(value) if type(value) is str else value
+    return convert
+
+
+def _parse_uuid(value: str) -> UUID:
+    """``UUID(value)`` without the generic parsing of ``UUID.__init__``."""
+    digits = int(value.replace('-', ''), 16)
+    if len(value) != 36 or digits >> 128:
+        raise ValueError(f"badly formed UUID string: {value!r}")
+    uuid = object.__new__(UUID)
+    object.__setattr__(uuid, 'int', digits)
+    object.__setattr__(uuid, 'is_safe', SafeUUID.unknown)
+    return uuid
+
+
+def _interned_uuid() -> Callable[[Any], Any]:
+    """UUID converter that reuses the instance for repeated values.
+
+    Foreign key columns repeat the same few ids across many rows, so the
+    parsed UUIDs are cached (and shared between records) per column.
+    """
+    cache: dict[str, UUID] = {}
+
+    def convert(value: Any) -> Any:
+        if type(value) is not str:
+            return value
+        uuid = cache.get(value)
+        if uuid is None:
+            if len(cache) >= _INTERN_LIMIT:
+                cache.clear()
+            uuid = cache[value] = _parse_uuid(value)
+        return uuid
+    return convert
+
+
+_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    'uuid': _typed(_parse_uuid),
+    'datetime': _typed(datetime.fromisoformat),
+    'date': _typed(date.fromisoformat),
+    'decimal': _typed(Decimal),
+    'int': _typed(int),
+    'float': _typed(float),
+    'bool': _typed(_TRUE.__contains__),
+}
+"""Converter per ``FieldSpec.kind``; str, literal and union values are kept as is."""
+
+
+@cache
+def schema_fingerprint(model: type['SyntheaBaseModel']) -> str:
+    """Short hash of a model's field names, aliases and types.
+
+    It changes whenever a field is added, removed, renamed, retyped or its
+    Literal values change, so data written under another model definition is
+    refused by the trusted loaders.
+    """
+    parts = [model.__name__]
+    for spec in field_specs(model):
+        parts.append(repr((spec.name, spec.alias, spec.kind, spec.nullable, spec.literals, spec.members)))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:16]
+
+
+def check_fingerprint(model: type['SyntheaBaseModel'], fingerprint: str) -> None:
+    """Raise ValueError unless ``fingerprint`` matches the model's current schema."""
+    expected = schema_fingerprint(model)
+    if fingerprint != expected:
+        raise ValueError(
+            f"Schema fingerprint {fingerprint!r} does not match {model.__name__} ({expected!r}); "
+            f"load the data without trusted= to validate it"
+        )
+
+
+class TrustedPlan:
+    """Positional mapping from column names to fields for trusted construction.
+
+    Columns are matched by alias or field name; unknown columns are dropped
+    and fields without a column get their default. Models that override
+    ``_preprocess_row`` still have it applied (on raw values keyed by
+    alias), since it decides types the annotations cannot, such as numeric
+    Observation values.
+
+    Args:
+        model: Model class to construct
+        header: Column names of the rows
+
+    Raises:
+        ValueError: If a required field has no column
+    """
+
+    def __init__(self, model: type['SyntheaBaseModel'], header: Sequence[str]):
+        from .base import SyntheaBaseModel
+
+        self.model = model
+        self.header = tuple(header)
+        specs = specs_by_key(model)
+        columns = []
+        present = set()
+        for i, column in enumerate(self.header):
+            spec = specs.get(column)
+            if spec is None or spec.name in present:
+                continue
+            present.add(spec.name)
+            if spec.kind == 'uuid' and spec.name != 'id':
+                convert = _interned_uuid()
+            else:
+                convert = _CONVERTERS.get(spec.kind)
+            columns.append((i, spec.name, spec.alias, convert))
+        missing = [spec.alias for spec in field_specs(model) if spec.required and spec.name not in present]
+        if missing:
+            raise ValueError(f"Columns missing for {model.__name__}: {', '.join(missing)}")
+        self.columns: tuple[tuple[int, str, str, Optional[Callable[[Any], Any]]], ...] = tuple(columns)
+        # Every field in declaration order, holding its default until a
+        # column overwrites it
+        self.template = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+        }
+        self.fields_set = frozenset(present)
+        self.width = len(self.header)
+        self.hook = None
+        if model._preprocess_row.__func__ is not SyntheaBaseModel._preprocess_row.__func__:
+            self.hook = model._preprocess_row
+
+    def construct(self, row: Sequence[Any]) -> 'SyntheaBaseModel':
+        """Build a model instance from one row of (string or typed) values."""
+        if len(row) != self.width:
+            raise ValueError(f"Row has {len(row)} values but the header has {self.width} columns")
+        if self.hook is not None:
+            raw = {alias: (None if row[i] == '' else row[i]) for i, _, alias, _ in self.columns}
+            self.hook(raw)
+            values = self.template.copy()
+            for _, name, alias, convert in self.columns:
+                value = raw[alias]
+                values[name] = value if value is None or convert is None else convert(value)
+        else:
+            values = self.template.copy()
+            for i, name, _, convert in self.columns:
+                value = row[i]
+                if value is None or value == '':
+                    values[name] = None
+                else:
+                    values[name] = value if convert is None else convert(value)
+        # Same state model_construct leaves behind, without its per-call
+        # alias and default resolution
+        instance = self.model.__new__(self.model)
+        _setattr = object.__setattr__
+        _setattr(instance, '__dict__', values)
+        _setattr(instance, '__pydantic_fields_set__', set(self.fields_set))
+        _setattr(instance, '__pydantic_extra__', None)
+        _setattr(instance, '__pydantic_private__', None)
+        return instance
+
+
+_PLANS: dict[tuple[type, tuple[str, ...]], TrustedPlan] = {}
+
+
+def trusted_plan(model: type['SyntheaBaseModel'], header: Sequence[str]) -> TrustedPlan:
+    """Return the (cached) TrustedPlan for a model and header."""
+    key = (model, tuple(header))
+    plan = _PLANS.get(key)
+    if plan is None:
+        # setdefault keeps one plan per key when threads race to build it
+        plan = _PLANS.setdefault(key, TrustedPlan(model, header))
+    return plan
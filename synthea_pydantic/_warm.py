@@ -0,0 +1,5 @@
+"""Preload module that warms every model when imported by a fork server."""
+
+from .warmup import warm_up
+
+warm_up()
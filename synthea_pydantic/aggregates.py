@@ -0,0 +1,173 @@
+"""Streaming cost rollups over Synthea encounters, medications and procedures."""
+
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+from uuid import UUID
+
+from ._parsers import decimal_to_fixed, fixed_to_decimal
+from .base import SyntheaBaseModel
+from .encounters import Encounter
+from .medications import Medication
+from .procedures import Procedure
+
+MONEY_PLACES = 2
+"""Decimal places kept by the fixed-point money accumulators (cents)."""
+
+DIMENSIONS = ('patient', 'payer', 'organization', 'year')
+"""Columns a ``CostRollup`` can group by."""
+
+GroupKey = tuple[Union[UUID, int, None], ...]
+
+
+@dataclass
+class CostTotals:
+    """Aggregate state for one group of a ``CostRollup``.
+
+    Money is accumulated as fixed-point integers (``*_cents`` fields) so that
+    sums are exact and shards can be merged in any order. The properties
+    without the suffix expose the same totals as ``Decimal``.
+    """
+
+    encounters: int = 0
+    encounter_cost_cents: int = 0
+    encounter_coverage_cents: int = 0
+    medications: int = 0
+    medication_cost_cents: int = 0
+    medication_coverage_cents: int = 0
+    procedures: int = 0
+    procedure_cost_cents: int = 0
+
+    @property
+    def encounter_cost(self) -> Decimal:
+        """Sum of ``Encounter.total_claim_cost``."""
+        return fixed_to_decimal(self.encounter_cost_cents, MONEY_PLACES)
+
+    @property
+    def encounter_coverage(self) -> Decimal:
+        """Sum of ``Encounter.payer_coverage``."""
+        return fixed_to_decimal(self.encounter_coverage_cents, MONEY_PLACES)
+
+    @property
+    def medication_cost(self) -> Decimal:
+        """Sum of ``Medication.totalcost``."""
+        return fixed_to_decimal(self.medication_cost_cents, MONEY_PLACES)
+
+    @property
+    def medication_coverage(self) -> Decimal:
+        """Sum of ``Medication.payer_coverage``."""
+        return fixed_to_decimal(self.medication_coverage_cents, MONEY_PLACES)
+
+    @property
+    def procedure_cost(self) -> Decimal:
+        """Sum of ``Procedure.base_cost``."""
+        return fixed_to_decimal(self.procedure_cost_cents, MONEY_PLACES)
+
+    def merge(self, other: 'CostTotals') -> 'CostTotals':
+        """Add another group's totals into this one in place."""
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+        return self
+
+
+class CostRollup:
+    """Incremental group-by accumulator for Synthea cost fields.
+
+    Records are folded into per-group ``CostTotals`` as they arrive, so only
+    the aggregate state is kept in memory. Encounters, medications and
+    procedures are tracked in separate columns because
+    ``Encounter.total_claim_cost`` already includes the line items.
+
+    Example:
+        >>> rollup = CostRollup(by=('payer', 'year'))
+        >>> rollup.add_csv(Encounter, 'encounters.csv')
+        >>> rollup.add_csv(Medication, 'medications.csv')
+        >>> rollup[(payer_id, 2020)].encounter_cost
+
+    Args:
+        by: Dimensions to group by, any of ``DIMENSIONS``. Records without a
+            value for a dimension (e.g. procedures have no payer) are
+            grouped under None.
+    """
+
+    def __init__(self, by: tuple[str, ...] = ('patient', 'year')):
+        unknown = [d for d in by if d not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown rollup dimension(s) {unknown}; expected any of {DIMENSIONS}")
+        self.by = tuple(by)
+        self._groups: dict[GroupKey, CostTotals] = {}
+
+    def _key(self, record: SyntheaBaseModel) -> GroupKey:
+        return tuple(
+            record.start.year if dim == 'year' else getattr(record, dim, None)
+            for dim in self.by
+        )
+
+    def _totals(self, record: SyntheaBaseModel) -> CostTotals:
+        key = self._key(record)
+        totals = self._groups.get(key)
+        if totals is None:
+            totals = self._groups[key] = CostTotals()
+        return totals
+
+    def add(self, record: SyntheaBaseModel) -> None:
+        """Fold a single Encounter, Medication or Procedure into the rollup."""
+        if isinstance(record, Encounter):
+            totals = self._totals(record)
+            totals.encounters += 1
+            totals.encounter_cost_cents += decimal_to_fixed(record.total_claim_cost, MONEY_PLACES) or 0
+            totals.encounter_coverage_cents += decimal_to_fixed(record.payer_coverage, MONEY_PLACES) or 0
+        elif isinstance(record, Medication):
+            totals = self._totals(record)
+            totals.medications += 1
+            totals.medication_cost_cents += decimal_to_fixed(record.totalcost, MONEY_PLACES) or 0
+            totals.medication_coverage_cents += decimal_to_fixed(record.payer_coverage, MONEY_PLACES) or 0
+        elif isinstance(record, Procedure):
+            totals = self._totals(record)
+            totals.procedures += 1
+            totals.procedure_cost_cents += decimal_to_fixed(record.base_cost, MONEY_PLACES) or 0
+        else:
+            raise TypeError(f"Cannot roll up costs for {type(record).__name__} records")
+
+    def update(self, records: Iterable[SyntheaBaseModel]) -> 'CostRollup':
+        """Fold an iterable (or ``iter_csv`` stream) of records into the rollup."""
+        for record in records:
+            self.add(record)
+        return self
+
+    def add_csv(self, model: type[SyntheaBaseModel], path: str | Path) -> 'CostRollup':
+        """Stream a CSV file through ``model.iter_csv`` into the rollup."""
+        return self.update(model.iter_csv(path))
+
+    def merge(self, other: 'CostRollup') -> 'CostRollup':
+        """Merge the partial result of another shard into this rollup in place."""
+        if other.by != self.by:
+            raise ValueError(f"Cannot merge rollups grouped by {other.by} into {self.by}")
+        for key, totals in other._groups.items():
+            mine = self._groups.get(key)
+            if mine is None:
+                self._groups[key] = CostTotals().merge(totals)
+            else:
+                mine.merge(totals)
+        return self
+
+    def get(self, key: GroupKey) -> Optional[CostTotals]:
+        """Return the totals for a group, or None if nothing was added for it."""
+        return self._groups.get(key)
+
+    def __getitem__(self, key: GroupKey) -> CostTotals:
+        return self._groups[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._groups
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __iter__(self) -> Iterator[GroupKey]:
+        return iter(self._groups)
+
+    def items(self) -> Iterator[tuple[GroupKey, CostTotals]]:
+        """Iterate over ``(group key, totals)`` pairs."""
+        return iter(self._groups.items())
@@ -1,15 +1,20 @@
 """Base model for all Synthea CSV models."""
 
 import csv
-from decimal import Decimal
 from pathlib import Path
-from typing import Iterator, TypeVar, Union, get_origin, get_args
+from typing import Any, Iterable, Iterator, Mapping, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict, model_validator, field_validator
 
-from typing_extensions import Literal
-
+from . import _binary
+from ._fields import field_specs, specs_by_key
+from ._io import open_csv
+from ._jsonl import DEFAULT_CHUNK_SIZE, iter_jsonl, write_jsonl
+from ._parallel import parallel_map, resolve_workers
 from ._parsers import decimal_or_none
+from ._rows import PreparedRow, row_plan
+from ._trusted import check_fingerprint, schema_fingerprint, trusted_plan
+from .versions import SchemaMatch, detect_schema
 
 T = TypeVar('T', bound='SyntheaBaseModel')
 
@@ -20,12 +25,16 @@ class SyntheaBaseModel(BaseModel):
     model_config = ConfigDict(
         str_strip_whitespace=True,
         populate_by_name=True,  # Accept both field name and alias
+        defer_build=True,  # Build validators on first use, not at import
     )
     
     @model_validator(mode='before')
     @classmethod
     def preprocess_csv(cls, data):
         """Convert empty strings to None and apply field coercions."""
+        if isinstance(data, PreparedRow):
+            # Already preprocessed by a RowPlan
+            return data
         if isinstance(data, dict):
             processed = {}
             for k, v in data.items():
@@ -36,104 +45,327 @@ class SyntheaBaseModel(BaseModel):
                 
                 # Apply case normalization for Literal string fields
                 processed[k] = cls._normalize_literal_field(k, v)
+            cls._preprocess_row(processed)
             return processed
         return data
     
+    @classmethod
+    def _preprocess_row(cls, row: dict) -> None:
+        """Apply model-specific coercions to a preprocessed row in place.
+        
+        Called after empty strings have been converted to None and Literal
+        values case-normalized. Subclasses override this instead of
+        ``preprocess_csv`` so that rows are not copied again.
+        """
+    
     @classmethod
     def _normalize_literal_field(cls, field_name: str, value):
         """Normalize string values for Literal fields to uppercase."""
         if not isinstance(value, str):
             return value
-            
-        # Get field info from model annotations
-        field_info = None
-        for name, field in cls.model_fields.items():
-            if field.alias == field_name or name == field_name:
-                field_info = field
-                break
-        
-        if not field_info:
+        
+        spec = specs_by_key(cls).get(field_name)
+        if spec is None:
             return value
-            
-        # Check if this is a Literal field with string values
-        annotation = field_info.annotation
-        literal_values = None
-        
-        # Handle Optional[Literal[...]] and Union[Literal[...], None]
-        if get_origin(annotation) is Union:
-            args = get_args(annotation)
-            # Look for a Literal type in the Union
-            for arg in args:
-                if get_origin(arg) is Literal:
-                    literal_values = get_args(arg)
-                    break
-        elif get_origin(annotation) is Literal:
-            literal_values = get_args(annotation)
-        
-        # If we found Literal values, try case normalization
-        if literal_values and all(isinstance(val, str) for val in literal_values):
-            # Check if the original case-sensitive value matches first
-            if value in literal_values:
-                return value
-            
-            # Try case-insensitive matching
-            value_lower = value.lower()
-            for literal_val in literal_values:
-                if literal_val.lower() == value_lower:
-                    return literal_val
         
-        return value
+        # Only Literal fields whose values are all strings have a lookup table
+        lowered = spec.lower_literals
+        if not lowered or value in spec.literals:
+            return value
+        
+        # Try case-insensitive matching
+        return lowered.get(value.lower(), value)
     
     @field_validator('*', mode='before')
     @classmethod
     def validate_decimal_fields(cls, value, info):
         """Apply decimal_or_none to all Decimal fields."""
-        # Get the field info for this field
-        field_name = info.field_name
-        if field_name not in cls.model_fields:
-            return value
-            
-        field_info = cls.model_fields[field_name]
-        annotation = field_info.annotation
-        
-        # Check if this is a Decimal field (including Optional[Decimal])
-        is_decimal = False
-        if annotation is Decimal:
-            is_decimal = True
-        elif get_origin(annotation) is Union:
-            args = get_args(annotation)
-            # Check if Decimal is in the Union (for Optional[Decimal])
-            if Decimal in args:
-                is_decimal = True
-        
-        if is_decimal:
+        if info.field_name in _decimal_fields(cls):
             return decimal_or_none(value)
-        
         return value
     
     @classmethod
-    def from_csv(cls: type[T], path: str | Path) -> list[T]:
+    def from_csv(
+        cls: type[T],
+        path: str | Path,
+        *,
+        trusted: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> list[T]:
         """Load all records from a CSV file.
         
         Args:
-            path: Path to the CSV file
-            
+            path: Path to the CSV file, optionally gzip/zstd/bz2/xz compressed
+            trusted: Schema fingerprint the file was written with; skips
+                validation, see ``construct_trusted``
+            workers: Validation threads, see ``iter_csv``
+        
         Returns:
             List of model instances
         """
-        with open(path, newline='') as f:
-            return [cls(**row) for row in csv.DictReader(f)]
+        return list(cls.iter_csv(path, trusted=trusted, workers=workers))
     
     @classmethod
-    def iter_csv(cls: type[T], path: str | Path) -> Iterator[T]:
+    def iter_csv(
+        cls: type[T],
+        path: str | Path,
+        *,
+        trusted: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[T]:
         """Iterate over records from a CSV file (memory-efficient).
         
+        The header is resolved once into a positional ``RowPlan``, so each
+        row is validated from the list ``csv.reader`` produces with a single
+        dict allocation.
+        
+        With more than one worker, chunks of rows are validated on a thread
+        pool and yielded in file order. That scales across cores on
+        free-threaded CPython (3.13t); with the GIL it only adds overhead,
+        so by default rows are then validated inline.
+        
+        Args:
+            path: Path to the CSV file, optionally gzip/zstd/bz2/xz compressed
+            trusted: Schema fingerprint the file was written with; skips
+                validation, see ``construct_trusted``
+            workers: Validation threads. Defaults to the CPU count when the
+                GIL is disabled, else 1.
+        
+        Yields:
+            Model instances one at a time
+        
+        Raises:
+            ValueError: If ``trusted`` does not match ``schema_fingerprint()``
+        """
+        if trusted is not None:
+            check_fingerprint(cls, trusted)
+        with open_csv(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            if trusted is not None:
+                validate = trusted_plan(cls, header).construct
+            else:
+                validate = row_plan(cls, header).validate
+            # csv.DictReader skips blank lines as well
+            yield from parallel_map(validate, filter(None, reader), resolve_workers(cls, workers))
+    
+    @classmethod
+    def to_jsonl(
+        cls: type[T],
+        records: Iterable[T],
+        path: str | Path,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compression: Optional[str] = 'auto',
+        threads: Optional[int] = None,
+    ) -> int:
+        """Write records to a JSON Lines file keyed by CSV column names.
+        
+        Records are serialized by pydantic-core in chunks, and each chunk is
+        written (and optionally compressed, in parallel) as one buffer.
+        
+        Args:
+            records: Records to write
+            path: Output path
+            chunk_size: Records per chunk
+            compression: ``'gzip'``, ``'zstd'``, ``'bz2'``, ``'xz'``, None, or
+                ``'auto'`` to pick from the file suffix (e.g. ``.jsonl.gz``)
+            threads: Compression threads, see ``ChunkWriter``
+        
+        Returns:
+            Number of records written
+        """
+        return write_jsonl(cls, records, path, chunk_size=chunk_size, compression=compression, threads=threads)
+    
+    @classmethod
+    def from_jsonl(
+        cls: type[T],
+        path: str | Path,
+        *,
+        threads: Optional[int] = None,
+        trusted: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> list[T]:
+        """Load all records from a JSON Lines file.
+        
         Args:
-            path: Path to the CSV file
-            
+            path: Path to the file, optionally gzip/zstd/bz2/xz compressed
+            threads: Decoder threads for seekable compressed files
+            trusted: Schema fingerprint the file was written with; skips
+                validation, see ``construct_trusted``
+            workers: Validation threads, see ``iter_jsonl``
+        
+        Returns:
+            List of model instances
+        """
+        return list(cls.iter_jsonl(path, threads=threads, trusted=trusted, workers=workers))
+    
+    @classmethod
+    def iter_jsonl(
+        cls: type[T],
+        path: str | Path,
+        *,
+        threads: Optional[int] = None,
+        trusted: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[T]:
+        """Iterate over records from a JSON Lines file.
+        
+        Lines are validated in blocks through a single pydantic-core
+        ``validate_json`` call per block. Blocks are validated on a thread
+        pool when there is more than one worker, as in ``iter_csv``.
+        
+        Args:
+            path: Path to the file, optionally gzip/zstd/bz2/xz compressed
+            threads: Decoder threads for seekable compressed files
+            trusted: Schema fingerprint the file was written with; skips
+                validation, see ``construct_trusted``
+            workers: Validation threads. Defaults to the CPU count when the
+                GIL is disabled, else 1.
+        
         Yields:
             Model instances one at a time
+        
+        Raises:
+            ValueError: If ``trusted`` does not match ``schema_fingerprint()``
+        """
+        return iter_jsonl(cls, path, threads=threads, trusted=trusted, workers=workers)
+    
+    @classmethod
+    def schema_fingerprint(cls) -> str:
+        """Hash of this model's field names, aliases and types.
+        
+        Store it alongside data written from validated instances and pass it
+        back as ``trusted=`` to reload that data without validation. Any
+        change to the model definition changes the fingerprint, which makes
+        the trusted loaders refuse older data.
+        
+        Returns:
+            16 hex digit fingerprint
+        """
+        return schema_fingerprint(cls)
+    
+    @classmethod
+    def construct_trusted(cls: type[T], data: Mapping[str, Any], fingerprint: str) -> T:
+        """Build an instance from trusted, already validated data.
+        
+        Values are converted with one constructor per field type (``UUID``,
+        ``datetime.fromisoformat``, ``Decimal``, ...) and the instance is
+        built like ``model_construct`` does: no validators, whitespace
+        stripping or Literal case folding run, so invalid data produces an
+        invalid instance rather than an error. Several times faster than
+        ``model_validate``; use it only for data this library wrote.
+        
+        Args:
+            data: Values keyed by CSV column name or field name; strings or
+                already typed values
+            fingerprint: ``schema_fingerprint()`` recorded with the data
+        
+        Returns:
+            Model instance
+        
+        Raises:
+            ValueError: If the fingerprint does not match or a required field
+                is missing
+        """
+        check_fingerprint(cls, fingerprint)
+        return trusted_plan(cls, tuple(data)).construct(list(data.values()))
+    
+    def to_bytes(self) -> bytes:
+        """Encode this record in the compact binary layout of its model.
+        
+        UUIDs take 16 bytes, ints and fixed-point decimals are varints,
+        Literal values are one-byte codes and None fields only a bit; see
+        ``_binary`` for the layout. The bytes carry no schema information,
+        so decode them with ``from_bytes`` of the same model definition.
+        
+        Returns:
+            Encoded record
+        """
+        return _binary.codec(type(self)).encode(self)
+    
+    @classmethod
+    def from_bytes(cls: type[T], data: bytes) -> T:
+        """Decode a record encoded by ``to_bytes``.
+        
+        Args:
+            data: Encoded record
+        
+        Returns:
+            Model instance, built without validation
+        """
+        return _binary.codec(cls).decode(data)
+    
+    @classmethod
+    def encode_batch(cls: type[T], records: Iterable[T]) -> bytes:
+        """Encode records into one buffer prefixed with the schema fingerprint.
+        
+        Args:
+            records: Records to encode
+        
+        Returns:
+            Encoded batch
+        """
+        return _binary.codec(cls).encode_batch(records)
+    
+    @classmethod
+    def decode_batch(cls: type[T], data: bytes) -> list[T]:
+        """Decode a buffer written by ``encode_batch``.
+        
+        Args:
+            data: Encoded batch
+        
+        Returns:
+            List of model instances
+        
+        Raises:
+            ValueError: If the batch was encoded under another model definition
+        """
+        return _binary.codec(cls).decode_batch(data)
+    
+    def __reduce__(self):
+        """Pickle through the binary encoding rather than pydantic's state dict.
+        
+        Partially built instances (``model_construct`` without every field)
+        have no encoding and fall back to pydantic's state dict.
         """
-        with open(path, newline='') as f:
-            for row in csv.DictReader(f):
-                yield cls(**row)
\ No newline at end of file
+        codec = _binary.codec(type(self))
+        values = self.__dict__
+        if not all(name in values for name in codec.names):
+            return super().__reduce__()
+        return _binary.restore, (type(self), codec.fingerprint, codec.encode(self))
+    
+    @classmethod
+    def detect_schema(cls, path: str | Path) -> Optional[SchemaMatch]:
+        """Detect which Synthea CSV layout a file was written with.
+        
+        Only the header line is read.
+        
+        Args:
+            path: Path to the CSV file, optionally gzip/zstd/bz2/xz compressed
+        
+        Returns:
+            SchemaMatch with the detected version, renamed, missing and extra
+            columns, or None for an empty file
+        """
+        with open_csv(path) as f:
+            header = next(csv.reader(f), None)
+        if header is None:
+            return None
+        return detect_schema(cls, header)
+
+
+_DECIMAL_FIELDS: dict[type, frozenset[str]] = {}
+
+
+def _decimal_fields(model: type[SyntheaBaseModel]) -> frozenset[str]:
+    """Names of the fields annotated with Decimal (including Optional/Union)."""
+    names = _DECIMAL_FIELDS.get(model)
+    if names is None:
+        names = _DECIMAL_FIELDS.setdefault(model, frozenset(
+            spec.name for spec in field_specs(model)
+            if spec.kind == 'decimal' or 'decimal' in spec.members
+        ))
+    return names
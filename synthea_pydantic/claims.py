@@ -5,7 +5,7 @@ from decimal import Decimal
 from typing import Literal, Optional
 from uuid import UUID
 
-from pydantic import Field, model_validator
+from pydantic import Field
 
 from .base import SyntheaBaseModel
 
@@ -46,27 +46,19 @@ class Claim(SyntheaBaseModel):
     healthcareclaimtypeid2: Optional[Literal[1, 2]] = Field(None, alias='HEALTHCARECLAIMTYPEID2', description="Type of claim: 1 is professional, 2 is institutional")
     healthcareclaimtypeidp: Optional[str] = Field(None, alias='HEALTHCARECLAIMTYPEIDP', description="Healthcare claim type ID for patient")
     
-    @model_validator(mode='before')
     @classmethod
-    def preprocess_csv(cls, data):
-        """Convert empty strings to None and handle special values."""
-        # First apply the base preprocessing
-        data = super().preprocess_csv(data)
-        
-        if isinstance(data, dict):
-            processed = data.copy()
-            for k, v in data.items():
-                # Handle '0' as None for UUID fields that use '0' as a null value
-                if k in ['SECONDARYPATIENTINSURANCEID', 'PRIMARYPATIENTINSURANCEID'] and v == '0':
-                    processed[k] = None
-                # Handle '0' as None for claim type IDs
-                elif k in ['HEALTHCARECLAIMTYPEID1', 'HEALTHCARECLAIMTYPEID2'] and v == '0':
-                    processed[k] = None
-                # Convert string numbers to integers for claim type IDs
-                elif k in ['HEALTHCARECLAIMTYPEID1', 'HEALTHCARECLAIMTYPEID2'] and v and v != '0':
-                    try:
-                        processed[k] = int(v)
-                    except ValueError:
-                        processed[k] = v
-            return processed
-        return data
\ No newline at end of file
+    def _preprocess_row(cls, row: dict) -> None:
+        """Handle special values."""
+        for k, v in row.items():
+            # Handle '0' as None for UUID fields that use '0' as a null value
+            if k in ['SECONDARYPATIENTINSURANCEID', 'PRIMARYPATIENTINSURANCEID'] and v == '0':
+                row[k] = None
+            # Handle '0' as None for claim type IDs
+            elif k in ['HEALTHCARECLAIMTYPEID1', 'HEALTHCARECLAIMTYPEID2'] and v == '0':
+                row[k] = None
+            # Convert string numbers to integers for claim type IDs
+            elif k in ['HEALTHCARECLAIMTYPEID1', 'HEALTHCARECLAIMTYPEID2'] and v and v != '0':
+                try:
+                    row[k] = int(v)
+                except ValueError:
+                    pass
\ No newline at end of file
@@ -5,7 +5,7 @@ from decimal import Decimal
 from typing import Literal, Optional
 from uuid import UUID
 
-from pydantic import Field, model_validator
+from pydantic import Field
 
 from .base import SyntheaBaseModel
 
@@ -62,24 +62,16 @@ class ClaimTransaction(SyntheaBaseModel):
     providerid: UUID = Field(alias='PROVIDERID', description="Foreign key to the Provider")
     supervisingproviderid: Optional[UUID] = Field(None, alias='SUPERVISINGPROVIDERID', description="Foreign key to the supervising Provider")
     
-    @model_validator(mode='before')
     @classmethod
-    def preprocess_csv(cls, data):
-        """Convert empty strings to None and handle special values."""
-        # First apply the base preprocessing
-        data = super().preprocess_csv(data)
-        
-        if isinstance(data, dict):
-            processed = data.copy()
-            for k, v in data.items():
-                # Handle '0' as None for UUID fields that use '0' as a null value
-                if k in ['PATIENTINSURANCEID'] and v == '0':
-                    processed[k] = None
-                # Convert string numbers to integers for diagnosis refs
-                elif k in ['DIAGNOSISREF1', 'DIAGNOSISREF2', 'DIAGNOSISREF3', 'DIAGNOSISREF4'] and v and v != '':
-                    try:
-                        processed[k] = int(v)
-                    except ValueError:
-                        processed[k] = v
-            return processed
-        return data
\ No newline at end of file
+    def _preprocess_row(cls, row: dict) -> None:
+        """Handle special values."""
+        for k, v in row.items():
+            # Handle '0' as None for UUID fields that use '0' as a null value
+            if k in ['PATIENTINSURANCEID'] and v == '0':
+                row[k] = None
+            # Convert string numbers to integers for diagnosis refs
+            elif k in ['DIAGNOSISREF1', 'DIAGNOSISREF2', 'DIAGNOSISREF3', 'DIAGNOSISREF4'] and v and v != '':
+                try:
+                    row[k] = int(v)
+                except ValueError:
+                    pass
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""Inverted index from clinical codes to the patients and encounters that have them."""
+
+import csv
+import json
+import mmap
+import struct
+from array import array
+from datetime import date, datetime
+from itertools import compress, repeat
+from operator import and_, le, lt
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from uuid import UUID
+
+from ._codec import pack_ints, unpack_ints
+from ._io import open_csv
+from ._parsers import to_epoch_seconds
+from .tables import table_name
+
+CODED_TABLES: tuple[str, ...] = (
+    'allergies', 'careplans', 'conditions', 'devices', 'immunizations', 'medications', 'observations', 'procedures',
+)
+"""Tables whose CODE column is indexed."""
+
+_DATE_COLUMNS = ('START', 'DATE')
+_MAGIC = b'SYNCIDX\x01'
+_TRAILER = struct.Struct('<QQQQ8s')
+
+TimePoint = Union[int, date, datetime]
+
+
+def _as_epoch(when: TimePoint) -> int:
+    return when if isinstance(when, int) else to_epoch_seconds(when)
+
+
+class Cohort:
+    """Set of patients selected from a ``CodeIndex``.
+
+    Cohorts combine with ``&`` (and), ``|`` (or), ``-`` (and not) and ``~``
+    (not, relative to every patient in the index). Patients are held as
+    index ordinals; ``patients()`` resolves them to ids.
+    """
+
+    __slots__ = ('index', 'ordinals')
+
+    def __init__(self, index: 'CodeIndex', ordinals: frozenset[int]):
+        self.index = index
+        self.ordinals = ordinals
+
+    def _check(self, other: 'Cohort') -> frozenset[int]:
+        if not isinstance(other, Cohort):
+            raise TypeError(f"Cannot combine a Cohort with {type(other).__name__}")
+        if other.index is not self.index:
+            raise ValueError("Cohorts from different indexes cannot be combined")
+        return other.ordinals
+
+    def __and__(self, other: 'Cohort') -> 'Cohort':
+        return Cohort(self.index, self.ordinals & self._check(other))
+
+    def __or__(self, other: 'Cohort') -> 'Cohort':
+        return Cohort(self.index, self.ordinals | self._check(other))
+
+    def __sub__(self, other: 'Cohort') -> 'Cohort':
+        return Cohort(self.index, self.ordinals - self._check(other))
+
+    def __invert__(self) -> 'Cohort':
+        return Cohort(self.index, frozenset(range(self.index.patient_count)) - self.ordinals)
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __contains__(self, patient: UUID) -> bool:
+        return self.index.patient_ordinal(patient) in self.ordinals
+
+    def __iter__(self) -> Iterator[UUID]:
+        return iter(self.patients())
+
+    def patients(self) -> list[UUID]:
+        """Patient ids of the cohort, in index order."""
+        return [self.index.patient_id(ordinal) for ordinal in sorted(self.ordinals)]
+
+
+class CodeIndex:
+    """Inverted index of the codes in a Synthea export.
+
+    For every ``(table, code)`` pair the index holds the sorted patient
+    ordinals and encounter ordinals that have the code, plus each occurrence
+    with its date for date-bounded queries. Lists are delta- or
+    frame-of-reference-packed (see ``_codec``) into a single buffer, which
+    ``save`` writes to disk and ``open`` memory-maps, so only the postings a
+    query touches are read and decoded.
+
+    Example:
+        >>> index = CodeIndex.build('output/csv')
+        >>> diabetic = index.cohort('44054006', table='conditions')
+        >>> on_metformin = index.cohort('860975', table='medications')
+        >>> a1c_2020 = index.cohort('4548-4', start=date(2020, 1, 1), stop=date(2021, 1, 1))
+        >>> (diabetic & on_metformin & a1c_2020).patients()
+
+    Args:
+        buffer: Serialized index, as produced by ``build`` or read by ``open``
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]):
+        if len(buffer) < len(_MAGIC) + _TRAILER.size or buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a code index")
+        patients, encounters, offset, length, magic = _TRAILER.unpack(buffer[-_TRAILER.size:])
+        if magic != _MAGIC:
+            raise ValueError("Truncated code index")
+        self.buffer = buffer
+        self.patient_count = patients
+        self.encounter_count = encounters
+        self._encounters_at = len(_MAGIC) + 16 * patients
+        self._directory: dict[str, dict[str, int]] = json.loads(bytes(buffer[offset:offset + length]))
+        self._patient_ordinals: Optional[dict[UUID, int]] = None
+
+    @classmethod
+    def build(cls, directory: str | Path, tables: Optional[Iterable[str]] = None) -> 'CodeIndex':
+        """Index an export directory in one streaming pass per table.
+
+        Rows are read without validation. Patients listed in patients.csv
+        are numbered first, so ``~cohort`` covers patients without any codes.
+
+        Args:
+            directory: Directory containing the export's CSV files
+            tables: Tables to index. Defaults to ``CODED_TABLES``.
+
+        Returns:
+            In-memory index
+        """
+        wanted = set(tables) if tables is not None else set(CODED_TABLES)
+        builder = _Builder()
+        paths = {table_name(path): path for path in sorted(Path(directory).iterdir()) if path.is_file()}
+        if 'patients' in paths:
+            builder.add_patients(paths['patients'])
+        for table, path in paths.items():
+            if table in wanted:
+                builder.add_table(table, path)
+        return cls(builder.serialize())
+
+    @classmethod
+    def open(cls, path: str | Path) -> 'CodeIndex':
+        """Memory-map an index written by ``save``."""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to a file."""
+        with open(path, 'wb') as f:
+            f.write(self.buffer)
+
+    def close(self) -> None:
+        """Release the memory map of an index read by ``open``."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self) -> 'CodeIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def tables(self, code: str) -> list[str]:
+        """Tables in which a code occurs."""
+        return [table for table, codes in self._directory.items() if code in codes]
+
+    def codes(self, table: Optional[str] = None) -> list[str]:
+        """Indexed codes, of one table or of all of them."""
+        if table is not None:
+            return list(self._directory.get(table, ()))
+        return sorted({code for codes in self._directory.values() for code in codes})
+
+    def patient_id(self, ordinal: int) -> UUID:
+        """Patient id of an ordinal."""
+        start = len(_MAGIC) + 16 * ordinal
+        return UUID(bytes=bytes(self.buffer[start:start + 16]))
+
+    def encounter_id(self, ordinal: int) -> UUID:
+        """Encounter id of an ordinal."""
+        start = self._encounters_at + 16 * ordinal
+        return UUID(bytes=bytes(self.buffer[start:start + 16]))
+
+    def patient_ordinal(self, patient: UUID) -> Optional[int]:
+        """Ordinal of a patient id, or None if the index does not know it."""
+        if self._patient_ordinals is None:
+            ids = self.buffer[len(_MAGIC):self._encounters_at]
+            self._patient_ordinals = {UUID(bytes=ids[i:i + 16]): i // 16 for i in range(0, len(ids), 16)}
+        return self._patient_ordinals.get(patient)
+
+    def _offsets(self, code: str, table: Optional[str]) -> list[int]:
+        if table is not None:
+            offset = self._directory.get(table, {}).get(code)
+            return [offset] if offset is not None else []
+        return [codes[code] for codes in self._directory.values() if code in codes]
+
+    def _events(self, offset: int, start: Optional[TimePoint], stop: Optional[TimePoint]) -> tuple[array, array]:
+        """Patient and encounter ordinals (+1) of the occurrences within the date bounds."""
+        buffer = self.buffer
+        _, pos = unpack_ints(buffer, offset, sorted_=True)
+        _, pos = unpack_ints(buffer, pos, sorted_=True)
+        patients, pos = unpack_ints(buffer, pos, sorted_=True)
+        epochs, pos = unpack_ints(buffer, pos)
+        encounters, _ = unpack_ints(buffer, pos)
+        masks = []
+        if start is not None:
+            masks.append(map(le, repeat(_as_epoch(start)), epochs))
+        if stop is not None:
+            masks.append(map(lt, epochs, repeat(_as_epoch(stop))))
+        mask = masks[0] if len(masks) == 1 else map(and_, *masks)
+        mask = list(mask)
+        return array('q', compress(patients, mask)), array('q', compress(encounters, mask))
+
+    def cohort(
+        self,
+        code: str,
+        *,
+        table: Optional[str] = None,
+        start: Optional[TimePoint] = None,
+        stop: Optional[TimePoint] = None,
+    ) -> Cohort:
+        """Patients with at least one occurrence of a code.
+
+        Args:
+            code: SNOMED-CT, LOINC, RxNorm, CVX, ... code
+            table: Restrict to one table, e.g. ``'conditions'``
+            start: Only occurrences dated at or after this time
+            stop: Only occurrences dated before this time
+
+        Returns:
+            Cohort of the matching patients
+        """
+        ordinals: set[int] = set()
+        for offset in self._offsets(code, table):
+            if start is None and stop is None:
+                patients, _ = unpack_ints(self.buffer, offset, sorted_=True)
+            else:
+                patients, _ = self._events(offset, start, stop)
+            ordinals.update(patients)
+        return Cohort(self, frozenset(ordinals))
+
+    def encounters(
+        self,
+        code: str,
+        *,
+        table: Optional[str] = None,
+        start: Optional[TimePoint] = None,
+        stop: Optional[TimePoint] = None,
+    ) -> list[UUID]:
+        """Encounters with at least one occurrence of a code, in index order.
+
+        Takes the same arguments as ``cohort``.
+        """
+        ordinals: set[int] = set()
+        for offset in self._offsets(code, table):
+            if start is None and stop is None:
+                _, pos = unpack_ints(self.buffer, offset, sorted_=True)
+                encounters, _ = unpack_ints(self.buffer, pos, sorted_=True)
+                ordinals.update(encounters)
+            else:
+                _, encounters = self._events(offset, start, stop)
+                # Occurrences store encounter ordinal + 1, with 0 for none
+                ordinals.update(encounter - 1 for encounter in encounters if encounter)
+        return [self.encounter_id(ordinal) for ordinal in sorted(ordinals)]
+
+
+class _Builder:
+    """Collects occurrences during ``CodeIndex.build``."""
+
+    def __init__(self):
+        self.patients: dict[str, int] = {}
+        self.patient_ids: dict[UUID, int] = {}
+        self.encounters: dict[str, int] = {}
+        self.encounter_ids: dict[UUID, int] = {}
+        self.events: dict[str, dict[str, tuple[array, array, array]]] = {}
+
+    @staticmethod
+    def _ordinal(raw: str, ordinals: dict[str, int], ids: dict[UUID, int]) -> int:
+        ordinal = ordinals.get(raw)
+        if ordinal is None:
+            ordinal = ordinals[raw] = ids.setdefault(UUID(raw), len(ids))
+        return ordinal
+
+    def add_patients(self, path: Path) -> None:
+        with open_csv(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None or 'Id' not in header:
+                return
+            i = header.index('Id')
+            for row in reader:
+                if row:
+                    self._ordinal(row[i].strip(), self.patients, self.patient_ids)
+
+    def add_table(self, table: str, path: Path) -> None:
+        with open_csv(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None or 'CODE' not in header or 'PATIENT' not in header:
+                return
+            code_i, patient_i = header.index('CODE'), header.index('PATIENT')
+            encounter_i = header.index('ENCOUNTER') if 'ENCOUNTER' in header else None
+            date_i = next((header.index(column) for column in _DATE_COLUMNS if column in header), None)
+            events = self.events.setdefault(table, {})
+            ordinal = self._ordinal
+            for row in reader:
+                if not row:
+                    continue
+                code = row[code_i].strip()
+                columns = events.get(code)
+                if columns is None:
+                    columns = events[code] = (array('q'), array('q'), array('q'))
+                patients, epochs, encounters = columns
+                patients.append(ordinal(row[patient_i].strip(), self.patients, self.patient_ids))
+                when = row[date_i].strip() if date_i is not None else ''
+                epochs.append(to_epoch_seconds(datetime.fromisoformat(when)) if when else 0)
+                encounter = row[encounter_i].strip() if encounter_i is not None else ''
+                encounters.append(ordinal(encounter, self.encounters, self.encounter_ids) + 1 if encounter else 0)
+
+    def serialize(self) -> bytes:
+        out = bytearray(_MAGIC)
+        for ids in (self.patient_ids, self.encounter_ids):
+            for uuid in ids:
+                out += uuid.bytes
+        directory: dict[str, dict[str, int]] = {}
+        for table in sorted(self.events):
+            offsets = directory[table] = {}
+            for code, (patients, epochs, encounters) in sorted(self.events[table].items()):
+                offsets[code] = len(out)
+                out += _postings(patients, epochs, encounters)
+        encoded = json.dumps(directory, separators=(',', ':')).encode()
+        offset = len(out)
+        out += encoded
+        out += _TRAILER.pack(len(self.patient_ids), len(self.encounter_ids), offset, len(encoded), _MAGIC)
+        return bytes(out)
+
+
+def _postings(patients: Sequence[int], epochs: Sequence[int], encounters: Sequence[int]) -> bytes:
+    """Pack one code's distinct patients, distinct encounters and dated occurrences."""
+    events = sorted(zip(patients, epochs, encounters))
+    distinct_encounters = sorted({encounter - 1 for encounter in encounters if encounter})
+    return b''.join([
+        pack_ints(sorted(set(patients)), sorted_=True),
+        pack_ints(distinct_encounters, sorted_=True),
+        pack_ints([event[0] for event in events], sorted_=True),
+        pack_ints([event[1] for event in events]),
+        pack_ints([event[2] for event in events]),
+    ])
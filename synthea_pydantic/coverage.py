@@ -0,0 +1,218 @@
+"""Per-patient payer coverage timelines resolved in batches by binary search."""
+
+from bisect import bisect_right
+from datetime import date, datetime
+from itertools import islice, pairwise, repeat
+from operator import attrgetter, lshift, lt, mul, or_, sub
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+from uuid import UUID
+
+from ._jsonl import DEFAULT_CHUNK_SIZE
+from .base import SyntheaBaseModel
+from .claims import Claim
+from .claims_transactions import ClaimTransaction
+from .encounters import Encounter
+from .payer_transitions import PayerTransition
+
+_YEAR_BITS = 16
+"""Bits of a timeline key holding the year; the patient ordinal sits above them."""
+
+_DATES: dict[type[SyntheaBaseModel], tuple[attrgetter, attrgetter]] = {
+    Encounter: (attrgetter('patient'), attrgetter('start')),
+    Claim: (attrgetter('patientid'), attrgetter('servicedate')),
+    ClaimTransaction: (attrgetter('patientid'), attrgetter('fromdate')),
+}
+"""Patient and date fields used to resolve each model's coverage."""
+
+Year = Union[int, date, datetime]
+
+
+class Coverage(NamedTuple):
+    """Payers covering a patient at one point in time (None if uncovered)."""
+
+    primary: Optional[UUID]
+    secondary: Optional[UUID]
+
+
+_UNCOVERED = Coverage(None, None)
+
+
+_UNKNOWN = -1
+"""Ordinal used for patients without transitions; their keys are negative."""
+
+_SENTINEL = -1 << 63
+"""Start and limit of the sentinel segment, below every key."""
+
+
+def _year(when: Optional[Year]) -> int:
+    if when is None:
+        return -1
+    return when if isinstance(when, int) else when.year
+
+
+class CoverageTimeline:
+    """Primary and secondary payer of every patient, year by year.
+
+    ``PayerTransition`` rows are flattened once into non-overlapping
+    segments of inclusive years; where transitions overlap, the one that
+    started last wins (and among equal starts, the later row). The
+    segments of all patients live in sorted parallel arrays keyed by
+    ``patient ordinal << 16 | year``, so a batch of lookups is resolved
+    with a ``bisect`` and one comparison per lookup, all driven by ``map``
+    in C, instead of a scan over the patient's transitions per record.
+
+    Example:
+        >>> timeline = CoverageTimeline.from_csv('payer_transitions.csv')
+        >>> timeline.at(patient_id, date(2015, 6, 1))
+        Coverage(primary=UUID('...'), secondary=None)
+        >>> for encounter, coverage in timeline.annotate(Encounter.iter_csv('encounters.csv')):
+        ...     ...
+
+    Args:
+        transitions: PayerTransition records, in any order
+
+    Raises:
+        ValueError: If a year is outside 0-65534 or a transition ends
+            before it starts
+    """
+
+    def __init__(self, transitions: Iterable[PayerTransition]):
+        by_patient: dict[UUID, list[tuple[int, int, int, UUID, Optional[UUID]]]] = {}
+        for row, transition in enumerate(transitions):
+            start, end = transition.start_year, transition.end_year
+            if not 0 <= start <= end < (1 << _YEAR_BITS) - 1:
+                raise ValueError(f"Invalid coverage years {start}-{end} for patient {transition.patient}")
+            by_patient.setdefault(transition.patient, []).append(
+                (start, row, end, transition.payer, transition.secondary_payer)
+            )
+        self._ordinals: dict[UUID, int] = {}
+        # Slot 0 is a sentinel that no key reaches past, so every lookup
+        # lands on a slot and uncovered ones resolve to slot 0
+        # Lists rather than arrays: bisect compares list items without
+        # boxing a new int per probe
+        self._starts: list[int] = [_SENTINEL]
+        self._limits: list[int] = [_SENTINEL]
+        self._coverages: list[Coverage] = [_UNCOVERED]
+        coverages: dict[Coverage, Coverage] = {}
+        for ordinal, (patient, rows) in enumerate(by_patient.items()):
+            self._ordinals[patient] = ordinal
+            base = ordinal << _YEAR_BITS
+            rows.sort()
+            boundaries = sorted({start for start, *_ in rows} | {end + 1 for _, _, end, _, _ in rows})
+            for first, stop in pairwise(boundaries):
+                covering = [row for row in rows if row[0] <= first and row[2] >= first]
+                if not covering:
+                    continue
+                _, _, _, payer, secondary = covering[-1]
+                coverage = coverages.setdefault(Coverage(payer, secondary), Coverage(payer, secondary))
+                if self._limits[-1] == base + first and self._coverages[-1] == coverage:
+                    # Same payers as the segment just before: extend it
+                    self._limits[-1] = base + stop
+                    continue
+                self._starts.append(base + first)
+                self._limits.append(base + stop)
+                self._coverages.append(coverage)
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> 'CoverageTimeline':
+        """Build the timeline from a payer_transitions CSV file."""
+        return cls(PayerTransition.iter_csv(path))
+
+    def __len__(self) -> int:
+        """Number of coverage segments."""
+        return len(self._starts) - 1
+
+    def patients(self) -> Iterator[UUID]:
+        """Iterate over the ids of patients with at least one transition."""
+        return iter(self._ordinals)
+
+    def segments(self, patient: UUID) -> list[tuple[int, int, Coverage]]:
+        """The patient's coverage as ``(first year, last year, Coverage)``, in year order."""
+        ordinal = self._ordinals.get(patient)
+        if ordinal is None:
+            return []
+        base = ordinal << _YEAR_BITS
+        lo = bisect_right(self._starts, base - 1)
+        hi = bisect_right(self._starts, base + (1 << _YEAR_BITS) - 1)
+        return [
+            (self._starts[i] - base, self._limits[i] - base - 1, self._coverages[i])
+            for i in range(lo, hi)
+        ]
+
+    def at(self, patient: UUID, when: Year) -> Coverage:
+        """Coverage of one patient in the year of ``when`` (a year, date or datetime)."""
+        return self.resolve([patient], [when])[0]
+
+    def resolve(self, patients: Sequence[Optional[UUID]], dates: Sequence[Optional[Year]]) -> list[Coverage]:
+        """Coverage of many ``(patient, date)`` lookups at once.
+
+        Args:
+            patients: Patient ids
+            dates: Years, dates or datetimes, aligned with ``patients``;
+                None resolves to no coverage
+
+        Returns:
+            A Coverage per lookup, ``Coverage(None, None)`` where there is none
+
+        Raises:
+            ValueError: If the sequences differ in length
+        """
+        if len(patients) != len(dates):
+            raise ValueError(f"Got {len(patients)} patients but {len(dates)} dates")
+        years = dates if all(map(int.__instancecheck__, dates)) else list(map(_year, dates))
+        if years and not 0 <= min(years) <= max(years) < 1 << _YEAR_BITS:
+            # Out of range years would spill into the next patient's keys
+            years = [year if 0 <= year < 1 << _YEAR_BITS else -1 for year in years]
+        # Unknown patients get a negative key, which lands on the sentinel
+        ordinals = map(self._ordinals.get, patients, repeat(_UNKNOWN))
+        keys = list(map(or_, map(lshift, ordinals, repeat(_YEAR_BITS)), years))
+        # The last segment starting at or before each key covers it if the
+        # key is also before the segment's limit, which rules out segments
+        # of other patients and gaps
+        slots = list(map(sub, map(bisect_right, repeat(self._starts), keys), repeat(1)))
+        covered = map(lt, keys, map(self._limits.__getitem__, slots))
+        return list(map(self._coverages.__getitem__, map(mul, slots, covered)))
+
+    def resolve_records(self, records: Sequence[SyntheaBaseModel]) -> list[Coverage]:
+        """Coverage of each Encounter, Claim or ClaimTransaction at its date.
+
+        Encounters use ``start``, claims ``servicedate`` and claim
+        transactions ``fromdate``.
+
+        Raises:
+            TypeError: If a record is of another model
+        """
+        patients: list[Optional[UUID]] = []
+        dates: list[Optional[Year]] = []
+        getters = None
+        model = None
+        for record in records:
+            if type(record) is not model:
+                model = type(record)
+                getters = _DATES.get(model)
+                if getters is None:
+                    raise TypeError(f"Cannot resolve coverage of {model.__name__} records")
+            patients.append(getters[0](record))
+            dates.append(getters[1](record))
+        return self.resolve(patients, dates)
+
+    def annotate(
+        self,
+        records: Iterable[SyntheaBaseModel],
+        *,
+        batch_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[tuple[SyntheaBaseModel, Coverage]]:
+        """Pair each record of a stream with its coverage, resolving a batch at a time.
+
+        Args:
+            records: Encounters, Claims or ClaimTransactions, e.g. an
+                ``iter_csv`` stream
+            batch_size: Records resolved per batch
+
+        Yields:
+            ``(record, Coverage)`` in input order
+        """
+        records = iter(records)
+        while batch := list(islice(records, batch_size)):
+            yield from zip(batch, self.resolve_records(batch))
@@ -0,0 +1,254 @@
+"""Consistent pseudonymization of whole Synthea exports for sharing."""
+
+import csv
+import hmac
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+from uuid import UUID
+
+from ._fields import specs_by_key
+from ._io import CsvChunkWriter, compression_for, open_csv
+from ._partition import patient_column
+from .tables import TABLES, table_name
+from .versions import detect_schema
+from .warmup import worker_context
+
+_CACHE_SIZE = 1 << 20
+"""Mapped ids and date offsets kept per Pseudonymizer before its caches are reset."""
+
+_TOKEN_DIGITS = 12
+"""Hex digits of the token replacing a masked text value."""
+
+
+def _shift_text(value: str, delta: timedelta) -> str:
+    # Only the calendar date moves; time of day and offset are kept as written
+    return (date.fromisoformat(value[:10]) + delta).isoformat() + value[10:]
+
+
+class Pseudonymizer:
+    """Keyed, deterministic replacement of identifiers, PHI and dates.
+
+    All values are derived from the key with HMAC-SHA256, so every process
+    (or run) with the same key maps the same input to the same output
+    without sharing a lookup table:
+
+    * UUIDs (primary and foreign keys) become random-looking version 4
+      UUIDs, so foreign keys still join across tables.
+    * Fields marked ``json_schema_extra={'phi': True}`` (patient names,
+      SSN, license and passport numbers, street address, city, county,
+      ZIP code, coordinates, policy owner names) are masked: text becomes
+      a short keyed token, other types are blanked. The state is kept.
+    * Dates and datetimes move by a per-patient offset of 1 to
+      ``max_shift_days`` days, forwards or backwards, which keeps each
+      patient's intervals and ages intact. The year fields of payer
+      transitions are shifted when written as full dates or timestamps
+      and left as they are when they hold a bare year.
+
+    Example:
+        >>> pseudonymizer = Pseudonymizer(secret_key)
+        >>> pseudonymizer.pseudonymize_csv('export/encounters.csv', 'shared/encounters.csv')
+        51234
+
+    Args:
+        key: Secret key; exports pseudonymized with the same key share ids
+        max_shift_days: Largest date offset in days
+
+    Raises:
+        ValueError: If the key is empty or ``max_shift_days`` is below 1
+    """
+
+    def __init__(self, key: bytes, max_shift_days: int = 365):
+        if not key:
+            raise ValueError("key must not be empty")
+        if max_shift_days < 1:
+            raise ValueError("max_shift_days must be at least 1")
+        self._key = bytes(key)
+        self._max_shift_days = max_shift_days
+        self._uuids: dict[str, str] = {}
+        self._shifts: dict[str, timedelta] = {}
+
+    def _digest(self, message: bytes) -> bytes:
+        return hmac.digest(self._key, message, 'sha256')
+
+    def uuid(self, value: str) -> str:
+        """The pseudonymous UUID replacing ``value``.
+
+        Raises:
+            ValueError: If ``value`` is not a UUID
+        """
+        mapped = self._uuids.get(value)
+        if mapped is None:
+            if len(self._uuids) >= _CACHE_SIZE:
+                self._uuids.clear()
+            digest = self._digest(b'uuid:' + UUID(value).bytes)
+            mapped = self._uuids[value] = str(UUID(bytes=digest[:16], version=4))
+        return mapped
+
+    def shift(self, patient: str) -> timedelta:
+        """Date offset of a patient (by original id); never zero."""
+        delta = self._shifts.get(patient)
+        if delta is None:
+            if len(self._shifts) >= _CACHE_SIZE:
+                self._shifts.clear()
+            days = int.from_bytes(self._digest(b'shift:' + UUID(patient).bytes)[:8]) % (2 * self._max_shift_days)
+            days = days - self._max_shift_days if days < self._max_shift_days else days - self._max_shift_days + 1
+            delta = self._shifts[patient] = timedelta(days=days)
+        return delta
+
+    def mask(self, column: str, value: str) -> str:
+        """Keyed token replacing a PHI text value of a column."""
+        return self._digest(b'phi:' + column.encode() + b':' + value.encode()).hex()[:_TOKEN_DIGITS]
+
+    def row_function(self, table: str, header: Sequence[str]) -> Callable[[list[str]], list[str]]:
+        """Build the function pseudonymizing raw rows of a table in place.
+
+        Columns are classified once from the model's field metadata; columns
+        the model does not know are passed through. Rows shorter than the
+        header are padded with empty cells.
+
+        Args:
+            table: Table name, e.g. ``'encounters'``
+            header: CSV header row
+
+        Raises:
+            KeyError: If the table is not a Synthea table
+        """
+        model = TABLES[table]
+        specs = specs_by_key(model)
+        patient = patient_column(table, header)
+        width = len(header)
+        uuids: list[int] = []
+        dates: list[int] = []
+        stamps: list[int] = []
+        tokens: list[tuple[int, str]] = []
+        blanks: list[int] = []
+        match = detect_schema(model, header)
+        for index, column in enumerate(match.columns):
+            spec = specs.get(column)
+            if spec is None:
+                continue
+            if spec.phi:
+                if spec.kind == 'str':
+                    tokens.append((index, spec.alias))
+                else:
+                    blanks.append(index)
+            elif spec.kind == 'uuid':
+                uuids.append(index)
+            elif spec.kind in ('date', 'datetime') and patient is not None:
+                dates.append(index)
+            elif column in match.converters and patient is not None:
+                # Converted from date text in some layouts, e.g. START_DATE into START_YEAR
+                stamps.append(index)
+        uuid, shift, mask = self.uuid, self.shift, self.mask
+
+        def pseudonymize(row: list[str]) -> list[str]:
+            if len(row) < width:
+                # Short rows are padded, as when profiling or diffing
+                row += [''] * (width - len(row))
+            # Dates first: the offset is keyed by the original patient id
+            if (dates or stamps) and row[patient]:
+                delta = shift(row[patient])
+                for index in dates:
+                    if row[index]:
+                        row[index] = _shift_text(row[index], delta)
+                for index in stamps:
+                    if len(row[index]) > 4:
+                        row[index] = _shift_text(row[index], delta)
+            for index in uuids:
+                if row[index]:
+                    row[index] = uuid(row[index])
+            for index, column in tokens:
+                if row[index]:
+                    row[index] = mask(column, row[index])
+            for index in blanks:
+                row[index] = ''
+            return row
+
+        return pseudonymize
+
+    def pseudonymize_csv(self, src: str | Path, dst: str | Path, compression: Optional[str] = None) -> int:
+        """Stream one table file through ``row_function`` into ``dst``.
+
+        Args:
+            src: Export CSV file, optionally compressed; its name gives the table
+            dst: Output file
+            compression: Output compression. Defaults to the one implied by
+                the name of ``dst``.
+
+        Returns:
+            Number of rows written, without the header
+        """
+        if compression is None:
+            compression = compression_for(dst)
+        rows = 0
+        with open_csv(src) as f, CsvChunkWriter(dst, compression) as writer:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return 0
+            writer.writerow(header)
+            pseudonymize = self.row_function(table_name(src), header)
+            for row in reader:
+                if row:
+                    writer.writerow(pseudonymize(row))
+                    rows += 1
+        return rows
+
+
+def _pseudonymize_file(src: Path, dst: Path, key: bytes, max_shift_days: int) -> int:
+    return Pseudonymizer(key, max_shift_days).pseudonymize_csv(src, dst)
+
+
+def pseudonymize_export(
+    src_dir: str | Path,
+    dst_dir: str | Path,
+    key: bytes,
+    *,
+    max_shift_days: int = 365,
+    workers: Optional[int] = None,
+) -> dict[str, int]:
+    """Pseudonymize every table of an export with one key, tables in parallel.
+
+    Each table is streamed row by row into a file of the same name (and
+    compression) in ``dst_dir``. Because every mapping is derived from the
+    key rather than looked up, worker processes need no shared state and
+    foreign keys and per-patient date offsets agree across all tables.
+    See ``Pseudonymizer`` for what is replaced.
+
+    Example:
+        >>> pseudonymize_export('output/csv', 'shared/csv', key=os.environ['EXPORT_KEY'].encode())
+        {'allergies': 512, 'careplans': 1380, ...}
+
+    Args:
+        src_dir: Export directory with the table CSV files
+        dst_dir: Output directory, created if missing
+        key: Secret key
+        max_shift_days: Largest date offset in days
+        workers: Worker processes. None uses one per table up to the CPU
+            count; 1 runs in this process.
+
+    Returns:
+        Rows written per table
+
+    Raises:
+        ValueError: If the key is empty or ``max_shift_days`` is below 1
+    """
+    Pseudonymizer(key, max_shift_days)
+    dst_dir = Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    paths = sorted(path for path in Path(src_dir).iterdir() if path.is_file() and table_name(path) in TABLES)
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+    if workers <= 1:
+        return {
+            table_name(path): _pseudonymize_file(path, dst_dir / path.name, key, max_shift_days) for path in paths
+        }
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+        futures = [
+            (table_name(path), pool.submit(_pseudonymize_file, path, dst_dir / path.name, key, max_shift_days))
+            for path in paths
+        ]
+        return {table: future.result() for table, future in futures}
@@ -0,0 +1,288 @@
+"""Row-level change sets between two exports of the same tables."""
+
+import csv
+import os
+import tempfile
+import zlib
+from itertools import chain
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, NamedTuple, Optional, Sequence
+
+from ._io import detect_compression, open_csv
+from .tables import TABLES, table_name
+from .versions import detect_schema
+
+KEYS: dict[str, tuple[str, ...]] = {
+    'allergies': ('PATIENT', 'ENCOUNTER', 'CODE', 'START'),
+    'careplans': ('Id',),
+    'claims': ('Id',),
+    'claims_transactions': ('ID',),
+    'conditions': ('PATIENT', 'ENCOUNTER', 'CODE', 'START'),
+    'devices': ('PATIENT', 'ENCOUNTER', 'CODE', 'START'),
+    'encounters': ('Id',),
+    'imaging_studies': ('Id', 'SERIES_UID', 'INSTANCE_UID'),
+    'immunizations': ('PATIENT', 'ENCOUNTER', 'CODE', 'DATE'),
+    'medications': ('PATIENT', 'ENCOUNTER', 'CODE', 'START'),
+    'observations': ('PATIENT', 'ENCOUNTER', 'CODE', 'DATE'),
+    'organizations': ('Id',),
+    'patients': ('Id',),
+    'payer_transitions': ('PATIENT', 'START_YEAR'),
+    'payers': ('Id',),
+    'procedures': ('PATIENT', 'ENCOUNTER', 'CODE', 'START'),
+    'providers': ('Id',),
+    'supplies': ('PATIENT', 'ENCOUNTER', 'CODE', 'DATE'),
+}
+"""Columns identifying a row of each table: the primary key, or a natural key for keyless tables."""
+
+BUCKET_SIZE = 32 << 20
+"""Bytes of CSV text per hash bucket; one bucket of the old table is held in memory at a time."""
+
+_COMPRESSION_RATIO = 8
+"""Assumed CSV text per byte of a compressed file when sizing buckets."""
+
+Row = tuple[str, ...]
+
+
+class Change(NamedTuple):
+    """One added, removed or changed row.
+
+    ``fields`` maps each column whose text differs to its ``(old, new)``
+    text, with ``''`` for a missing or empty value: every non-empty column
+    of an added or removed row, and only the edited columns of a changed
+    one.
+    """
+
+    table: str
+    key: Row
+    """Values of the table's ``KEYS`` columns."""
+    occurrence: int
+    """Position among rows with the same key, in file order (0 for unique keys)."""
+    kind: Literal['added', 'removed', 'changed']
+    fields: dict[str, tuple[str, str]]
+
+
+class _Side:
+    """Header and canonical columns of one table file, or of a missing one."""
+
+    def __init__(self, path: Optional[Path], table: str):
+        self.path = path
+        self.columns: tuple[str, ...] = ()
+        self.converters: dict[str, Callable] = {}
+        if path is not None:
+            with open_csv(path) as f:
+                header = next(csv.reader(f), None)
+            if header is not None:
+                match = detect_schema(TABLES[table], header)
+                self.columns, self.converters = match.columns, match.converters
+
+    def rows(self, fields: Sequence[str]) -> Iterator[Row]:
+        """Stream rows projected onto ``fields`` with converted values normalized."""
+        if not self.columns:
+            return
+        width = len(self.columns)
+        positions = {column: i for i, column in enumerate(self.columns)}
+        # Columns this file lacks read the empty cell appended at ``width``
+        getter = itemgetter(*(positions.get(column, width) for column in fields), width)
+        converted = [
+            (fields.index(column), converter) for column, converter in self.converters.items() if column in fields
+        ]
+        with open_csv(self.path) as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) != width:
+                    row = row[:width] + [''] * (width - len(row))
+                row.append('')
+                values = getter(row)[:-1]
+                if converted:
+                    values = list(values)
+                    for index, converter in converted:
+                        if values[index]:
+                            values[index] = str(converter(values[index]))
+                    values = tuple(values)
+                yield values
+
+    def size(self) -> int:
+        """Estimated bytes of CSV text."""
+        if self.path is None:
+            return 0
+        size = os.path.getsize(self.path)
+        return size * _COMPRESSION_RATIO if detect_compression(self.path) is not None else size
+
+
+def _buckets_for(old: _Side, new: _Side) -> int:
+    return max(1, -(-max(old.size(), new.size()) // BUCKET_SIZE))
+
+
+def _key_getter(indexes: Sequence[int]) -> Callable[[Row], Row]:
+    if len(indexes) == 1:
+        # itemgetter of one index returns the bare value, not a tuple
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+def _spill(rows: Iterable[Row], key: Callable[[Row], Row], buckets: int, directory: Path, prefix: str) -> list[Path]:
+    """Hash-partition rows by key into ``buckets`` plain CSV files, keeping file order."""
+    paths = [directory / f"{prefix}-{i:05d}.csv" for i in range(buckets)]
+    files = [open(path, 'w', newline='', encoding='utf-8') for path in paths]
+    try:
+        writers = [csv.writer(f, lineterminator='\n') for f in files]
+        crc32 = zlib.crc32
+        for row in rows:
+            writers[crc32('\x1f'.join(key(row)).encode()) % buckets].writerow(row)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _read_bucket(path: Path) -> Iterator[Row]:
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from map(tuple, csv.reader(f))
+
+
+def _diff_rows(
+    table: str,
+    fields: Sequence[str],
+    key: Callable[[Row], Row],
+    old: Iterable[Row],
+    new: Iterable[Row],
+) -> Iterator[Change]:
+    """Diff two row streams whose rows of any one key are all present."""
+    previous: dict[tuple[Row, int], Row] = {}
+    seen: dict[Row, int] = {}
+    for row in old:
+        row_key = key(row)
+        occurrence = seen.get(row_key, 0)
+        seen[row_key] = occurrence + 1
+        previous[row_key, occurrence] = row
+    seen.clear()
+    for row in new:
+        row_key = key(row)
+        occurrence = seen.get(row_key, 0)
+        seen[row_key] = occurrence + 1
+        before = previous.pop((row_key, occurrence), None)
+        if before is None:
+            yield Change(table, row_key, occurrence, 'added', {
+                column: ('', value) for column, value in zip(fields, row) if value
+            })
+        elif before != row:
+            yield Change(table, row_key, occurrence, 'changed', {
+                column: (a, b) for column, a, b in zip(fields, before, row) if a != b
+            })
+    for (row_key, occurrence), row in previous.items():
+        yield Change(table, row_key, occurrence, 'removed', {
+            column: (value, '') for column, value in zip(fields, row) if value
+        })
+
+
+def diff_table(
+    old_path: Optional[str | Path],
+    new_path: Optional[str | Path],
+    *,
+    buckets: Optional[int] = None,
+    tmp_dir: Optional[str | Path] = None,
+) -> Iterator[Change]:
+    """Stream the changes between two versions of one table file.
+
+    Rows are matched on the table's ``KEYS`` columns plus their occurrence
+    among rows with the same key, so duplicate natural keys pair up in
+    file order. Values are compared as text after mapping both headers to
+    the current column names, so files written by different Synthea
+    versions can be compared.
+
+    When the files are larger than ``BUCKET_SIZE``, both are first split by
+    a hash of the key into bucket files under ``tmp_dir``; each bucket pair
+    is then diffed in memory, so memory is bounded by one bucket of the old
+    file rather than by the table.
+
+    Args:
+        old_path: Old CSV file, optionally compressed; None for a table
+            that did not exist
+        new_path: New CSV file; None for a table that was dropped
+        buckets: Hash buckets. None sizes them from the file sizes; 1 diffs
+            in memory without temporary files.
+        tmp_dir: Directory for the bucket files. Defaults to the system
+            temporary directory.
+
+    Yields:
+        Changes, grouped by bucket; within a bucket added and changed rows
+        follow the new file and removed rows the old one
+
+    Raises:
+        ValueError: If both paths are None or a key column is missing
+    """
+    if old_path is None and new_path is None:
+        raise ValueError("At least one of old_path and new_path is required")
+    table = table_name(new_path if new_path is not None else old_path)
+    old = _Side(Path(old_path) if old_path is not None else None, table)
+    new = _Side(Path(new_path) if new_path is not None else None, table)
+    fields = list(dict.fromkeys(chain(old.columns, new.columns)))
+    if not fields:
+        # Neither file has a header, so neither has rows
+        return
+    for side in (old, new):
+        missing = [column for column in KEYS[table] if side.columns and column not in side.columns]
+        if missing:
+            raise ValueError(f"{side.path} has no key column {', '.join(missing)}")
+    key_of = _key_getter([fields.index(column) for column in KEYS[table]])
+    if buckets is None:
+        buckets = _buckets_for(old, new)
+    if buckets <= 1:
+        yield from _diff_rows(table, fields, key_of, old.rows(fields), new.rows(fields))
+        return
+    with tempfile.TemporaryDirectory(prefix='synthea-diff-', dir=tmp_dir) as directory:
+        directory = Path(directory)
+        old_buckets = _spill(old.rows(fields), key_of, buckets, directory, 'old')
+        new_buckets = _spill(new.rows(fields), key_of, buckets, directory, 'new')
+        for old_bucket, new_bucket in zip(old_buckets, new_buckets):
+            yield from _diff_rows(table, fields, key_of, _read_bucket(old_bucket), _read_bucket(new_bucket))
+            old_bucket.unlink()
+            new_bucket.unlink()
+
+
+def _table_files(directory: Path) -> dict[str, Path]:
+    return {
+        table_name(path): path
+        for path in sorted(directory.iterdir())
+        if path.is_file() and table_name(path) in TABLES
+    }
+
+
+def diff_exports(
+    old_dir: str | Path,
+    new_dir: str | Path,
+    *,
+    buckets: Optional[int] = None,
+    tmp_dir: Optional[str | Path] = None,
+) -> Iterator[Change]:
+    """Stream the row changes between two exports, table by table.
+
+    Tables are matched by name regardless of compression; a table present
+    in only one export is reported as entirely added or removed. See
+    ``diff_table`` for how rows are matched and memory is bounded.
+
+    Example:
+        >>> from collections import Counter
+        >>> Counter((change.table, change.kind) for change in diff_exports('v1/csv', 'v2/csv'))
+        Counter({('observations', 'added'): 1520, ('patients', 'changed'): 12, ...})
+        >>> next(c for c in diff_exports('v1/csv', 'v2/csv') if c.kind == 'changed').fields
+        {'HEALTHCARE_EXPENSES': ('1000.00', '1250.00')}
+
+    Args:
+        old_dir: Export directory of the old version
+        new_dir: Export directory of the new version
+        buckets: Hash buckets per table. None sizes them from the file sizes.
+        tmp_dir: Directory for the bucket files
+
+    Yields:
+        Changes in table name order
+    """
+    old_files = _table_files(Path(old_dir))
+    new_files = _table_files(Path(new_dir))
+    for table in sorted(old_files.keys() | new_files.keys()):
+        yield from diff_table(old_files.get(table), new_files.get(table), buckets=buckets, tmp_dir=tmp_dir)
@@ -0,0 +1,515 @@
+"""Conversion of Synthea records to FHIR R4 transaction bundles.
+
+Resources are written as JSON text straight from the model attributes; no
+intermediate dicts are built and ``json.dumps`` is only used to escape
+strings. Whole exports are converted by hash-partitioning the raw rows by
+patient and converting the partitions on a process pool, so memory is
+bounded by the partition size rather than the export size.
+"""
+
+import json
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from uuid import UUID, uuid5
+
+from ._partition import partition_files
+from .allergies import Allergy
+from .base import SyntheaBaseModel
+from .careplans import CarePlan
+from .claims import Claim
+from .conditions import Condition
+from .encounters import Encounter
+from .immunizations import Immunization
+from .medications import Medication
+from .observations import Observation
+from .patients import Patient
+from .procedures import Procedure
+from .tables import table_name
+from .warmup import worker_context
+
+SNOMED = 'http://snomed.info/sct'
+LOINC = 'http://loinc.org'
+RXNORM = 'http://www.nlm.nih.gov/research/umls/rxnorm'
+CVX = 'http://hl7.org/fhir/sid/cvx'
+SYNTHEA = 'https://github.com/synthetichealth/synthea'
+"""Identifier system used for logical references to providers and organizations."""
+
+RESOURCE_NAMESPACE = UUID('5b3a3d1e-6f0c-4b6e-9a57-1f2d1c9e4f10')
+"""Namespace of the uuid5 prefix of ids given to resources whose rows have no Id."""
+
+_PARTITION_BYTES = 64 * 1024 * 1024
+
+_string = json.encoder.encode_basestring
+
+_ENCOUNTER_CLASSES = {
+    'ambulatory': 'AMB',
+    'emergency': 'EMER',
+    'inpatient': 'IMP',
+    'outpatient': 'AMB',
+    'urgentcare': 'AMB',
+    'wellness': 'AMB',
+}
+_ALLERGY_SYSTEMS = {'SNOMED-CT': SNOMED, 'RxNorm': RXNORM}
+_ALLERGY_CATEGORIES = {'drug': 'medication', 'medication': 'medication', 'food': 'food', 'environment': 'environment'}
+_CLAIM_TYPES = {1: 'professional', 2: 'institutional'}
+
+
+def _coding(system: str, code: str, display: Optional[str] = None) -> str:
+    if display is None:
+        return f'{{"system":{_string(system)},"code":{_string(code)}}}'
+    return f'{{"system":{_string(system)},"code":{_string(code)},"display":{_string(display)}}}'
+
+
+def _concept(system: str, code: str, display: Optional[str] = None) -> str:
+    text = '' if display is None else f',"text":{_string(display)}'
+    return f'{{"coding":[{_coding(system, code, display)}]{text}}}'
+
+
+def _coding_concept(system: str, code: str) -> str:
+    return f'{{"coding":[{_coding(system, code)}]}}'
+
+
+@lru_cache(maxsize=65536)
+def _reference(id_: UUID) -> str:
+    return f'{{"reference":"urn:uuid:{id_}"}}'
+
+
+@lru_cache(maxsize=65536)
+def _identifier_reference(id_: UUID) -> str:
+    return f'{{"identifier":{{"system":"{SYNTHEA}","value":"{id_}"}}}}'
+
+
+def _time(value: date) -> str:
+    return f'"{value.isoformat()}"'
+
+
+def _period(start: date, stop: Optional[date]) -> str:
+    end = '' if stop is None else f',"end":{_time(stop)}'
+    return f'{{"start":{_time(start)}{end}}}'
+
+
+def _reason(code: Optional[str], description: Optional[str]) -> str:
+    if code is None:
+        return ''
+    return f',"reasonCode":[{_concept(SNOMED, code, description)}]'
+
+
+def _encounter_field(encounter: Optional[UUID]) -> str:
+    return '' if encounter is None else f',"encounter":{_reference(encounter)}'
+
+
+def patient_resource(record: Patient, id_: str) -> str:
+    """Patient resource JSON."""
+    name = f'"family":{_string(record.last)},"given":[{_string(record.first)}]'
+    if record.prefix:
+        name += f',"prefix":[{_string(record.prefix)}]'
+    if record.suffix:
+        name += f',"suffix":[{_string(record.suffix)}]'
+    names = f'{{"use":"official",{name}}}'
+    if record.maiden:
+        names += f',{{"use":"maiden","family":{_string(record.maiden)},"given":[{_string(record.first)}]}}'
+    address = f'"line":[{_string(record.address)}],"city":{_string(record.city)},"state":{_string(record.state)}'
+    if record.zip:
+        address += f',"postalCode":{_string(record.zip)}'
+    parts = [
+        f'{{"resourceType":"Patient","id":"{id_}"',
+        f',"identifier":[{{"system":"http://hl7.org/fhir/sid/us-ssn","value":{_string(record.ssn)}}}]',
+        ',"extension":['
+        f'{{"url":"http://hl7.org/fhir/us/core/StructureDefinition/us-core-race",'
+        f'"extension":[{{"url":"text","valueString":{_string(record.race)}}}]}},'
+        f'{{"url":"http://hl7.org/fhir/us/core/StructureDefinition/us-core-ethnicity",'
+        f'"extension":[{{"url":"text","valueString":{_string(record.ethnicity)}}}]}}]',
+        f',"name":[{names}]',
+        f',"gender":"{"male" if record.gender == "M" else "female"}"',
+        f',"birthDate":{_time(record.birthdate)}',
+    ]
+    if record.deathdate is not None:
+        parts.append(f',"deceasedDateTime":{_time(record.deathdate)}')
+    parts.append(f',"address":[{{{address},"country":"US"}}]')
+    if record.marital is not None:
+        parts.append(
+            ',"maritalStatus":'
+            + _concept('http://terminology.hl7.org/CodeSystem/v3-MaritalStatus', record.marital)
+        )
+    parts.append('}')
+    return ''.join(parts)
+
+
+def encounter_resource(record: Encounter, id_: str) -> str:
+    """Encounter resource JSON."""
+    return (
+        f'{{"resourceType":"Encounter","id":"{id_}","status":"finished"'
+        f',"class":{_coding("http://terminology.hl7.org/CodeSystem/v3-ActCode", _ENCOUNTER_CLASSES[record.encounterclass])}'
+        f',"type":[{_concept(SNOMED, record.code, record.description)}]'
+        f',"subject":{_reference(record.patient)}'
+        f',"participant":[{{"individual":{_identifier_reference(record.provider)}}}]'
+        f',"period":{_period(record.start, record.stop)}'
+        f'{_reason(record.reasoncode, record.reasondescription)}'
+        f',"serviceProvider":{_identifier_reference(record.organization)}}}'
+    )
+
+
+def condition_resource(record: Condition, id_: str) -> str:
+    """Condition resource JSON."""
+    status = 'active' if record.stop is None else 'resolved'
+    abatement = '' if record.stop is None else f',"abatementDateTime":{_time(record.stop)}'
+    return (
+        f'{{"resourceType":"Condition","id":"{id_}"'
+        f',"clinicalStatus":{_coding_concept("http://terminology.hl7.org/CodeSystem/condition-clinical", status)}'
+        f',"verificationStatus":{_coding_concept("http://terminology.hl7.org/CodeSystem/condition-ver-status", "confirmed")}'
+        f',"code":{_concept(SNOMED, record.code, record.description)}'
+        f',"subject":{_reference(record.patient)}'
+        f',"encounter":{_reference(record.encounter)}'
+        f',"onsetDateTime":{_time(record.start)}{abatement}}}'
+    )
+
+
+def _observation_value(record: Observation) -> str:
+    value = record.value
+    if value is None:
+        return ''
+    if isinstance(value, float) and math.isfinite(value):
+        if record.units:
+            units = _string(record.units)
+            return (
+                f',"valueQuantity":{{"value":{value!r},"unit":{units}'
+                f',"system":"http://unitsofmeasure.org","code":{units}}}'
+            )
+        return f',"valueQuantity":{{"value":{value!r}}}'
+    return f',"valueString":{_string(str(value))}'
+
+
+def observation_resource(record: Observation, id_: str) -> str:
+    """Observation resource JSON; numeric values become valueQuantity."""
+    category = ''
+    if record.category:
+        category = (
+            ',"category":['
+            + _coding_concept('http://terminology.hl7.org/CodeSystem/observation-category', record.category)
+            + ']'
+        )
+    return (
+        f'{{"resourceType":"Observation","id":"{id_}","status":"final"{category}'
+        f',"code":{_concept(LOINC, record.code, record.description)}'
+        f',"subject":{_reference(record.patient)}'
+        f'{_encounter_field(record.encounter)}'
+        f',"effectiveDateTime":{_time(record.date)}'
+        f'{_observation_value(record)}}}'
+    )
+
+
+def medication_request_resource(record: Medication, id_: str) -> str:
+    """MedicationRequest resource JSON."""
+    status = 'active' if record.stop is None else 'stopped'
+    return (
+        f'{{"resourceType":"MedicationRequest","id":"{id_}","status":"{status}","intent":"order"'
+        f',"medicationCodeableConcept":{_concept(RXNORM, record.code, record.description)}'
+        f',"subject":{_reference(record.patient)}'
+        f',"encounter":{_reference(record.encounter)}'
+        f',"authoredOn":{_time(record.start)}'
+        f'{_reason(record.reasoncode, record.reasondescription)}}}'
+    )
+
+
+def procedure_resource(record: Procedure, id_: str) -> str:
+    """Procedure resource JSON."""
+    return (
+        f'{{"resourceType":"Procedure","id":"{id_}","status":"completed"'
+        f',"code":{_concept(SNOMED, record.code, record.description)}'
+        f',"subject":{_reference(record.patient)}'
+        f',"encounter":{_reference(record.encounter)}'
+        f',"performedPeriod":{_period(record.start, record.stop)}'
+        f'{_reason(record.reasoncode, record.reasondescription)}}}'
+    )
+
+
+def immunization_resource(record: Immunization, id_: str) -> str:
+    """Immunization resource JSON."""
+    return (
+        f'{{"resourceType":"Immunization","id":"{id_}","status":"completed"'
+        f',"vaccineCode":{_concept(CVX, record.code, record.description)}'
+        f',"patient":{_reference(record.patient)}'
+        f',"encounter":{_reference(record.encounter)}'
+        f',"occurrenceDateTime":{_time(record.date)},"primarySource":true}}'
+    )
+
+
+def _reaction(code: Optional[str], description: Optional[str], severity: Optional[str]) -> str:
+    severity_field = '' if severity is None else f',"severity":"{severity.lower()}"'
+    return f'{{"manifestation":[{_concept(SNOMED, code, description)}]{severity_field}}}'
+
+
+def allergy_intolerance_resource(record: Allergy, id_: str) -> str:
+    """AllergyIntolerance resource JSON."""
+    status = 'active' if record.stop is None else 'inactive'
+    parts = [
+        f'{{"resourceType":"AllergyIntolerance","id":"{id_}"',
+        f',"clinicalStatus":{_coding_concept("http://terminology.hl7.org/CodeSystem/allergyintolerance-clinical", status)}',
+        f',"verificationStatus":{_coding_concept("http://terminology.hl7.org/CodeSystem/allergyintolerance-verification", "confirmed")}',
+    ]
+    if record.type is not None:
+        parts.append(f',"type":"{record.type}"')
+    if record.category is not None:
+        parts.append(f',"category":["{_ALLERGY_CATEGORIES[record.category]}"]')
+    system = _ALLERGY_SYSTEMS.get(record.system, record.system)
+    parts.append(f',"code":{_concept(system, record.code, record.description)}')
+    parts.append(f',"patient":{_reference(record.patient)}')
+    parts.append(f',"encounter":{_reference(record.encounter)}')
+    parts.append(f',"onsetDateTime":{_time(record.start)}')
+    reactions = [
+        _reaction(code, description, severity)
+        for code, description, severity in (
+            (record.reaction1, record.description1, record.severity1),
+            (record.reaction2, record.description2, record.severity2),
+        )
+        if code is not None
+    ]
+    if reactions:
+        parts.append(f',"reaction":[{",".join(reactions)}]')
+    parts.append('}')
+    return ''.join(parts)
+
+
+def care_plan_resource(record: CarePlan, id_: str) -> str:
+    """CarePlan resource JSON; the Synthea plan code becomes the category."""
+    status = 'active' if record.stop is None else 'completed'
+    return (
+        f'{{"resourceType":"CarePlan","id":"{id_}","status":"{status}","intent":"order"'
+        f',"category":[{_concept(SNOMED, record.code, record.description)}]'
+        f',"subject":{_reference(record.patient)}'
+        f',"encounter":{_reference(record.encounter)}'
+        f',"period":{_period(record.start, record.stop)}}}'
+    )
+
+
+def claim_resource(record: Claim, id_: str) -> str:
+    """Claim resource JSON."""
+    claim_type = _CLAIM_TYPES.get(record.healthcareclaimtypeid1, 'professional')
+    insurance = record.primarypatientinsuranceid
+    coverage = '{"display":"Self-pay"}' if insurance is None else _identifier_reference(insurance)
+    diagnoses = [
+        f'{{"sequence":{i},"diagnosisCodeableConcept":{_coding_concept(SNOMED, code)}}}'
+        for i, code in enumerate(
+            (
+                record.diagnosis1, record.diagnosis2, record.diagnosis3, record.diagnosis4,
+                record.diagnosis5, record.diagnosis6, record.diagnosis7, record.diagnosis8,
+            ),
+            start=1,
+        )
+        if code is not None
+    ]
+    parts = [
+        f'{{"resourceType":"Claim","id":"{id_}","status":"active"',
+        f',"type":{_coding_concept("http://terminology.hl7.org/CodeSystem/claim-type", claim_type)}',
+        ',"use":"claim"',
+        f',"patient":{_reference(record.patientid)}',
+        f',"created":{_time(record.servicedate)}',
+        f',"provider":{_identifier_reference(record.providerid)}',
+        f',"priority":{_coding_concept("http://terminology.hl7.org/CodeSystem/processpriority", "normal")}',
+        f',"insurance":[{{"sequence":1,"focal":true,"coverage":{coverage}}}]',
+    ]
+    if diagnoses:
+        parts.append(f',"diagnosis":[{",".join(diagnoses)}]')
+    if record.appointmentid is not None:
+        parts.append(
+            f',"item":[{{"sequence":1,"productOrService":{_coding_concept(SNOMED, "185349003")}'
+            f',"encounter":[{_reference(record.appointmentid)}]}}]'
+        )
+    parts.append('}')
+    return ''.join(parts)
+
+
+RESOURCE_WRITERS: dict[type[SyntheaBaseModel], tuple[str, Callable[[SyntheaBaseModel, str], str]]] = {
+    Patient: ('Patient', patient_resource),
+    Encounter: ('Encounter', encounter_resource),
+    Condition: ('Condition', condition_resource),
+    Observation: ('Observation', observation_resource),
+    Medication: ('MedicationRequest', medication_request_resource),
+    Procedure: ('Procedure', procedure_resource),
+    Immunization: ('Immunization', immunization_resource),
+    Allergy: ('AllergyIntolerance', allergy_intolerance_resource),
+    CarePlan: ('CarePlan', care_plan_resource),
+    Claim: ('Claim', claim_resource),
+}
+"""FHIR resource type and JSON writer for each supported model."""
+
+FHIR_TABLES: dict[str, type[SyntheaBaseModel]] = {
+    'patients': Patient,
+    'encounters': Encounter,
+    'conditions': Condition,
+    'observations': Observation,
+    'medications': Medication,
+    'procedures': Procedure,
+    'immunizations': Immunization,
+    'allergies': Allergy,
+    'careplans': CarePlan,
+    'claims': Claim,
+}
+"""Export tables that are converted, in bundle entry order."""
+
+
+_HAS_ID = {model: 'id' in model.model_fields for model in RESOURCE_WRITERS}
+
+
+def _patient_of(record: SyntheaBaseModel) -> UUID:
+    if isinstance(record, Patient):
+        return record.id
+    if isinstance(record, Claim):
+        return record.patientid
+    return record.patient
+
+
+def resource_json(record: SyntheaBaseModel, id_: Optional[UUID | str] = None) -> str:
+    """Return the FHIR resource JSON of a record.
+
+    Args:
+        record: Instance of a model in ``RESOURCE_WRITERS``
+        id_: Resource id. Defaults to the record's ``id``; required for
+            models without one.
+
+    Raises:
+        TypeError: If the model has no FHIR mapping
+    """
+    try:
+        _, write = RESOURCE_WRITERS[type(record)]
+    except KeyError:
+        raise TypeError(f"No FHIR mapping for {type(record).__name__}") from None
+    if id_ is None:
+        id_ = record.id
+    return write(record, str(id_))
+
+
+def bundle_json(records: Iterable[SyntheaBaseModel]) -> str:
+    """Return a FHIR R4 transaction bundle of records as JSON text.
+
+    Records with an ``Id`` keep it as their resource id, so references
+    between resources in the bundle resolve (``urn:uuid:<id>``). Other
+    resources get an id made of a uuid5 prefix derived from the first
+    patient and their position in the bundle.
+
+    Args:
+        records: Records of one patient, usually the Patient first
+
+    Returns:
+        The bundle JSON
+    """
+    entries = []
+    prefix = None
+    for position, record in enumerate(records):
+        try:
+            resource_type, write = RESOURCE_WRITERS[type(record)]
+        except KeyError:
+            raise TypeError(f"No FHIR mapping for {type(record).__name__}") from None
+        if prefix is None:
+            # Keep the first 24 characters of the uuid5 (version bits included)
+            # and put the position in the last 12 hex digits
+            prefix = str(uuid5(RESOURCE_NAMESPACE, str(_patient_of(record))))[:24]
+        if _HAS_ID[type(record)]:
+            id_ = str(record.id)
+        else:
+            id_ = f"{prefix}{position:012x}"
+        entries.append(
+            f'{{"fullUrl":"urn:uuid:{id_}","resource":{write(record, id_)}'
+            f',"request":{{"method":"POST","url":"{resource_type}"}}}}'
+        )
+    return f'{{"resourceType":"Bundle","type":"transaction","entry":[{",".join(entries)}]}}'
+
+
+def _patient_records(directory: Path) -> Iterator[tuple[UUID, list[SyntheaBaseModel]]]:
+    """Group the converted tables of one (partition) directory by patient."""
+    by_patient: dict[UUID, list[SyntheaBaseModel]] = {}
+    files = {table_name(path): path for path in directory.iterdir() if path.is_file()}
+    for table, model in FHIR_TABLES.items():
+        path = files.get(table)
+        if path is None:
+            continue
+        for record in model.iter_csv(path):
+            patient = _patient_of(record)
+            records = by_patient.get(patient)
+            if records is None:
+                records = by_patient[patient] = []
+            records.append(record)
+    yield from by_patient.items()
+
+
+def _write_partition(directory: str, destination: str) -> int:
+    count = 0
+    for patient, records in _patient_records(Path(directory)):
+        with open(os.path.join(destination, f"{patient}.json"), 'w', encoding='utf-8') as f:
+            f.write(bundle_json(records))
+        count += 1
+    return count
+
+
+def _partition_count(paths: list[Path], partitions: Optional[int], workers: int) -> int:
+    if partitions is not None:
+        return partitions
+    size = sum(path.stat().st_size for path in paths)
+    return max(workers * 4, math.ceil(size / _PARTITION_BYTES), 1)
+
+
+def _export_files(export_dir: str | Path) -> list[Path]:
+    return sorted(
+        path for path in Path(export_dir).iterdir()
+        if path.is_file() and table_name(path) in FHIR_TABLES
+    )
+
+
+def iter_bundles(export_dir: str | Path, *, partitions: Optional[int] = None) -> Iterator[tuple[UUID, str]]:
+    """Yield ``(patient id, bundle JSON)`` for every patient of an export.
+
+    The export is first hash-partitioned by patient into a temporary
+    directory; only one partition is held in memory at a time.
+
+    Args:
+        export_dir: Directory with the export's CSV files
+        partitions: Number of partitions. Defaults to one per 64 MiB of input.
+    """
+    paths = _export_files(export_dir)
+    with tempfile.TemporaryDirectory(prefix='synthea-fhir-') as scratch:
+        for directory in partition_files(paths, scratch, _partition_count(paths, partitions, 1)):
+            for patient, records in _patient_records(directory):
+                yield patient, bundle_json(records)
+
+
+def write_bundles(
+    export_dir: str | Path,
+    output_dir: str | Path,
+    *,
+    workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+) -> int:
+    """Convert an export to one ``<patient id>.json`` bundle file per patient.
+
+    Rows are hash-partitioned by patient, then each partition is validated,
+    grouped and written by a worker process that starts with warmed
+    validators (see ``worker_context``). Workers write their bundles
+    directly, so no JSON is sent back to the parent.
+
+    Args:
+        export_dir: Directory with the export's CSV files
+        output_dir: Directory the bundles are written to (created if needed)
+        workers: Worker processes. Defaults to the CPU count.
+        partitions: Number of partitions. Defaults to at least four per
+            worker and one per 64 MiB of input.
+
+    Returns:
+        Number of bundles written
+    """
+    workers = workers or os.cpu_count() or 1
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    paths = _export_files(export_dir)
+    with tempfile.TemporaryDirectory(prefix='synthea-fhir-') as scratch:
+        directories = partition_files(paths, scratch, _partition_count(paths, partitions, workers))
+        if workers == 1:
+            return sum(_write_partition(str(directory), str(output)) for directory in directories)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+            counts = pool.map(_write_partition, map(str, directories), [str(output)] * len(directories))
+            return sum(counts)
@@ -0,0 +1,163 @@
+"""Append-aware incremental loading of growing Synthea CSV files."""
+
+import csv
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generic, Iterator, NamedTuple, Optional, TypeVar
+
+from ._rows import row_plan
+from .base import SyntheaBaseModel
+
+T = TypeVar('T', bound=SyntheaBaseModel)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Position of an ``IncrementalLoader`` within a CSV file.
+
+    A checkpoint is plain data and can be persisted between runs, e.g. with
+    ``dataclasses.asdict`` and ``Checkpoint(**data)``.
+    """
+
+    offset: int
+    """Byte offset just past the last consumed row."""
+    header_fingerprint: str
+    """SHA-256 of the header line."""
+    last_row_start: int
+    """Byte offset of the last consumed row (equal to ``offset`` if none)."""
+    last_row_hash: str
+    """SHA-256 of the last consumed row, used to detect rewrites."""
+    rows: int = 0
+    """Number of data rows consumed so far."""
+
+
+class IncrementalBatch(NamedTuple, Generic[T]):
+    """Records produced by one ``IncrementalLoader.load()`` call."""
+
+    records: list[T]
+    """Newly validated records (all records after a full reload)."""
+    reloaded: bool
+    """True when the file was read from the start, discarding earlier results."""
+
+
+class IncrementalLoader(Generic[T]):
+    """Validate only the rows appended to a CSV file since the last call.
+
+    The loader remembers a ``Checkpoint`` after each call. On the next call it
+    verifies that the header and the last consumed row are unchanged and then
+    reads from the stored byte offset. If the file was truncated or rewritten
+    it falls back to a full reload and reports it via ``reloaded``. A trailing
+    row without a newline, or with a quoted value that is not closed yet, is
+    treated as still being written and left for the next call.
+
+    Example:
+        >>> loader = IncrementalLoader(Encounter, 'encounters.csv')
+        >>> encounters = loader.load().records
+        >>> # ... Synthea appends more rows ...
+        >>> batch = loader.load()
+        >>> encounters = batch.records if batch.reloaded else encounters + batch.records
+
+    Args:
+        model: Model class used to validate rows
+        path: Path to the CSV file
+        checkpoint: Checkpoint from a previous run to resume from
+    """
+
+    def __init__(self, model: type[T], path: str | Path, checkpoint: Optional[Checkpoint] = None):
+        self.model = model
+        self.path = Path(path)
+        self.checkpoint = checkpoint
+
+    def _is_valid(self, f, checkpoint: Checkpoint, size: int) -> bool:
+        if size < checkpoint.offset:
+            return False
+        f.seek(0)
+        if _digest(f.readline()) != checkpoint.header_fingerprint:
+            return False
+        f.seek(checkpoint.last_row_start)
+        last_row = f.read(checkpoint.offset - checkpoint.last_row_start)
+        return _digest(last_row) == checkpoint.last_row_hash
+
+    def load(self) -> IncrementalBatch[T]:
+        """Validate rows appended since the last call (or the whole file).
+
+        Returns:
+            IncrementalBatch with the new records and whether the file was
+            fully reloaded
+        """
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, 2)
+            checkpoint = self.checkpoint
+            reloaded = checkpoint is None or not self._is_valid(f, checkpoint, size)
+            f.seek(0)
+            header_line = f.readline()
+            if not header_line.endswith(b'\n'):
+                # Header not fully written yet
+                self.checkpoint = None
+                return IncrementalBatch([], reloaded)
+            header = next(csv.reader([header_line.decode('utf-8')]))
+            if reloaded:
+                offset = len(header_line)
+                checkpoint = Checkpoint(offset, _digest(header_line), offset, _digest(b''))
+            else:
+                offset = checkpoint.offset
+            f.seek(offset)
+
+            tracker = _LineTracker(f, checkpoint)
+            validate = row_plan(self.model, header).validate
+            records = [validate(row) for row in csv.reader(tracker) if row]
+            self.checkpoint = tracker.checkpoint(records)
+        return IncrementalBatch(records, reloaded)
+
+
+class _LineTracker:
+    """Iterate over the lines of complete CSV records while tracking byte offsets.
+
+    Lines of a record are only handed out once the record is complete: it
+    ends with a newline outside quotes. A record still being written at the
+    end of the file, including a quoted multi-line value, is held back and
+    the checkpoint stays before it.
+    """
+
+    def __init__(self, f, checkpoint: Checkpoint):
+        self._f = f
+        self._start = checkpoint
+        self._offset = checkpoint.offset
+        self._last_start = checkpoint.last_row_start
+        self._last_line: Optional[bytes] = None
+
+    def __iter__(self) -> Iterator[str]:
+        pending: list[bytes] = []
+        quotes = 0
+        for line in self._f:
+            if not line.endswith(b'\n'):
+                break
+            pending.append(line)
+            # Escaped quotes come in pairs, so an odd count means the
+            # record continues on the next line
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+            record = b''.join(pending)
+            pending.clear()
+            quotes = 0
+            self._last_start = self._offset
+            self._offset += len(record)
+            self._last_line = record
+            yield record.decode('utf-8')
+
+    def checkpoint(self, records: list) -> Checkpoint:
+        if self._last_line is None:
+            return self._start
+        return Checkpoint(
+            offset=self._offset,
+            header_fingerprint=self._start.header_fingerprint,
+            last_row_start=self._last_start,
+            last_row_hash=_digest(self._last_line),
+            rows=self._start.rows + len(records),
+        )
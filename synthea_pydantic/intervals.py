@@ -0,0 +1,221 @@
+"""Per-patient temporal interval index over Synthea start/stop records."""
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+from uuid import UUID
+
+from ._parsers import to_epoch_seconds
+from .allergies import Allergy
+from .base import SyntheaBaseModel
+from .careplans import CarePlan
+from .conditions import Condition
+from .devices import Device
+from .encounters import Encounter
+from .medications import Medication
+from .payer_transitions import PayerTransition
+from .procedures import Procedure
+
+OPEN_END = 2**63 - 1
+"""Stop epoch used for open-ended intervals (``stop=None``)."""
+
+INTERVAL_MODELS: tuple[type[SyntheaBaseModel], ...] = (
+    Allergy, CarePlan, Condition, Device, Encounter, Medication, PayerTransition, Procedure,
+)
+"""Models with a start/stop interval that ``IntervalIndex`` accepts."""
+
+_DAY = 86_400
+
+TimePoint = Union[int, date, datetime]
+
+
+def _as_epoch(when: TimePoint) -> int:
+    return when if isinstance(when, int) else to_epoch_seconds(when)
+
+
+def interval_of(record: SyntheaBaseModel) -> tuple[int, int]:
+    """Return the half-open ``[start, stop)`` interval of a record in epoch seconds.
+
+    ``PayerTransition`` years are inclusive, so coverage runs from January 1st
+    of ``start_year`` up to January 1st of the year after ``end_year``.
+    Missing stops are open-ended and map to ``OPEN_END``. A record that
+    stops when it starts (e.g. a condition resolved the same day) is
+    widened to the whole day for date fields, or one second for datetimes,
+    so that it is still active at its start.
+    """
+    if isinstance(record, PayerTransition):
+        start = to_epoch_seconds(datetime(record.start_year, 1, 1, tzinfo=timezone.utc))
+        stop = to_epoch_seconds(datetime(record.end_year + 1, 1, 1, tzinfo=timezone.utc))
+        return start, stop
+    start = to_epoch_seconds(record.start)
+    if record.stop is None:
+        return start, OPEN_END
+    stop = to_epoch_seconds(record.stop)
+    if stop == start:
+        stop += 1 if isinstance(record.start, datetime) else _DAY
+    return start, stop
+
+
+class _Intervals:
+    """Sorted-endpoint index for one patient and one model.
+
+    Intervals are kept sorted by start, alongside the running maximum of the
+    stops. A query bisects the starts and walks backwards only while the
+    running maximum shows that an earlier interval can still reach the query
+    point, so long-closed history is never scanned.
+    """
+
+    __slots__ = ('starts', 'stops', 'max_stops', 'records', 'dirty')
+
+    def __init__(self):
+        self.starts = array('q')
+        self.stops = array('q')
+        self.max_stops = array('q')
+        self.records: list[SyntheaBaseModel] = []
+        self.dirty = False
+
+    def add(self, start: int, stop: int, record: SyntheaBaseModel) -> None:
+        if self.starts and start < self.starts[-1]:
+            self.dirty = True
+        self.starts.append(start)
+        self.stops.append(stop)
+        self.records.append(record)
+
+    def _build(self) -> None:
+        if self.dirty:
+            order = sorted(range(len(self.starts)), key=self.starts.__getitem__)
+            self.starts = array('q', (self.starts[i] for i in order))
+            self.stops = array('q', (self.stops[i] for i in order))
+            self.records = [self.records[i] for i in order]
+            self.max_stops = array('q')
+            self.dirty = False
+        if len(self.max_stops) != len(self.stops):
+            running = self.max_stops[-1] if self.max_stops else -OPEN_END
+            for stop in self.stops[len(self.max_stops):]:
+                running = max(running, stop)
+                self.max_stops.append(running)
+
+    def overlapping(self, lo: int, hi: int) -> list[SyntheaBaseModel]:
+        """Return records whose interval overlaps ``[lo, hi)``, in start order."""
+        self._build()
+        found = []
+        j = bisect_left(self.starts, hi) - 1
+        while j >= 0 and self.max_stops[j] > lo:
+            if self.stops[j] > lo:
+                found.append(self.records[j])
+            j -= 1
+        found.reverse()
+        return found
+
+    def active_at(self, when: int) -> list[SyntheaBaseModel]:
+        """Return records whose interval contains ``when``."""
+        # [when, when + 1) overlaps [start, stop) iff start <= when < stop
+        return self.overlapping(when, when + 1)
+
+
+class IntervalIndex:
+    """Point-in-time and range-overlap queries over patients' records.
+
+    Records are added in a single streaming pass; each ``(patient, model)``
+    pair gets a sorted-endpoint index that is (re)sorted lazily on the first
+    query after new records arrive. Intervals are half-open
+    ``[start, stop)``, except that zero-length records are active at their
+    start (see ``interval_of``), and open-ended records (``stop=None``)
+    stay active forever.
+
+    Example:
+        >>> index = IntervalIndex()
+        >>> index.add_csv(Medication, 'medications.csv')
+        >>> index.add_csv(Condition, 'conditions.csv')
+        >>> index.active_at(patient_id, date(2020, 1, 1), kinds=(Medication,))
+    """
+
+    def __init__(self):
+        self._patients: dict[UUID, dict[type[SyntheaBaseModel], _Intervals]] = {}
+
+    def add(self, record: SyntheaBaseModel) -> None:
+        """Add a single record of one of the ``INTERVAL_MODELS``."""
+        if not isinstance(record, INTERVAL_MODELS):
+            raise TypeError(f"Cannot index intervals of {type(record).__name__} records")
+        start, stop = interval_of(record)
+        by_kind = self._patients.get(record.patient)
+        if by_kind is None:
+            by_kind = self._patients[record.patient] = {}
+        intervals = by_kind.get(type(record))
+        if intervals is None:
+            intervals = by_kind[type(record)] = _Intervals()
+        intervals.add(start, stop, record)
+
+    def update(self, records: Iterable[SyntheaBaseModel]) -> 'IntervalIndex':
+        """Add an iterable (or ``iter_csv`` stream) of records."""
+        for record in records:
+            self.add(record)
+        return self
+
+    def add_csv(self, model: type[SyntheaBaseModel], path: str | Path) -> 'IntervalIndex':
+        """Stream a CSV file through ``model.iter_csv`` into the index."""
+        return self.update(model.iter_csv(path))
+
+    def _select(
+        self, patient: UUID, kinds: Optional[Iterable[type[SyntheaBaseModel]]]
+    ) -> Iterator[_Intervals]:
+        by_kind = self._patients.get(patient)
+        if not by_kind:
+            return
+        if kinds is None:
+            yield from by_kind.values()
+        else:
+            for kind in kinds:
+                intervals = by_kind.get(kind)
+                if intervals is not None:
+                    yield intervals
+
+    def active_at(
+        self,
+        patient: UUID,
+        when: TimePoint,
+        kinds: Optional[Iterable[type[SyntheaBaseModel]]] = None,
+    ) -> list[SyntheaBaseModel]:
+        """Return the patient's records active at a point in time.
+
+        Args:
+            patient: Patient id
+            when: Date, datetime or epoch seconds; dates mean midnight UTC
+            kinds: Restrict results to these models (default: all)
+
+        Returns:
+            Matching records, grouped by model and ordered by start
+        """
+        t = _as_epoch(when)
+        return [record for intervals in self._select(patient, kinds) for record in intervals.active_at(t)]
+
+    def overlapping(
+        self,
+        patient: UUID,
+        start: TimePoint,
+        stop: Optional[TimePoint] = None,
+        kinds: Optional[Iterable[type[SyntheaBaseModel]]] = None,
+    ) -> list[SyntheaBaseModel]:
+        """Return the patient's records overlapping ``[start, stop)``.
+
+        Args:
+            patient: Patient id
+            start: Range start (inclusive)
+            stop: Range end (exclusive); None means open-ended
+            kinds: Restrict results to these models (default: all)
+
+        Returns:
+            Matching records, grouped by model and ordered by start
+        """
+        lo = _as_epoch(start)
+        hi = OPEN_END if stop is None else _as_epoch(stop)
+        return [record for intervals in self._select(patient, kinds) for record in intervals.overlapping(lo, hi)]
+
+    def patients(self) -> Iterator[UUID]:
+        """Iterate over the ids of patients with at least one record."""
+        return iter(self._patients)
+
+    def __len__(self) -> int:
+        return sum(len(intervals.records) for by_kind in self._patients.values() for intervals in by_kind.values())
@@ -0,0 +1,264 @@
+"""Columnar observations table with numeric and text values stored apart."""
+
+import csv
+from array import array
+from datetime import datetime, timezone
+from itertools import compress, repeat
+from operator import eq
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+from uuid import UUID
+
+from ._io import open_csv
+from ._parsers import to_epoch_seconds
+from ._trusted import trusted_plan
+from .observations import Observation
+
+NULL = 0
+"""Type tag of an observation without a value."""
+NUMERIC = 1
+"""Type tag of a value stored in ``ObservationColumns.numbers``."""
+TEXT = 2
+"""Type tag of a value stored in ``ObservationColumns.text_ids``."""
+
+_FIELDS = ('date', 'patient', 'encounter', 'category', 'code', 'description', 'value', 'units', 'type')
+
+
+class _Interner(dict):
+    """Map of values to their first instance, so repeated values share one object."""
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        self[key] = key
+        return key
+
+
+class ObservationColumns:
+    """Observations stored column by column, with the mixed VALUE split by type.
+
+    ``Observation.value`` is ``str | float``; here each row gets a type tag
+    in ``tags`` instead. Numeric values (``TYPE == numeric``) are packed into
+    the dense ``numbers`` buffer (``array('d')``) and text values into
+    ``text_ids``, indexes into the interned vocabulary ``texts``. ``slots``
+    gives each row's position in its buffer and ``number_rows`` /
+    ``text_rows`` map back from buffer positions to rows. Numeric analytics
+    work on ``numbers`` (or ``numeric(code)``) without per-row type checks,
+    and ``Observation`` objects are built on demand by indexing.
+
+    Example:
+        >>> columns = ObservationColumns.from_csv('observations.csv')
+        >>> statistics.fmean(columns.numeric('8302-2'))
+        162.4
+        >>> columns[0]
+        Observation(date=..., value=180.2, ...)
+    """
+
+    def __init__(self):
+        self.epochs = array('q')
+        self.patients: list[UUID] = []
+        self.encounters: list[Optional[UUID]] = []
+        self.categories: list[Optional[str]] = []
+        self.code_ids = array('l')
+        self.codes: list[str] = []
+        self.descriptions: list[str] = []
+        self.units: list[Optional[str]] = []
+        self.types: list[str] = []
+        self.tags = array('b')
+        self.slots = array('l')
+        self.numbers = array('d')
+        self.number_rows = array('l')
+        self.text_ids = array('l')
+        self.text_rows = array('l')
+        self.texts: list[str] = []
+        self._code_ids: dict[str, int] = {}
+        self._text_ids: dict[str, int] = {}
+        self._ids = _Interner()
+        self._strings = _Interner()
+
+    @classmethod
+    def from_observations(cls, observations: Iterable[Observation]) -> 'ObservationColumns':
+        """Build columns from validated Observations (e.g. an ``iter_csv`` stream)."""
+        columns = cls()
+        for observation in observations:
+            columns.append(observation)
+        return columns
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> 'ObservationColumns':
+        """Build columns by streaming an observations CSV file.
+
+        Rows are parsed directly rather than validated into Observations:
+        VALUE is converted with ``float()`` only for numeric rows, and a
+        numeric row whose value does not parse is stored as text, as the
+        model does. Files without the optional CATEGORY, ENCOUNTER or UNITS
+        columns (older Synthea versions) are accepted.
+
+        Args:
+            path: Path to observations.csv, optionally compressed
+
+        Returns:
+            Loaded ObservationColumns
+        """
+        columns = cls()
+        with open_csv(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return columns
+            date_i, patient_i, code_i, description_i, value_i, type_i = (
+                header.index(column) for column in ('DATE', 'PATIENT', 'CODE', 'DESCRIPTION', 'VALUE', 'TYPE')
+            )
+            encounter_i, category_i, units_i = (
+                header.index(column) if column in header else None for column in ('ENCOUNTER', 'CATEGORY', 'UNITS')
+            )
+            ids, strings = columns._ids, columns._strings
+            for row in reader:
+                if not row:
+                    continue
+                encounter = row[encounter_i].strip() if encounter_i is not None else ''
+                value: Union[float, str, None] = row[value_i].strip() or None
+                type_ = row[type_i].strip()
+                if value is not None and type_ == 'numeric':
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+                columns._add(
+                    to_epoch_seconds(datetime.fromisoformat(row[date_i].strip())),
+                    ids[UUID(row[patient_i].strip())],
+                    ids[UUID(encounter)] if encounter else None,
+                    (row[category_i].strip() or None) if category_i is not None else None,
+                    row[code_i].strip(),
+                    strings[row[description_i].strip()],
+                    value,
+                    (row[units_i].strip() or None) if units_i is not None else None,
+                    type_,
+                )
+        return columns
+
+    def append(self, observation: Observation) -> None:
+        """Add one validated Observation."""
+        self._add(
+            to_epoch_seconds(observation.date),
+            self._ids[observation.patient],
+            self._ids[observation.encounter] if observation.encounter is not None else None,
+            observation.category,
+            observation.code,
+            self._strings[observation.description],
+            observation.value,
+            observation.units,
+            observation.type,
+        )
+
+    def _add(
+        self,
+        epoch: int,
+        patient: UUID,
+        encounter: Optional[UUID],
+        category: Optional[str],
+        code: str,
+        description: str,
+        value: Union[float, str, None],
+        units: Optional[str],
+        type_: str,
+    ) -> None:
+        row = len(self.tags)
+        strings = self._strings
+        self.epochs.append(epoch)
+        self.patients.append(patient)
+        self.encounters.append(encounter)
+        self.categories.append(strings[category] if category is not None else None)
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            code_id = self._code_ids[code] = len(self.codes)
+            self.codes.append(code)
+        self.code_ids.append(code_id)
+        self.descriptions.append(description)
+        self.units.append(strings[units] if units is not None else None)
+        self.types.append(strings[type_])
+        if value is None:
+            self.tags.append(NULL)
+            self.slots.append(-1)
+            return
+        if type(value) is float:
+            self.tags.append(NUMERIC)
+            self.slots.append(len(self.numbers))
+            self.numbers.append(value)
+            self.number_rows.append(row)
+            return
+        text_id = self._text_ids.get(value)
+        if text_id is None:
+            text_id = self._text_ids[value] = len(self.texts)
+            self.texts.append(value)
+        self.tags.append(TEXT)
+        self.slots.append(len(self.text_ids))
+        self.text_ids.append(text_id)
+        self.text_rows.append(row)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def value(self, row: int) -> Optional[Union[float, str]]:
+        """Value of one row, as the Observation model would hold it."""
+        tag = self.tags[row]
+        if tag == NUMERIC:
+            return self.numbers[self.slots[row]]
+        if tag == TEXT:
+            return self.texts[self.text_ids[self.slots[row]]]
+        return None
+
+    def __getitem__(self, row: int) -> Observation:
+        """Build the Observation of one row.
+
+        Dates come back timezone-aware in UTC.
+        """
+        if row < 0:
+            row += len(self)
+        values = [
+            datetime.fromtimestamp(self.epochs[row], timezone.utc),
+            self.patients[row],
+            self.encounters[row],
+            self.categories[row],
+            self.codes[self.code_ids[row]],
+            self.descriptions[row],
+            self.value(row),
+            self.units[row],
+            self.types[row],
+        ]
+        # Every value was parsed or validated on the way in
+        return trusted_plan(Observation, _FIELDS).construct(values)
+
+    def __iter__(self) -> Iterator[Observation]:
+        return map(self.__getitem__, range(len(self)))
+
+    def _code_mask(self, code: str, rows: array) -> Optional[Iterator[bool]]:
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            return None
+        return map(eq, map(self.code_ids.__getitem__, rows), repeat(code_id))
+
+    def numeric(self, code: Optional[str] = None) -> array:
+        """Numeric values, optionally of one code only, as ``array('d')``.
+
+        Without a code this is the ``numbers`` buffer itself.
+        """
+        if code is None:
+            return self.numbers
+        mask = self._code_mask(code, self.number_rows)
+        return array('d', compress(self.numbers, mask) if mask is not None else ())
+
+    def numeric_rows(self, code: Optional[str] = None) -> array:
+        """Row numbers of the numeric values, aligned with ``numeric(code)``."""
+        if code is None:
+            return self.number_rows
+        mask = self._code_mask(code, self.number_rows)
+        return array('l', compress(self.number_rows, mask) if mask is not None else ())
+
+    def text(self, code: Optional[str] = None) -> list[str]:
+        """Text values, optionally of one code only, in row order."""
+        ids = self.text_ids
+        if code is not None:
+            mask = self._code_mask(code, self.text_rows)
+            ids = compress(ids, mask) if mask is not None else ()
+        return list(map(self.texts.__getitem__, ids))
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional, Union
 from uuid import UUID
 
-from pydantic import Field, model_validator
+from pydantic import Field
 
 from .base import SyntheaBaseModel
 
@@ -22,20 +22,12 @@ class Observation(SyntheaBaseModel):
     units: Optional[str] = Field(None, alias='UNITS', description="The units of measure for the value, if applicable")
     type: str = Field(alias='TYPE', description="The datatype of value: text or numeric")
     
-    @model_validator(mode='before')
     @classmethod
-    def preprocess_csv(cls, data):
-        """Convert empty strings to None and handle numeric values."""
-        # First apply the base preprocessing
-        data = super().preprocess_csv(data)
-        
-        if isinstance(data, dict):
-            processed = data.copy()
-            # Try to convert numeric values in VALUE field when TYPE is numeric
-            if processed.get('TYPE') == 'numeric' and processed.get('VALUE'):
-                try:
-                    processed['VALUE'] = float(processed['VALUE'])
-                except ValueError:
-                    pass  # Keep original value if conversion fails
-            return processed
-        return data
\ No newline at end of file
+    def _preprocess_row(cls, row: dict) -> None:
+        """Handle numeric values."""
+        # Try to convert numeric values in VALUE field when TYPE is numeric
+        if row.get('TYPE') == 'numeric' and row.get('VALUE'):
+            try:
+                row['VALUE'] = float(row['VALUE'])
+            except ValueError:
+                pass  # Keep original value if conversion fails
\ No newline at end of file
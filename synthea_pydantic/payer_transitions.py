@@ -19,7 +19,7 @@ class PayerTransition(SyntheaBaseModel):
     payer: UUID = Field(alias='PAYER', description="Foreign key to the Payer")
     secondary_payer: Optional[UUID] = Field(None, alias='SECONDARY_PAYER', description="Foreign key to the Secondary Payer")
     ownership: Optional[Literal["Guardian", "Self", "Spouse"]] = Field(None, alias='OWNERSHIP', description="The owner of the insurance policy. Legal values: Guardian, Self, Spouse")
-    owner_name: Optional[str] = Field(None, alias='OWNERNAME', description="The name of the insurance policy owner")
+    owner_name: Optional[str] = Field(None, alias='OWNERNAME', description="The name of the insurance policy owner", json_schema_extra={'phi': True})
     
     @field_validator('start_year', 'end_year', mode='before')
     @classmethod
@@ -0,0 +1,552 @@
+"""Staged ingestion pipelines connected by bounded queues.
+
+A ``Pipeline`` runs each ``Stage`` on its own executor, threads for I/O
+bound steps and processes for validation, and connects consecutive stages
+with bounded queues so a slow stage holds back the ones before it instead
+of letting work pile up in memory. ``ingest`` builds the usual
+read/decompress/tokenize -> preprocess/validate -> sink pipeline over
+export CSV files.
+"""
+
+import csv
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from ._io import open_csv
+from ._jsonl import DEFAULT_CHUNK_SIZE
+from ._rows import row_plan
+from .base import SyntheaBaseModel
+from .tables import TABLES, model_for, table_name
+from .warmup import worker_context
+
+_END = object()
+"""Queue marker after the last item of a stage."""
+
+_POLL = 0.1
+"""Seconds between checks for shutdown while blocked on a queue or future."""
+
+_EXECUTORS = ('thread', 'process')
+
+
+class _Stopped(Exception):
+    """Raised inside pipeline threads once the pipeline is shutting down."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of a ``Pipeline``.
+
+    Args:
+        name: Stage name, the key of its metrics
+        function: Called with each input item. Must be picklable for
+            process stages.
+        workers: Concurrent calls of ``function``
+        executor: ``'thread'`` or ``'process'``
+        expand: ``function`` returns an iterable whose items are passed on
+            one by one. Thread stages consume it lazily, so a generator
+            reading a large file stays bounded by the queues; process
+            stages return it as a list.
+
+    Raises:
+        ValueError: If ``executor`` or ``workers`` is invalid
+    """
+
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+    executor: str = 'thread'
+    expand: bool = False
+
+    def __post_init__(self):
+        if self.executor not in _EXECUTORS:
+            raise ValueError(f"Unknown executor {self.executor!r}; expected one of {_EXECUTORS}")
+        if self.workers < 1:
+            raise ValueError(f"Stage {self.name!r} needs at least one worker")
+
+
+@dataclass
+class StageMetrics:
+    """Throughput counters of one stage, updated while the pipeline runs."""
+
+    name: str
+    workers: int
+    items_in: int = 0
+    """Items taken from the input queue."""
+    items_out: int = 0
+    """Items passed to the next stage (or the consumer)."""
+    busy: float = 0.0
+    """Seconds spent in the stage function, summed over workers."""
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the stage started, up to when it finished."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Items passed on per second."""
+        elapsed = self.elapsed
+        return self.items_out / elapsed if elapsed else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the workers' time spent in the stage function.
+
+        Near 1 the stage is the bottleneck; near 0 it waits on its input
+        or on the stages after it.
+        """
+        elapsed = self.elapsed
+        return self.busy / (elapsed * self.workers) if elapsed else 0.0
+
+    def _add(self, items_out: int = 0, busy: float = 0.0) -> None:
+        with self._lock:
+            self.items_out += items_out
+            self.busy += busy
+
+
+class _Task(NamedTuple):
+    future: Future
+    queue: Optional[Queue]
+    """Items of an ordered expanding thread task, in production order."""
+    streamed: bool
+    """The worker passed the items on itself."""
+
+
+def _call(function: Callable[[Any], Any], item: Any) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = function(item)
+    return time.perf_counter() - start, result
+
+
+def _call_list(function: Callable[[Any], Any], item: Any) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = list(function(item))
+    return time.perf_counter() - start, result
+
+
+class Pipeline:
+    """Stages run concurrently over a source, connected by bounded queues.
+
+    Every stage has a dispatcher thread that takes items from its input
+    queue, keeps up to ``2 * workers`` calls in flight on the stage's
+    executor and puts the results on the next queue. With ``ordered`` the
+    output follows the source order; otherwise results are passed on as
+    they complete, which keeps workers busy when item costs vary.
+
+    If a stage (or the source) raises, the pipeline stops: queued items are
+    dropped, pending calls are cancelled, running ones finish and the first
+    error is re-raised to the consumer. Leaving iteration early, or
+    ``close()``, shuts it down the same way.
+
+    Example:
+        >>> stages = [Stage('parse', parse, workers=4, executor='process'), Stage('store', store)]
+        >>> with Pipeline(chunks, stages) as pipeline:
+        ...     pipeline.run()
+        >>> pipeline.metrics['parse'].throughput
+        812.5
+
+    Args:
+        source: Items fed into the first stage
+        stages: Stages in order
+        ordered: Keep the source order in every stage
+        queue_size: Capacity of each queue between stages
+
+    Raises:
+        ValueError: If there are no stages or two share a name
+    """
+
+    def __init__(
+        self,
+        source: Iterable[Any],
+        stages: Iterable[Stage],
+        *,
+        ordered: bool = True,
+        queue_size: int = 16,
+    ):
+        self.stages = tuple(stages)
+        if not self.stages:
+            raise ValueError("A pipeline needs at least one stage")
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Stage names must be unique: {names}")
+        self.ordered = ordered
+        self.queue_size = queue_size
+        self.metrics: dict[str, StageMetrics] = {
+            stage.name: StageMetrics(stage.name, stage.workers) for stage in self.stages
+        }
+        self._source = source
+        self._queues: list[Queue] = [Queue(queue_size) for _ in range(len(self.stages) + 1)]
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._executors: list[Executor] = []
+        self._started = False
+
+    def __iter__(self) -> Iterator[Any]:
+        """Run the pipeline, yielding the last stage's output.
+
+        Raises:
+            ValueError: If the pipeline was already run
+        """
+        if self._started:
+            raise ValueError("A pipeline can only be run once")
+        self._start()
+        return self._results()
+
+    def _results(self) -> Iterator[Any]:
+        try:
+            while True:
+                try:
+                    item = self._get(self._queues[-1])
+                except _Stopped:
+                    break
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.close()
+        if self._error is not None:
+            raise self._error
+
+    def run(self) -> int:
+        """Run the pipeline to the end, discarding the output.
+
+        Returns:
+            Number of items the last stage produced
+        """
+        count = 0
+        for _ in self:
+            count += 1
+        return count
+
+    def close(self) -> None:
+        """Stop every stage and wait for running calls to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._threads.clear()
+        self._executors.clear()
+
+    def __enter__(self) -> 'Pipeline':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        self._started = True
+        for stage in self.stages:
+            if stage.executor == 'process':
+                executor = ProcessPoolExecutor(max_workers=stage.workers, mp_context=worker_context())
+            else:
+                executor = ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=f"pipeline-{stage.name}")
+            self._executors.append(executor)
+        self._threads.append(threading.Thread(target=self._feed, name='pipeline-source', daemon=True))
+        for i, stage in enumerate(self.stages):
+            self._threads.append(
+                threading.Thread(target=self._dispatch, args=(i,), name=f"pipeline-{stage.name}", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def _fail(self, error: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _get(self, queue: Queue, idle: Optional[Callable[[], None]] = None) -> Any:
+        while True:
+            try:
+                return queue.get(timeout=_POLL)
+            except Empty:
+                if self._stop.is_set():
+                    raise _Stopped from None
+                if idle is not None:
+                    idle()
+
+    def _put(self, queue: Queue, item: Any) -> None:
+        while True:
+            try:
+                queue.put(item, timeout=_POLL)
+                return
+            except Full:
+                if self._stop.is_set():
+                    raise _Stopped from None
+
+    def _result(self, future: Future) -> Any:
+        while not future.done():
+            wait([future], timeout=_POLL)
+            if self._stop.is_set() and not future.done():
+                raise _Stopped
+        return future.result()
+
+    def _feed(self) -> None:
+        try:
+            for item in self._source:
+                self._put(self._queues[0], item)
+            self._put(self._queues[0], _END)
+        except _Stopped:
+            pass
+        except BaseException as error:
+            self._fail(error)
+
+    def _dispatch(self, index: int) -> None:
+        stage = self.stages[index]
+        metrics = self.metrics[stage.name]
+        inbox, outbox = self._queues[index], self._queues[index + 1]
+        executor = self._executors[index]
+        pending: deque[_Task] = deque()
+        limit = stage.workers * 2
+        metrics.started = time.perf_counter()
+
+        def idle() -> None:
+            self._emit(stage, metrics, pending, outbox, block=False)
+
+        try:
+            while True:
+                item = self._get(inbox, idle)
+                if item is _END:
+                    break
+                metrics.items_in += 1
+                pending.append(self._submit(stage, metrics, executor, item, outbox))
+                self._emit(stage, metrics, pending, outbox, block=len(pending) >= limit)
+            while pending:
+                self._emit(stage, metrics, pending, outbox, block=True)
+            self._put(outbox, _END)
+        except _Stopped:
+            pass
+        except BaseException as error:
+            self._fail(error)
+        finally:
+            metrics.finished = time.perf_counter()
+
+    def _submit(
+        self, stage: Stage, metrics: StageMetrics, executor: Executor, item: Any, outbox: Queue,
+    ) -> _Task:
+        if not stage.expand:
+            return _Task(executor.submit(_call, stage.function, item), None, False)
+        if stage.executor == 'process':
+            return _Task(executor.submit(_call_list, stage.function, item), None, False)
+        if not self.ordered:
+            return _Task(executor.submit(self._stream, stage, metrics, item, outbox, True), None, True)
+        queue = Queue(self.queue_size)
+        return _Task(executor.submit(self._stream, stage, metrics, item, queue, False), queue, True)
+
+    def _stream(
+        self, stage: Stage, metrics: StageMetrics, item: Any, queue: Queue, direct: bool,
+    ) -> tuple[float, None]:
+        """Run an expanding thread call, passing items on as they are produced.
+
+        ``direct`` items go straight to the next stage; otherwise they go to
+        the task's own queue, ended by ``_END``, for ``_forward``.
+        """
+        busy = 0.0
+        iterator = None
+        try:
+            start = time.perf_counter()
+            iterator = iter(stage.function(item))
+            while True:
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    busy += time.perf_counter() - start
+                self._put(queue, value)
+                if direct:
+                    metrics._add(items_out=1)
+                start = time.perf_counter()
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+            if not direct and not self._stop.is_set():
+                self._put(queue, _END)
+        return busy, None
+
+    def _emit(
+        self, stage: Stage, metrics: StageMetrics, pending: deque, outbox: Queue, *, block: bool,
+    ) -> None:
+        """Pass on finished results; with ``block``, wait until at least one is."""
+        if self.ordered:
+            while pending:
+                task = pending[0]
+                if task.queue is not None:
+                    if not self._forward(task.queue, metrics, outbox, block):
+                        return
+                elif not (block or task.future.done()):
+                    return
+                pending.popleft()
+                self._finish(stage, metrics, task, outbox)
+                block = False
+            return
+        if block:
+            while not any(task.future.done() for task in pending):
+                wait([task.future for task in pending], timeout=_POLL, return_when=FIRST_COMPLETED)
+                if self._stop.is_set():
+                    raise _Stopped
+        for task in [task for task in pending if task.future.done()]:
+            pending.remove(task)
+            self._finish(stage, metrics, task, outbox)
+
+    def _forward(self, queue: Queue, metrics: StageMetrics, outbox: Queue, block: bool) -> bool:
+        """Move an ordered streaming task's items on; True once it has ended."""
+        while True:
+            if block:
+                value = self._get(queue)
+            else:
+                try:
+                    value = queue.get_nowait()
+                except Empty:
+                    return False
+            if value is _END:
+                return True
+            self._put(outbox, value)
+            metrics._add(items_out=1)
+
+    def _finish(self, stage: Stage, metrics: StageMetrics, task: _Task, outbox: Queue) -> None:
+        busy, result = self._result(task.future)
+        metrics._add(busy=busy)
+        if task.streamed:
+            return
+        if stage.expand:
+            for value in result:
+                self._put(outbox, value)
+            metrics._add(items_out=len(result))
+        else:
+            self._put(outbox, result)
+            metrics._add(items_out=1)
+
+
+class RecordBatch(NamedTuple):
+    """Validated records from one chunk of an export file."""
+
+    table: str
+    """Table name, e.g. ``'patients'``."""
+    index: int
+    """Position of the chunk within its file."""
+    records: list[SyntheaBaseModel]
+
+
+class _RowBatch(NamedTuple):
+    table: str
+    index: int
+    header: tuple[str, ...]
+    rows: list[list[str]]
+
+
+def _read_batches(job: tuple[str, int]) -> Iterator[_RowBatch]:
+    """Decompress and tokenize one CSV file into chunks of raw rows."""
+    path, batch_size = job
+    table = table_name(path)
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = tuple(header)
+        rows = []
+        index = 0
+        for row in reader:
+            # csv.DictReader skips blank lines as well
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == batch_size:
+                yield _RowBatch(table, index, header, rows)
+                rows = []
+                index += 1
+        if rows:
+            yield _RowBatch(table, index, header, rows)
+
+
+def _validate_batch(batch: _RowBatch) -> RecordBatch:
+    """Preprocess and validate a chunk of rows with the table's ``RowPlan``."""
+    validate = row_plan(TABLES[batch.table], batch.header).validate
+    return RecordBatch(batch.table, batch.index, [validate(row) for row in batch.rows])
+
+
+def ingest(
+    paths: str | Path | Iterable[str | Path],
+    *,
+    sink: Optional[Callable[[RecordBatch], Any]] = None,
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+    readers: Optional[int] = None,
+    validators: Optional[int] = None,
+    executor: str = 'process',
+    ordered: bool = True,
+    queue_size: int = 16,
+) -> Pipeline:
+    """Build a pipeline that reads and validates export CSV files.
+
+    Stages:
+
+    * ``read``: reader threads decompress and tokenize files (one file per
+      thread at a time) into chunks of ``batch_size`` raw rows;
+    * ``validate``: workers preprocess and validate chunks with the same
+      ``RowPlan`` as ``iter_csv``; worker processes start with warmed
+      validators (see ``worker_context``) and send records back in their
+      compact binary encoding;
+    * ``sink`` (if given): one thread calls ``sink`` with every
+      ``RecordBatch``, e.g. to write it to a database.
+
+    With several tables this keeps disks busy reading ahead while every
+    core validates.
+
+    Example:
+        >>> pipeline = ingest('output/csv', sink=store)
+        >>> pipeline.run()
+        >>> {name: m.throughput for name, m in pipeline.metrics.items()}
+
+    Args:
+        paths: An export directory, or the CSV files to read
+        sink: Called with each ``RecordBatch``; the pipeline then yields its
+            return values instead of the batches
+        batch_size: Rows per chunk
+        readers: Reader threads. Defaults to up to 4, one per file.
+        validators: Validation workers. Defaults to the CPU count.
+        executor: ``'process'`` or ``'thread'`` for the validation workers
+        ordered: Yield chunks in file and row order
+        queue_size: Chunks held between consecutive stages
+
+    Returns:
+        Pipeline yielding ``RecordBatch`` objects (or ``sink`` results)
+
+    Raises:
+        KeyError: If a file is not a known Synthea table
+    """
+    if isinstance(paths, (str, Path)) and Path(paths).is_dir():
+        paths = sorted(
+            path for path in Path(paths).iterdir()
+            if path.is_file() and table_name(path) in TABLES
+        )
+    elif isinstance(paths, (str, Path)):
+        paths = [paths]
+    paths = [str(path) for path in paths]
+    for path in paths:
+        model_for(path)
+    stages = [
+        Stage('read', _read_batches, workers=readers or max(1, min(4, len(paths))), expand=True),
+        Stage('validate', _validate_batch, workers=validators or os.cpu_count() or 1, executor=executor),
+    ]
+    if sink is not None:
+        stages.append(Stage('sink', sink))
+    return Pipeline(
+        ((path, batch_size) for path in paths), stages, ordered=ordered, queue_size=queue_size,
+    )
@@ -0,0 +1,296 @@
+"""Single-pass column statistics of Synthea exports with mergeable sketches."""
+
+import csv
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from hashlib import blake2b
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from ._fields import specs_by_key
+from ._io import open_csv
+from ._jsonl import DEFAULT_CHUNK_SIZE
+from .tables import TABLES, table_name
+from .versions import detect_schema
+from .warmup import worker_context
+
+DEFAULT_PRECISION = 12
+"""HyperLogLog precision: 4096 one-byte registers, about 1.6% standard error."""
+
+_CONVERTERS: dict[str, Callable[[str], Any]] = {
+    'date': date.fromisoformat,
+    'datetime': datetime.fromisoformat,
+    'decimal': Decimal,
+    'int': int,
+    'float': float,
+}
+"""Field kinds tracked by minimum and maximum, with their text parsers."""
+
+_DISTINCT_KINDS = frozenset({'uuid', 'str', 'other', 'union'})
+"""Field kinds whose distinct values are counted with a HyperLogLog."""
+
+
+class HyperLogLog:
+    """Approximate distinct counter in constant memory.
+
+    Values are hashed with 64-bit BLAKE2b, which unlike ``hash()`` is the
+    same in every process, so sketches built on separate shards or workers
+    can be merged into the sketch of their union.
+
+    Args:
+        precision: Index bits; the sketch keeps ``2 ** precision`` registers
+
+    Raises:
+        ValueError: If precision is outside 4-18
+    """
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def update(self, values: Iterable[str]) -> None:
+        """Add text values."""
+        precision = self.precision
+        mask = (1 << precision) - 1
+        width = 64 - precision
+        registers = self.registers
+        for value in values:
+            hashed = int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), 'little')
+            index = hashed & mask
+            rank = width - (hashed >> precision).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Fold another sketch into this one in place.
+
+        Raises:
+            ValueError: If the precisions differ
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge precision {other.precision} into {self.precision}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction: linear counting of empty registers
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+@dataclass
+class ColumnStats:
+    """Statistics of one CSV column; empty cells count as nulls.
+
+    Dates, datetimes and numbers track their range, Literal columns a
+    histogram of values, and ids, codes and other text an approximate
+    distinct count.
+    """
+
+    column: str
+    kind: str
+    rows: int = 0
+    nulls: int = 0
+    minimum: Any = None
+    maximum: Any = None
+    histogram: Optional[Counter] = None
+    distinct: Optional[HyperLogLog] = None
+
+    @property
+    def null_rate(self) -> float:
+        """Share of empty cells, 0.0 for an empty table."""
+        return self.nulls / self.rows if self.rows else 0.0
+
+    @property
+    def distinct_count(self) -> Optional[int]:
+        """Approximate number of distinct values, None if not tracked."""
+        return self.distinct.count() if self.distinct is not None else None
+
+    def update(self, values: Sequence[str]) -> None:
+        """Add a batch of raw cell values."""
+        self.rows += len(values)
+        nulls = values.count('')
+        self.nulls += nulls
+        if nulls == len(values):
+            return
+        present = [value for value in values if value] if nulls else values
+        if self.histogram is not None:
+            self.histogram.update(present)
+        if self.distinct is not None:
+            # Repeated codes and foreign keys are hashed once per batch
+            self.distinct.update(set(present))
+        converter = _CONVERTERS.get(self.kind)
+        if converter is not None:
+            parsed = list(map(converter, present))
+            self._extend(min(parsed), max(parsed))
+
+    def _extend(self, low: Any, high: Any) -> None:
+        if low is not None and (self.minimum is None or low < self.minimum):
+            self.minimum = low
+        if high is not None and (self.maximum is None or high > self.maximum):
+            self.maximum = high
+
+    def merge(self, other: 'ColumnStats') -> 'ColumnStats':
+        """Add the statistics of the same column from another shard in place."""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self._extend(other.minimum, other.maximum)
+        if self.histogram is not None and other.histogram is not None:
+            self.histogram.update(other.histogram)
+        if self.distinct is not None and other.distinct is not None:
+            self.distinct.merge(other.distinct)
+        return self
+
+
+@dataclass
+class TableProfile:
+    """Row count and per-column statistics of one table."""
+
+    table: str
+    rows: int = 0
+    columns: dict[str, ColumnStats] = field(default_factory=dict)
+
+    def __getitem__(self, column: str) -> ColumnStats:
+        return self.columns[column]
+
+    def merge(self, other: 'TableProfile') -> 'TableProfile':
+        """Add the profile of another shard of the same table in place.
+
+        Raises:
+            ValueError: If the profiles are of different tables
+        """
+        if other.table != self.table:
+            raise ValueError(f"Cannot merge a profile of {other.table} into {self.table}")
+        self.rows += other.rows
+        for column, stats in other.columns.items():
+            mine = self.columns.get(column)
+            if mine is None:
+                self.columns[column] = deepcopy(stats)
+            else:
+                mine.merge(stats)
+        return self
+
+
+def _column_stats(column: str, kind: str, precision: int) -> ColumnStats:
+    return ColumnStats(
+        column,
+        kind,
+        histogram=Counter() if kind in ('literal', 'bool') else None,
+        distinct=HyperLogLog(precision) if kind in _DISTINCT_KINDS else None,
+    )
+
+
+def profile_table(
+    path: str | Path,
+    *,
+    precision: int = DEFAULT_PRECISION,
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+) -> TableProfile:
+    """Profile one export CSV file in a single streaming pass.
+
+    Rows are read as raw text without validation, ``batch_size`` at a time,
+    and each batch is transposed into columns; memory depends on the batch
+    size and sketch precision, not on the number of rows. Statistics are
+    chosen from the model's field types; columns the model does not know
+    are profiled as text.
+
+    Args:
+        path: CSV file, optionally compressed; its name gives the table
+        precision: HyperLogLog precision of the distinct counts
+        batch_size: Rows per batch
+
+    Returns:
+        Profile keyed by the model's column names
+
+    Raises:
+        KeyError: If the file is not a known Synthea table
+        ValueError: If a date or number cell cannot be parsed
+    """
+    table = table_name(path)
+    model = TABLES[table]
+    profile = TableProfile(table)
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return profile
+        specs = specs_by_key(model)
+        match = detect_schema(model, header)
+        columns = []
+        for column in match.columns:
+            spec = specs.get(column)
+            stats = _column_stats(column, spec.kind if spec is not None else 'str', precision)
+            profile.columns[column] = stats
+            columns.append((stats, match.converters.get(column)))
+        width = len(header)
+        while batch := [row for row in islice(reader, batch_size) if row]:
+            profile.rows += len(batch)
+            # Short rows are padded so every column sees every row
+            if any(len(row) != width for row in batch):
+                batch = [(row + [''] * width)[:width] for row in batch]
+            for (stats, converter), values in zip(columns, zip(*batch)):
+                if converter is not None:
+                    # Layout converters first, e.g. START_DATE timestamps into START_YEAR years
+                    values = [str(converter(value)) if value else '' for value in values]
+                stats.update(values)
+    return profile
+
+
+def _profile_file(path: Path, precision: int) -> TableProfile:
+    return profile_table(path, precision=precision)
+
+
+def profile_export(
+    export_dir: str | Path,
+    *,
+    precision: int = DEFAULT_PRECISION,
+    workers: Optional[int] = None,
+) -> dict[str, TableProfile]:
+    """Profile every table of an export, tables in parallel.
+
+    Profiles of shards merge with ``TableProfile.merge``, e.g. to profile
+    the partitions written by ``partition_export`` separately and combine
+    them:
+
+    Example:
+        >>> profiles = [profile_export(part) for part in sorted(Path('partitioned').iterdir())]
+        >>> encounters = profiles[0]['encounters']
+        >>> for other in profiles[1:]:
+        ...     encounters.merge(other['encounters'])
+        >>> encounters['PATIENT'].distinct_count, encounters['STOP'].null_rate
+        (1187, 0.002)
+
+    Args:
+        export_dir: Export directory with the table CSV files
+        precision: HyperLogLog precision of the distinct counts
+        workers: Worker processes. None uses one per table up to the CPU
+            count; 1 profiles in this process.
+
+    Returns:
+        Profile per table name
+    """
+    paths = sorted(path for path in Path(export_dir).iterdir() if path.is_file() and table_name(path) in TABLES)
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+    if workers <= 1:
+        return {table_name(path): profile_table(path, precision=precision) for path in paths}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+        futures = [(table_name(path), pool.submit(_profile_file, path, precision)) for path in paths]
+        return {table: future.result() for table, future in futures}
@@ -0,0 +1,731 @@
+"""Columnar query layer over loaded Synthea tables.
+
+Tables are stored as one list per field. Queries are built from column
+expressions and run column-at-a-time: comparisons, projections and joins are
+driven by ``map``/``itertools.compress`` over whole columns instead of a
+Python loop over records, and a small planner applies each predicate as
+early as possible.
+
+Example:
+    >>> export = Export.load('output/csv', tables=['observations', 'encounters'])
+    >>> (export.query('observations')
+    ...     .filter(col('code') == '4548-4')
+    ...     .join('encounters')
+    ...     .group_by('encounters.encounterclass', year=col('date').year)
+    ...     .agg(mean_a1c=('value', 'mean'))
+    ...     .collect())
+"""
+
+import operator
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import date, datetime, time, timezone
+from itertools import accumulate, compress, islice, repeat
+from operator import attrgetter
+from pathlib import Path
+from statistics import fmean
+from typing import Any, Callable, Iterable, Optional, Union
+from uuid import UUID
+
+from ._fields import FieldSpec, field_specs, specs_by_key
+from .base import SyntheaBaseModel
+from .tables import TABLES, table_name
+
+_CHUNK_SIZE = 100_000
+_UUID_INT = attrgetter('int')
+
+AGGREGATES: dict[str, Callable[[list], Any]] = {
+    'count': len,
+    'sum': sum,
+    'mean': fmean,
+    'min': min,
+    'max': max,
+    'count_distinct': lambda values: len(set(values)),
+}
+"""Aggregate functions by name; None values are dropped before aggregating."""
+
+_COUNTS = frozenset({'count', 'count_distinct'})
+"""Aggregates that are 0 rather than None over no values."""
+
+Rows = dict[str, list[int]]
+"""Aligned row ids per table alias; position ``p`` is one output row."""
+
+
+class Table:
+    """Columnar storage for the records of one Synthea table.
+
+    Args:
+        model: Model class of the records
+        columns: One list of values per field name, all the same length
+    """
+
+    def __init__(self, model: type[SyntheaBaseModel], columns: dict[str, list]):
+        self.model = model
+        self.columns = columns
+        self.indexes: dict[str, dict[Any, list[int]]] = {}
+        self._specs = specs_by_key(model)
+
+    @classmethod
+    def from_records(cls, model: type[SyntheaBaseModel], records: Iterable[SyntheaBaseModel]) -> 'Table':
+        """Build a table from model instances, converting them chunk by chunk."""
+        names = [spec.name for spec in field_specs(model)]
+        columns: dict[str, list] = {name: [] for name in names}
+        getters = [(columns[name], attrgetter(name)) for name in names]
+        records = iter(records)
+        while chunk := list(islice(records, _CHUNK_SIZE)):
+            for column, get in getters:
+                column.extend(map(get, chunk))
+        return cls(model, columns)
+
+    @classmethod
+    def from_csv(cls, model: type[SyntheaBaseModel], path: str | Path) -> 'Table':
+        """Load a CSV file into a table."""
+        return cls.from_records(model, model.iter_csv(path))
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def column_name(self, key: str) -> Optional[str]:
+        """Resolve a field name or CSV column name to the stored field name."""
+        spec = self._specs.get(key)
+        return spec.name if spec is not None else None
+
+    def spec(self, column: str) -> FieldSpec:
+        """FieldSpec of a stored column."""
+        return self._specs[column]
+
+    def create_index(self, column: str) -> dict[Any, list[int]]:
+        """Build (or return) a hash index from column value to ascending row ids."""
+        column = self.column_name(column) or column
+        index = self.indexes.get(column)
+        if index is None:
+            index = {}
+            for i, value in enumerate(self.columns[column]):
+                rows = index.get(value)
+                if rows is None:
+                    index[value] = [i]
+                else:
+                    rows.append(i)
+            self.indexes[column] = index
+        return index
+
+
+class Export:
+    """The loaded tables of one Synthea export, keyed by table name."""
+
+    def __init__(self, tables: dict[str, Table]):
+        self.tables = tables
+
+    @classmethod
+    def load(
+        cls,
+        directory: str | Path,
+        tables: Optional[Iterable[str]] = None,
+        indexes: Iterable[str] = (),
+    ) -> 'Export':
+        """Load the CSV files of an export directory.
+
+        Args:
+            directory: Directory containing the export's CSV files
+            tables: Table names to load. Defaults to every table present.
+            indexes: Columns to index in every table that has them, e.g.
+                ``('patient', 'encounter')``
+
+        Returns:
+            The loaded export
+        """
+        wanted = set(tables) if tables is not None else set(TABLES)
+        loaded = {}
+        for path in sorted(Path(directory).iterdir()):
+            name = table_name(path)
+            if path.is_file() and name in wanted and name not in loaded:
+                loaded[name] = Table.from_csv(TABLES[name], path)
+        indexes = tuple(indexes)
+        for table in loaded.values():
+            for column in indexes:
+                if table.column_name(column) is not None:
+                    table.create_index(column)
+        return cls(loaded)
+
+    def __getitem__(self, name: str) -> Table:
+        return self.tables[name]
+
+    def query(self, table: str) -> 'Query':
+        """Start a query on a table."""
+        return Query(self, table)
+
+
+class Expr(ABC):
+    """A column expression evaluated over aligned rows."""
+
+    @abstractmethod
+    def tables(self, query: 'Query') -> frozenset[str]:
+        """Aliases of the tables the expression reads."""
+
+    @abstractmethod
+    def evaluate(self, query: 'Query', rows: Rows) -> list:
+        """Return the expression's value for every aligned row."""
+
+    def map(self, fn: Callable[[Any], Any]) -> 'Expr':
+        """Apply a function to every non-null value."""
+        return Func(fn, self)
+
+    @property
+    def year(self) -> 'Expr':
+        return Func(attrgetter('year'), self, 'year')
+
+    @property
+    def month(self) -> 'Expr':
+        return Func(attrgetter('month'), self, 'month')
+
+    def __eq__(self, other) -> 'Predicate':  # type: ignore[override]
+        return Compare(self, operator.eq, other)
+
+    def __ne__(self, other) -> 'Predicate':  # type: ignore[override]
+        return Compare(self, operator.ne, other)
+
+    def __lt__(self, other) -> 'Predicate':
+        return Compare(self, operator.lt, other)
+
+    def __le__(self, other) -> 'Predicate':
+        return Compare(self, operator.le, other)
+
+    def __gt__(self, other) -> 'Predicate':
+        return Compare(self, operator.gt, other)
+
+    def __ge__(self, other) -> 'Predicate':
+        return Compare(self, operator.ge, other)
+
+    def isin(self, values: Iterable) -> 'Predicate':
+        return IsIn(self, values)
+
+    def between(self, low, high) -> 'Predicate':
+        """Inclusive range predicate."""
+        return (self >= low) & (self <= high)
+
+    def is_null(self) -> 'Predicate':
+        return IsNull(self)
+
+    __hash__ = object.__hash__
+
+
+class Column(Expr):
+    """Reference to a stored column, optionally qualified as ``table.column``."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def resolve(self, query: 'Query') -> tuple[str, str]:
+        """Return the ``(alias, field name)`` the reference points to."""
+        return query.resolve(self.name)
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return frozenset({self.resolve(query)[0]})
+
+    def evaluate(self, query: 'Query', rows: Rows) -> list:
+        alias, column = self.resolve(query)
+        return list(map(query.table(alias).columns[column].__getitem__, rows[alias]))
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class Func(Expr):
+    """Function applied to the non-null values of another expression."""
+
+    def __init__(self, fn: Callable[[Any], Any], expr: Expr, name: Optional[str] = None):
+        self.fn = fn
+        self.expr = expr
+        self.name = name or getattr(fn, '__name__', 'map')
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.expr.tables(query)
+
+    def evaluate(self, query: 'Query', rows: Rows) -> list:
+        values = self.expr.evaluate(query, rows)
+        if None not in values:
+            return list(map(self.fn, values))
+        fn = self.fn
+        return [None if value is None else fn(value) for value in values]
+
+    def __repr__(self) -> str:
+        return f"{self.name}({self.expr!r})"
+
+
+def col(name: str) -> Column:
+    """Reference a column by field name, CSV column name or ``table.column``."""
+    return Column(name)
+
+
+def _as_expr(value: Union[str, Expr]) -> Expr:
+    return Column(value) if isinstance(value, str) else value
+
+
+class Predicate(ABC):
+    """Boolean row filter built from expressions."""
+
+    @abstractmethod
+    def tables(self, query: 'Query') -> frozenset[str]:
+        """Aliases of the tables the predicate reads."""
+
+    @abstractmethod
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        """Return one boolean per aligned row."""
+
+    def conjuncts(self) -> list['Predicate']:
+        return [self]
+
+    def __and__(self, other: 'Predicate') -> 'Predicate':
+        return And(self, other)
+
+    def __or__(self, other: 'Predicate') -> 'Predicate':
+        return Or(self, other)
+
+    def __invert__(self) -> 'Predicate':
+        return Not(self)
+
+
+def _coerce(spec: Optional[FieldSpec], value: Any) -> Any:
+    """Convert a query constant to the Python type stored in a column."""
+    if spec is None or value is None:
+        return value
+    if spec.kind == 'uuid' and isinstance(value, str):
+        return UUID(value)
+    if spec.kind == 'datetime':
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, datetime) and isinstance(value, date):
+            value = datetime.combine(value, time())
+        # Synthea timestamps are UTC; compare naive bounds as UTC
+        return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+    if spec.kind == 'date' and isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _column_spec(query: 'Query', expr: Expr) -> Optional[FieldSpec]:
+    if isinstance(expr, Column):
+        alias, column = expr.resolve(query)
+        return query.table(alias).spec(column)
+    return None
+
+
+class Compare(Predicate):
+    """Comparison of an expression with a constant; nulls never match."""
+
+    _SYMBOLS = {operator.eq: '==', operator.ne: '!=', operator.lt: '<',
+                operator.le: '<=', operator.gt: '>', operator.ge: '>='}
+
+    def __init__(self, expr: Expr, op: Callable[[Any, Any], bool], value: Any):
+        self.expr = expr
+        self.op = op
+        self.value = value
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.expr.tables(query)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        value = _coerce(_column_spec(query, self.expr), self.value)
+        values = self.expr.evaluate(query, rows)
+        if None in values:
+            op = self.op
+            return [v is not None and op(v, value) for v in values]
+        return list(map(self.op, values, repeat(value)))
+
+    def __repr__(self) -> str:
+        return f"{self.expr!r} {self._SYMBOLS[self.op]} {self.value!r}"
+
+
+class IsIn(Predicate):
+    """Membership of an expression's value in a set of constants; nulls never match."""
+
+    def __init__(self, expr: Expr, values: Iterable):
+        self.expr = expr
+        self.values = tuple(values)
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.expr.tables(query)
+
+    def constants(self, query: 'Query') -> frozenset:
+        spec = _column_spec(query, self.expr)
+        return frozenset(_coerce(spec, value) for value in self.values if value is not None)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        return list(map(self.constants(query).__contains__, self.expr.evaluate(query, rows)))
+
+    def __repr__(self) -> str:
+        return f"{self.expr!r} IN {self.values!r}"
+
+
+class IsNull(Predicate):
+    def __init__(self, expr: Expr):
+        self.expr = expr
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.expr.tables(query)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        return list(map(operator.is_, self.expr.evaluate(query, rows), repeat(None)))
+
+    def __repr__(self) -> str:
+        return f"{self.expr!r} IS NULL"
+
+
+class And(Predicate):
+    def __init__(self, left: Predicate, right: Predicate):
+        self.left = left
+        self.right = right
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.left.tables(query) | self.right.tables(query)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        return list(map(operator.and_, self.left.mask(query, rows), self.right.mask(query, rows)))
+
+    def conjuncts(self) -> list[Predicate]:
+        return self.left.conjuncts() + self.right.conjuncts()
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} AND {self.right!r})"
+
+
+class Or(Predicate):
+    def __init__(self, left: Predicate, right: Predicate):
+        self.left = left
+        self.right = right
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.left.tables(query) | self.right.tables(query)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        return list(map(operator.or_, self.left.mask(query, rows), self.right.mask(query, rows)))
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} OR {self.right!r})"
+
+
+class Not(Predicate):
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+
+    def tables(self, query: 'Query') -> frozenset[str]:
+        return self.predicate.tables(query)
+
+    def mask(self, query: 'Query', rows: Rows) -> list[bool]:
+        return list(map(operator.not_, self.predicate.mask(query, rows)))
+
+    def __repr__(self) -> str:
+        return f"NOT {self.predicate!r}"
+
+
+def _apply(rows: Rows, mask: list[bool]) -> Rows:
+    return {alias: list(compress(ids, mask)) for alias, ids in rows.items()}
+
+
+def _expand(rows: Rows, alias: str, keys: list, buckets: dict[Any, list[int]]) -> Rows:
+    """Join aligned rows to every matching right row id of their key; null keys match nothing."""
+    positions, right = [], []
+    for position, key in enumerate(keys):
+        # Table indexes have a bucket for None
+        matches = buckets.get(key) if key is not None else None
+        if matches:
+            positions.extend(repeat(position, len(matches)))
+            right.extend(matches)
+    joined = {a: list(map(ids.__getitem__, positions)) for a, ids in rows.items()}
+    joined[alias] = right
+    return joined
+
+
+def _foreign_key(left: Table, right_name: str) -> Optional[str]:
+    """Column of ``left`` referencing table ``right_name`` by Synthea naming."""
+    singular = right_name[:-1]
+    for candidate in (singular, singular + 'id'):
+        if candidate in left.columns:
+            return candidate
+    return None
+
+
+class Query:
+    """Immutable-style query builder over an ``Export``.
+
+    Each builder method returns a new query. Nothing runs until ``collect``,
+    ``count`` or ``explain``.
+    """
+
+    def __init__(self, export: Export, table: str):
+        self.export = export
+        self.base = table
+        self.joins: list[tuple[str, str, str]] = []
+        self.predicates: list[Predicate] = []
+        self.projection: Optional[list[tuple[str, Expr]]] = None
+        self.keys: Optional[list[tuple[str, Expr]]] = None
+        self.aggregates: list[tuple[str, Expr, str]] = []
+
+    def _copy(self) -> 'Query':
+        query = Query(self.export, self.base)
+        query.joins = list(self.joins)
+        query.predicates = list(self.predicates)
+        query.projection = self.projection
+        query.keys = self.keys
+        query.aggregates = list(self.aggregates)
+        return query
+
+    # -- name resolution ---------------------------------------------------
+
+    def aliases(self) -> list[str]:
+        return [self.base] + [alias for alias, _, _ in self.joins]
+
+    def table(self, alias: str) -> Table:
+        return self.export.tables[alias]
+
+    def resolve(self, name: str) -> tuple[str, str]:
+        """Resolve a column reference to ``(alias, field name)``.
+
+        Raises:
+            KeyError: If the column does not exist or is ambiguous
+        """
+        if '.' in name:
+            alias, column = name.split('.', 1)
+            if alias not in self.aliases():
+                raise KeyError(f"Table {alias!r} is not part of the query")
+            resolved = self.table(alias).column_name(column)
+            if resolved is None:
+                raise KeyError(f"Table {alias!r} has no column {column!r}")
+            return alias, resolved
+        resolved = self.table(self.base).column_name(name)
+        if resolved is not None:
+            return self.base, resolved
+        matches = [
+            (alias, self.table(alias).column_name(name))
+            for alias in self.aliases()[1:]
+            if self.table(alias).column_name(name) is not None
+        ]
+        if len(matches) != 1:
+            problem = 'ambiguous' if matches else 'unknown'
+            raise KeyError(f"Column {name!r} is {problem}")
+        return matches[0]
+
+    # -- builder -----------------------------------------------------------
+
+    def filter(self, *predicates: Predicate) -> 'Query':
+        """Keep rows matching all predicates."""
+        query = self._copy()
+        for predicate in predicates:
+            query.predicates.extend(predicate.conjuncts())
+        return query
+
+    def join(self, table: str, on: Optional[tuple[str, str]] = None) -> 'Query':
+        """Inner join another table.
+
+        Args:
+            table: Name of the table to join
+            on: ``(left column, right column)``. Defaults to the Synthea
+                foreign key, e.g. ``encounter``/``patientid`` to ``id``.
+
+        Raises:
+            ValueError: If no foreign key can be inferred
+        """
+        if on is None:
+            key = _foreign_key(self.table(self.base), table)
+            if key is None:
+                raise ValueError(f"No foreign key from {self.base!r} to {table!r}; pass on=")
+            on = (key, 'id')
+        query = self._copy()
+        query.joins.append((table, on[0], on[1]))
+        return query
+
+    def select(self, *columns: str, **expressions: Union[str, Expr]) -> 'Query':
+        """Choose the output columns."""
+        query = self._copy()
+        query.projection = [(name, Column(name)) for name in columns]
+        query.projection += [(name, _as_expr(expr)) for name, expr in expressions.items()]
+        return query
+
+    def group_by(self, *keys: str, **named: Union[str, Expr]) -> 'Query':
+        """Group rows by the given key columns or expressions."""
+        query = self._copy()
+        query.keys = [(name, Column(name)) for name in keys]
+        query.keys += [(name, _as_expr(expr)) for name, expr in named.items()]
+        return query
+
+    def agg(self, **aggregates: tuple[Union[str, Expr], str]) -> 'Query':
+        """Add aggregates as ``name=(column, function)``; see ``AGGREGATES``."""
+        query = self._copy()
+        for name, (expr, function) in aggregates.items():
+            if function not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate {function!r}")
+            query.aggregates.append((name, _as_expr(expr), function))
+        return query
+
+    # -- planning ----------------------------------------------------------
+
+    def _index_lookup(self, alias: str, predicates: list[Predicate]) -> Optional[tuple[Predicate, list[int]]]:
+        """Pick the most selective indexed equality predicate of a table."""
+        best = None
+        table = self.table(alias)
+        for predicate in predicates:
+            expr = getattr(predicate, 'expr', None)
+            if not isinstance(expr, Column) or not isinstance(predicate, (Compare, IsIn)):
+                continue
+            if isinstance(predicate, Compare) and predicate.op is not operator.eq:
+                continue
+            _, column = expr.resolve(self)
+            index = table.indexes.get(column)
+            if index is None:
+                continue
+            if isinstance(predicate, Compare):
+                value = _coerce(table.spec(column), predicate.value)
+                # Like Compare.mask: a null never equals anything
+                ids = index.get(value, []) if value is not None else []
+            else:
+                ids = sorted(i for value in predicate.constants(self) for i in index.get(value, ()))
+            if best is None or len(ids) < len(best[1]):
+                best = (predicate, ids)
+        return best
+
+    def _plan(self) -> tuple[dict[str, list[Predicate]], list[Predicate]]:
+        """Split predicates into per-table scan filters and post-join filters."""
+        pushed: dict[str, list[Predicate]] = {alias: [] for alias in self.aliases()}
+        residual = []
+        for predicate in self.predicates:
+            tables = predicate.tables(self)
+            if len(tables) == 1:
+                pushed[next(iter(tables))].append(predicate)
+            else:
+                residual.append(predicate)
+        return pushed, residual
+
+    def _scan(self, alias: str, predicates: list[Predicate], steps: Optional[list[str]] = None) -> list[int]:
+        lookup = self._index_lookup(alias, predicates)
+        if lookup is not None:
+            chosen, ids = lookup
+            predicates = [p for p in predicates if p is not chosen]
+            if steps is not None:
+                steps.append(f"index lookup {alias}: {chosen!r}")
+        else:
+            ids = list(range(len(self.table(alias))))
+            if steps is not None:
+                steps.append(f"scan {alias}")
+        rows = {alias: ids}
+        for predicate in predicates:
+            if steps is not None:
+                steps.append(f"  filter {predicate!r}")
+            if not rows[alias]:
+                break
+            rows = _apply(rows, predicate.mask(self, rows))
+        return rows[alias]
+
+    def _rows(self, steps: Optional[list[str]] = None) -> Rows:
+        pushed, residual = self._plan()
+        rows: Rows = {self.base: self._scan(self.base, pushed[self.base], steps)}
+        for alias, left, right in self.joins:
+            left_alias, left_column = self.resolve(left)
+            right_column = self.table(alias).column_name(right) or right
+            right_ids = None
+            if pushed[alias]:
+                right_ids = self._scan(alias, pushed[alias], steps)
+            rows = self._hash_join(rows, left_alias, left_column, alias, right_column, right_ids)
+            if steps is not None:
+                method = 'index join' if right_ids is None and right_column in self.table(alias).indexes else 'hash join'
+                steps.append(f"{method} {alias} ON {left_alias}.{left_column} = {alias}.{right_column}")
+        for predicate in residual:
+            if steps is not None:
+                steps.append(f"filter {predicate!r}")
+            rows = _apply(rows, predicate.mask(self, rows))
+        return rows
+
+    def _join_keys(self, alias: str, column: str, ids: Iterable[int]) -> list:
+        values = list(map(self.table(alias).columns[column].__getitem__, ids))
+        if self.table(alias).spec(column).kind == 'uuid':
+            # UUID.__hash__ runs in Python; hash the underlying int instead
+            if None in values:
+                return [None if value is None else value.int for value in values]
+            return list(map(_UUID_INT, values))
+        return values
+
+    def _hash_join(
+        self, rows: Rows, left_alias: str, left_column: str,
+        alias: str, right_column: str, right_ids: Optional[list[int]],
+    ) -> Rows:
+        index = self.table(alias).indexes.get(right_column)
+        if right_ids is None and index is not None:
+            keys = list(map(self.table(left_alias).columns[left_column].__getitem__, rows[left_alias]))
+            return _expand(rows, alias, keys, index)
+        if right_ids is None:
+            right_ids = list(range(len(self.table(alias))))
+        right_keys = self._join_keys(alias, right_column, right_ids)
+        keys = self._join_keys(left_alias, left_column, rows[left_alias])
+        unique = dict(zip(right_keys, right_ids))
+        unique.pop(None, None)
+        if len(unique) == len(right_keys) - right_keys.count(None):
+            # Many-to-one join on a unique key: one dict probe per row
+            matched = list(map(unique.get, keys))
+            mask = list(map(operator.is_not, matched, repeat(None)))
+            joined = _apply(rows, mask)
+            joined[alias] = list(compress(matched, mask))
+            return joined
+        buckets: dict[Any, list[int]] = {}
+        for key, i in zip(right_keys, right_ids):
+            if key is not None:
+                buckets.setdefault(key, []).append(i)
+        return _expand(rows, alias, keys, buckets)
+
+    # -- execution ---------------------------------------------------------
+
+    def explain(self) -> list[str]:
+        """Run the row selection and return the plan steps it took, in order."""
+        steps: list[str] = []
+        self._rows(steps)
+        if self.keys is not None:
+            steps.append(f"group by {', '.join(name for name, _ in self.keys)}")
+        return steps
+
+    def count(self) -> int:
+        """Number of rows matching the filters and joins."""
+        return len(self._rows()[self.base])
+
+    def collect(self) -> dict[str, list]:
+        """Run the query and return the result as one list per output column."""
+        rows = self._rows()
+        if self.keys is not None or self.aggregates:
+            return self._grouped(rows)
+        projection = self.projection
+        if projection is None:
+            projection = [(name, Column(f"{self.base}.{name}")) for name in self.table(self.base).columns]
+        return {name: expr.evaluate(self, rows) for name, expr in projection}
+
+    def _grouped(self, rows: Rows) -> dict[str, list]:
+        keys = self.keys or []
+        key_values = [expr.evaluate(self, rows) for _, expr in keys]
+        size = len(rows[self.base])
+        group_keys = list(zip(*key_values)) if key_values else [()] * size
+
+        # Number the distinct keys, then stable-sort positions by group number
+        # so every group is one contiguous run
+        distinct = list(dict.fromkeys(group_keys))
+        if not keys and not distinct:
+            # Like SQL, a global aggregate over no rows is one row
+            distinct = [()]
+        try:
+            distinct.sort()
+        except TypeError:
+            pass
+        numbers = {key: number for number, key in enumerate(distinct)}
+        group_of = list(map(numbers.__getitem__, group_keys))
+        order = sorted(range(size), key=group_of.__getitem__)
+        counts = Counter(group_of)
+        bounds = list(accumulate((counts[number] for number in range(len(distinct))), initial=0))
+
+        result: dict[str, list] = {}
+        for i, (name, _) in enumerate(keys):
+            result[name] = [key[i] for key in distinct]
+        for name, expr, function in self.aggregates:
+            values = list(map(expr.evaluate(self, rows).__getitem__, order))
+            aggregate = AGGREGATES[function]
+            output = result[name] = []
+            for start, stop in zip(bounds, bounds[1:]):
+                selected = values[start:stop]
+                if None in selected:
+                    selected = [value for value in selected if value is not None]
+                output.append(aggregate(selected) if selected or function in _COUNTS else None)
+        return result
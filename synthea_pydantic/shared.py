@@ -0,0 +1,393 @@
+"""Columnar tables in shared memory, loaded by worker processes.
+
+Returning validated records from worker processes means pickling every
+instance and unpickling it again in the parent. ``load_shared`` instead has
+each worker encode its table into one ``multiprocessing.shared_memory``
+segment and send back only the segment's name and layout. The parent (and
+any sibling process given the same ``SharedTableInfo``) maps the segment and
+reads columns without copying; models are built only for the rows accessed.
+"""
+
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+from uuid import UUID
+
+from ._fields import field_specs
+from ._trusted import trusted_plan
+from .base import SyntheaBaseModel
+from .tables import TABLES, model_for, table_name
+from .warmup import worker_context
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_UUID = bytes(16)
+_CHUNK_SIZE = 100_000
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+_TYPECODES = {'datetime': 'q', 'date': 'q', 'decimal': 'q', 'int': 'q', 'float': 'd', 'bool': 'b'}
+"""Array typecode of each fixed-width column kind; uuid columns are 16 raw bytes per row."""
+
+
+class ColumnLayout(NamedTuple):
+    """Where one column lives in a shared segment."""
+
+    kind: str
+    """``FieldSpec.kind``, ``'dictionary'`` for dictionary-coded columns or ``'decimal_text'`` for text decimals."""
+    offset: int
+    """Start of the values (or dictionary codes)."""
+    validity: int
+    """Start of the one-byte-per-row validity mask, or -1 if the field is never None."""
+    scale: int = 0
+    """Decimal places of a fixed-point decimal column."""
+    vocabulary: int = 0
+    """Start of a dictionary column's JSON-encoded value list."""
+    vocabulary_size: int = 0
+    """Length in bytes of that list."""
+
+
+@dataclass(frozen=True)
+class SharedTableInfo:
+    """Picklable handle to a table in shared memory; see ``SharedTable.attach``."""
+
+    model: type[SyntheaBaseModel]
+    name: str
+    """Shared memory segment name."""
+    length: int
+    """Number of rows."""
+    columns: dict[str, ColumnLayout]
+    """Layout per field name."""
+
+
+def _uuid_bytes(value: Optional[UUID]) -> bytes:
+    return value.bytes if value is not None else _NO_UUID
+
+
+def _microseconds(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _scale(values: list[Optional[Decimal]]) -> int:
+    exponents = [value.as_tuple().exponent for value in values if value is not None and value.is_finite()]
+    return max(0, -min(exponents, default=0))
+
+
+def _encode(kind: str, values: list) -> tuple[str, bytes, int, bytes]:
+    """Encode one column.
+
+    Returns:
+        The stored kind, the value bytes, the decimal scale and the
+        dictionary bytes (empty unless the column is dictionary-coded)
+    """
+    if kind == 'uuid':
+        return kind, b''.join(map(_uuid_bytes, values)), 0, b''
+    if kind == 'datetime':
+        return kind, array('q', map(_microseconds, values)).tobytes(), 0, b''
+    if kind == 'date':
+        return kind, array('q', [value.toordinal() if value is not None else 0 for value in values]).tobytes(), 0, b''
+    if kind == 'decimal':
+        if all(value is None or value.is_finite() for value in values):
+            scale = _scale(values)
+            fixed = [int(value.scaleb(scale)) if value is not None else 0 for value in values]
+            if _INT64_MIN <= min(fixed, default=0) and max(fixed, default=0) <= _INT64_MAX:
+                return kind, array('q', fixed).tobytes(), scale, b''
+        # NaN, infinities or more digits than 64-bit fixed point holds: keep
+        # the exact text in a dictionary column instead
+        codes = {}
+        encoded = array('i', [codes.setdefault(value, len(codes)) for value in values])
+        vocabulary = [None if value is None else str(value) for value in codes]
+        return 'decimal_text', encoded.tobytes(), 0, json.dumps(vocabulary).encode()
+    if kind in _TYPECODES:
+        return kind, array(_TYPECODES[kind], [value or 0 for value in values]).tobytes(), 0, b''
+    # Strings, Literals and unions: codes into a JSON list, which keeps the
+    # float/str distinction of union values
+    codes: dict[Any, int] = {}
+    encoded = array('i', [codes.setdefault(value, len(codes)) for value in values])
+    return 'dictionary', encoded.tobytes(), 0, json.dumps(list(codes)).encode()
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def share_records(model: type[SyntheaBaseModel], records: Iterable[SyntheaBaseModel]) -> SharedTableInfo:
+    """Encode records column by column into a new shared memory segment.
+
+    The segment is left open for other processes: whoever ends up with the
+    returned info owns it and must eventually ``unlink`` it, see
+    ``SharedTable``.
+
+    Args:
+        model: Model class of the records
+        records: Records to encode
+
+    Returns:
+        Handle to the segment
+    """
+    specs = field_specs(model)
+    values: dict[str, list] = {spec.name: [] for spec in specs}
+    getters = [(values[spec.name], attrgetter(spec.name)) for spec in specs]
+    records = iter(records)
+    while chunk := list(islice(records, _CHUNK_SIZE)):
+        for column, get in getters:
+            column.extend(map(get, chunk))
+    length = len(values[specs[0].name]) if specs else 0
+
+    parts: list[tuple[str, bytes]] = []
+    encoded = {}
+    for spec in specs:
+        column = values.pop(spec.name)
+        kind, data, scale, vocabulary = _encode(spec.kind, column)
+        validity = bytes(value is not None for value in column) if spec.nullable else b''
+        encoded[spec.name] = (kind, data, validity, scale, vocabulary)
+
+    size = 0
+    layouts: dict[str, ColumnLayout] = {}
+    for name, (kind, data, validity, scale, vocabulary) in encoded.items():
+        offset = size
+        size = _align(size + len(data))
+        validity_at = size if validity else -1
+        size = _align(size + len(validity))
+        vocabulary_at = size
+        size = _align(size + len(vocabulary))
+        layouts[name] = ColumnLayout(kind, offset, validity_at, scale, vocabulary_at, len(vocabulary))
+        parts.extend([(offset, data), (validity_at, validity), (vocabulary_at, vocabulary)])
+
+    segment = SharedMemory(create=True, size=max(size, 1))
+    try:
+        for offset, data in parts:
+            if data:
+                segment.buf[offset:offset + len(data)] = data
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    # Hand the segment over: the resource tracker would otherwise unlink it
+    # when this (worker) process exits. The owning SharedTable registers it
+    # again when it attaches.
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    segment.close()
+    return SharedTableInfo(model, segment.name, length, layouts)
+
+
+def _attach(name: str, owner: bool) -> SharedMemory:
+    segment = SharedMemory(name=name)
+    if not owner:
+        # Attaching registers the segment with the resource tracker, which
+        # would unlink it when this process exits; only the owner may
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _decoder(layout: ColumnLayout, buffer: memoryview, length: int) -> Callable[[int], Any]:
+    """Function decoding the value of one row of a column."""
+    kind = layout.kind
+    offset = layout.offset
+    if kind == 'uuid':
+        def decode_uuid(row: int) -> UUID:
+            start = offset + 16 * row
+            return UUID(bytes=bytes(buffer[start:start + 16]))
+        return decode_uuid
+    if kind in ('dictionary', 'decimal_text'):
+        codes = buffer[offset:offset + 4 * length].cast('i')
+        vocabulary = json.loads(bytes(buffer[layout.vocabulary:layout.vocabulary + layout.vocabulary_size]))
+        if kind == 'decimal_text':
+            vocabulary = [None if value is None else Decimal(value) for value in vocabulary]
+        return lambda row: vocabulary[codes[row]]
+    typecode = _TYPECODES[kind]
+    values = buffer[offset:offset + array(typecode).itemsize * length].cast(typecode)
+    if kind == 'datetime':
+        return lambda row: _EPOCH + values[row] * _MICROSECOND
+    if kind == 'date':
+        return lambda row: date.fromordinal(values[row])
+    if kind == 'decimal':
+        scale = layout.scale
+        return lambda row: Decimal(values[row]).scaleb(-scale)
+    if kind == 'bool':
+        return lambda row: bool(values[row])
+    return values.__getitem__
+
+
+def _nullable(decode: Callable[[int], Any], validity: memoryview) -> Callable[[int], Any]:
+    return lambda row: decode(row) if validity[row] else None
+
+
+class SharedTable:
+    """Read-only view of a table in shared memory.
+
+    Columns are decoded on access and ``table[i]`` builds the model of one
+    row through the trusted construction path (the values were validated
+    before they were shared). Fixed-width columns are also exposed without
+    copying by ``raw``.
+
+    The view that ``load_shared`` returns owns its segment: use it as a
+    context manager, or call ``unlink`` when done. Views attached from an
+    info elsewhere only ``close``.
+
+    Args:
+        info: Handle returned by ``share_records``
+        owner: Whether ``__exit__`` unlinks the segment
+    """
+
+    def __init__(self, info: SharedTableInfo, *, owner: bool = False):
+        self.info = info
+        self.model = info.model
+        self.owner = owner
+        self._segment = _attach(info.name, owner)
+        self._decoders: dict[str, Callable[[int], Any]] = {}
+
+    @classmethod
+    def attach(cls, info: SharedTableInfo) -> 'SharedTable':
+        """Map a table shared by another process, without taking ownership."""
+        return cls(info)
+
+    def __len__(self) -> int:
+        return self.info.length
+
+    @property
+    def names(self) -> list[str]:
+        """Field names of the stored columns."""
+        return list(self.info.columns)
+
+    def _decoder(self, name: str) -> Callable[[int], Any]:
+        decode = self._decoders.get(name)
+        if decode is None:
+            layout = self.info.columns[name]
+            buffer, length = self._segment.buf, self.info.length
+            decode = _decoder(layout, buffer, length)
+            if layout.validity >= 0:
+                decode = _nullable(decode, buffer[layout.validity:layout.validity + length])
+            self._decoders[name] = decode
+        return decode
+
+    def value(self, row: int, name: str) -> Any:
+        """Value of one field of one row."""
+        if not 0 <= row < self.info.length:
+            raise IndexError(row)
+        return self._decoder(name)(row)
+
+    def column(self, name: str) -> list:
+        """Decoded values of one column."""
+        return list(map(self._decoder(name), range(self.info.length)))
+
+    def raw(self, name: str) -> memoryview:
+        """Zero-copy view of a column's stored values.
+
+        datetime columns hold microseconds since the epoch, date columns
+        ordinal days, decimal columns fixed-point integers (see
+        ``info.columns[name].scale``), uuid columns 16 bytes per row and
+        dictionary columns (and ``'decimal_text'`` columns, decimals that do
+        not fit 64-bit fixed point) codes into their vocabulary. Rows whose value is
+        None hold 0.
+        """
+        layout = self.info.columns[name]
+        width = 16 if layout.kind == 'uuid' else 4 if layout.kind in ('dictionary', 'decimal_text') else 0
+        if width:
+            view = self._segment.buf[layout.offset:layout.offset + width * self.info.length]
+            return view if layout.kind == 'uuid' else view.cast('i')
+        typecode = _TYPECODES[layout.kind]
+        return self._segment.buf[layout.offset:layout.offset + array(typecode).itemsize * self.info.length].cast(typecode)
+
+    def __getitem__(self, row: int) -> SyntheaBaseModel:
+        if row < 0:
+            row += self.info.length
+        names = tuple(self.info.columns)
+        values = [self.value(row, name) for name in names]
+        return trusted_plan(self.model, names).construct(values)
+
+    def __iter__(self) -> Iterator[SyntheaBaseModel]:
+        return map(self.__getitem__, range(self.info.length))
+
+    def close(self) -> None:
+        """Unmap the segment from this process."""
+        self._decoders.clear()
+        try:
+            self._segment.close()
+        except BufferError:
+            # Views returned by raw() are still alive; the mapping goes with them
+            pass
+
+    def unlink(self) -> None:
+        """Unmap and destroy the segment."""
+        self.close()
+        self._segment.unlink()
+
+    def __enter__(self) -> 'SharedTable':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+def _share_file(path: str) -> SharedTableInfo:
+    model = model_for(path)
+    return share_records(model, model.iter_csv(path))
+
+
+def load_shared(
+    paths: str | Path | Iterable[str | Path],
+    *,
+    workers: Optional[int] = None,
+) -> dict[str, SharedTable]:
+    """Validate CSV files in worker processes into shared memory tables.
+
+    Each file is validated by a worker that starts with warmed validators
+    (see ``worker_context``) and encoded into its own shared memory segment;
+    only the segment name and layout are pickled back.
+
+    Args:
+        paths: An export directory, or the CSV files to load
+        workers: Worker processes. Defaults to the CPU count; 1 loads in
+            this process.
+
+    Returns:
+        A ``SharedTable`` per table name, each owning its segment
+    """
+    if isinstance(paths, (str, Path)) and Path(paths).is_dir():
+        paths = sorted(
+            path for path in Path(paths).iterdir()
+            if path.is_file() and table_name(path) in TABLES
+        )
+    elif isinstance(paths, (str, Path)):
+        paths = [paths]
+    paths = [str(path) for path in paths]
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    tables: dict[str, SharedTable] = {}
+    try:
+        if workers == 1:
+            for path in paths:
+                tables[table_name(path)] = SharedTable(_share_file(path), owner=True)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+                futures = {path: pool.submit(_share_file, path) for path in paths}
+                failure = None
+                for path, future in futures.items():
+                    try:
+                        tables[table_name(path)] = SharedTable(future.result(), owner=True)
+                    except Exception as error:
+                        # Keep collecting so every segment that was created gets unlinked
+                        failure = failure or error
+                if failure is not None:
+                    raise failure
+    except BaseException:
+        for table in tables.values():
+            table.unlink()
+        raise
+    return tables
@@ -0,0 +1,352 @@
+"""Bulk loading of Synthea records into DB-API 2.0 databases."""
+
+import csv
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID
+
+from ._fields import FieldSpec, field_specs
+from .base import SyntheaBaseModel
+from .tables import TABLES, model_for, table_name
+
+DEFAULT_BATCH_SIZE = 10_000
+
+_COLUMN_TYPES: dict[str, dict[str, str]] = {
+    'postgresql': {
+        'uuid': 'UUID',
+        'datetime': 'TIMESTAMP WITH TIME ZONE',
+        'date': 'DATE',
+        'decimal': 'NUMERIC',
+        'bool': 'BOOLEAN',
+        'int': 'BIGINT',
+        'float': 'DOUBLE PRECISION',
+    },
+    'sqlite': {
+        # TEXT affinity keeps UUIDs and timestamps as written
+        'uuid': 'TEXT',
+        'datetime': 'TIMESTAMP',
+        'date': 'DATE',
+        # NUMERIC affinity would store Decimals as REAL and round them;
+        # SQLite's arithmetic still reads numeric text
+        'decimal': 'TEXT',
+        'bool': 'BOOLEAN',
+        'int': 'INTEGER',
+        'float': 'REAL',
+    },
+    'generic': {
+        'uuid': 'VARCHAR(36)',
+        'datetime': 'TIMESTAMP',
+        'date': 'DATE',
+        'decimal': 'NUMERIC',
+        'bool': 'BOOLEAN',
+        'int': 'BIGINT',
+        'float': 'DOUBLE PRECISION',
+    },
+}
+"""SQL column type per field kind and dialect; other kinds map to TEXT."""
+
+_TABLE_NAMES = {model: name for name, model in TABLES.items()}
+
+
+def dialect_of(connection: Any) -> str:
+    """Guess the SQL dialect of a DB-API connection from its driver module.
+
+    Returns:
+        ``'sqlite'``, ``'postgresql'`` or ``'generic'``
+    """
+    module = type(connection).__module__.split('.', 1)[0]
+    if module in ('sqlite3', '_sqlite3'):
+        return 'sqlite'
+    if module in ('psycopg', 'psycopg2', 'pg8000', 'asyncpg'):
+        return 'postgresql'
+    return 'generic'
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def column_definition(spec: FieldSpec, dialect: str = 'generic') -> str:
+    """Return the column definition of a field, including constraints."""
+    kind = spec.kind
+    if kind == 'literal' and all(type(value) is int for value in spec.literals):
+        # e.g. Claim.healthcareclaimtypeid1; a TEXT column cannot be checked against integers
+        kind = 'int'
+    sql_type = _COLUMN_TYPES[dialect].get(kind, 'TEXT')
+    definition = f"{_quote(spec.name)} {sql_type}"
+    if spec.required and not spec.nullable:
+        definition += ' NOT NULL'
+    if spec.kind == 'literal':
+        values = ', '.join(_literal(value) for value in spec.literals)
+        definition += f" CHECK ({_quote(spec.name)} IN ({values}))"
+    return definition
+
+
+def create_table_sql(model: type[SyntheaBaseModel], table: Optional[str] = None, dialect: str = 'generic') -> str:
+    """Derive a ``CREATE TABLE IF NOT EXISTS`` statement from a model.
+
+    Columns use the model's field names. UUIDs, Decimals and datetimes map to
+    native types where the dialect has them and Literal fields get a CHECK
+    constraint listing their allowed values.
+
+    Args:
+        model: Model class to derive the table from
+        table: Table name. Defaults to the Synthea table name of the model.
+        dialect: ``'sqlite'``, ``'postgresql'`` or ``'generic'``
+
+    Returns:
+        The DDL statement
+    """
+    columns = ',\n    '.join(column_definition(spec, dialect) for spec in field_specs(model))
+    return f"CREATE TABLE IF NOT EXISTS {_quote(table or _TABLE_NAMES[model])} (\n    {columns}\n)"
+
+
+def _placeholders(paramstyle: str, count: int) -> str:
+    if paramstyle == 'qmark':
+        return ', '.join('?' * count)
+    if paramstyle == 'numeric':
+        return ', '.join(f":{i}" for i in range(1, count + 1))
+    if paramstyle == 'named':
+        return ', '.join(f":p{i}" for i in range(count))
+    # format and pyformat drivers both accept %s
+    return ', '.join(['%s'] * count)
+
+
+def insert_sql(model: type[SyntheaBaseModel], table: Optional[str] = None, paramstyle: str = 'qmark') -> str:
+    """Return the parameterized INSERT statement for a model's table."""
+    specs = field_specs(model)
+    columns = ', '.join(_quote(spec.name) for spec in specs)
+    values = _placeholders(paramstyle, len(specs))
+    return f"INSERT INTO {_quote(table or _TABLE_NAMES[model])} ({columns}) VALUES ({values})"
+
+
+def _paramstyle(connection: Any) -> str:
+    module = sys.modules.get(type(connection).__module__.split('.', 1)[0])
+    return getattr(module, 'paramstyle', 'qmark')
+
+
+def _adapter(kind: str, dialect: str) -> Optional[Callable[[Any], Any]]:
+    """Conversion applied to non-None values before they are bound."""
+    if kind == 'union':
+        # Mixed-type fields are stored in a TEXT column
+        return str
+    if dialect == 'postgresql':
+        # Drivers adapt UUID, Decimal and datetime natively
+        return None
+    if kind == 'uuid':
+        return str
+    if kind in ('datetime', 'date'):
+        return _isoformat
+    if kind == 'decimal':
+        # Keep the exact value; the column affinity decides the storage
+        return str
+    return None
+
+
+def _isoformat(value: date) -> str:
+    return value.isoformat()
+
+
+def _row_builder(model: type[SyntheaBaseModel], dialect: str) -> Callable[[SyntheaBaseModel], tuple]:
+    specs = field_specs(model)
+    get = attrgetter(*(spec.name for spec in specs))
+    adapters = [(i, _adapter(spec.kind, dialect)) for i, spec in enumerate(specs)]
+    adapters = [(i, adapt) for i, adapt in adapters if adapt is not None]
+    if len(specs) == 1:
+        raw = get
+        get = lambda record: (raw(record),)  # noqa: E731
+    if not adapters:
+        return get
+
+    def build(record: SyntheaBaseModel) -> tuple:
+        values = list(get(record))
+        for i, adapt in adapters:
+            value = values[i]
+            if value is not None:
+                values[i] = adapt(value)
+        return tuple(values)
+
+    return build
+
+
+def _batches(records: Iterable[SyntheaBaseModel], size: int) -> Iterable[list[SyntheaBaseModel]]:
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def _chain_first(first: SyntheaBaseModel, rest: Iterable[SyntheaBaseModel]) -> Iterable[SyntheaBaseModel]:
+    yield first
+    yield from rest
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _copy_batch(cursor: Any, table: str, columns: str, rows: list[tuple]) -> None:
+    """Send a batch through COPY FROM STDIN (psycopg 3 or psycopg2)."""
+    statement = f"COPY {_quote(table)} ({columns}) FROM STDIN"
+    if hasattr(cursor, 'copy'):
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if value is None else _copy_value(value) for value in row])
+    buffer.seek(0)
+    cursor.copy_expert(f"{statement} WITH (FORMAT csv, NULL '\\N')", buffer)
+
+
+def to_sql(
+    records_or_path: Iterable[SyntheaBaseModel] | str | Path,
+    connection: Any,
+    table: Optional[str] = None,
+    *,
+    model: Optional[type[SyntheaBaseModel]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    create: bool = True,
+    method: str = 'auto',
+) -> int:
+    """Stream records into a database table in committed batches.
+
+    Records are validated lazily from the CSV (or taken from the iterable)
+    and sent ``batch_size`` at a time, committing after each batch. Batches
+    go through ``executemany`` with a single statement on one reused cursor,
+    so drivers that cache prepared statements parse it once. With
+    ``method='copy'`` (the default for psycopg/psycopg2 connections under
+    ``'auto'``) batches are streamed with ``COPY FROM STDIN`` instead.
+
+    Args:
+        records_or_path: Model instances, or the path of a Synthea CSV file
+        connection: Open DB-API 2.0 connection
+        table: Target table. Defaults to the Synthea table name.
+        model: Model of the records. Inferred from the path or first record.
+        batch_size: Rows per executemany call and commit
+        create: Whether to create the table if it does not exist
+        method: ``'executemany'``, ``'copy'`` or ``'auto'``
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: If the model cannot be inferred, ``method`` is unknown,
+            or ``'copy'`` is requested for a connection that cannot COPY
+    """
+    if method not in ('auto', 'executemany', 'copy'):
+        raise ValueError(f"Unknown method {method!r}")
+    if isinstance(records_or_path, (str, Path)):
+        model = model or model_for(records_or_path)
+        table = table or table_name(records_or_path)
+        records: Iterable[SyntheaBaseModel] = model.iter_csv(records_or_path)
+    else:
+        records = iter(records_or_path)
+        if model is None:
+            first = next(records, None)
+            if first is None:
+                return 0
+            model = type(first)
+            records = _chain_first(first, records)
+    if table is None:
+        if model not in _TABLE_NAMES:
+            raise ValueError(f"No default table name for {model.__name__}; pass table=")
+        table = _TABLE_NAMES[model]
+
+    dialect = dialect_of(connection)
+    if method == 'copy' and dialect != 'postgresql':
+        raise ValueError(f"method='copy' needs a PostgreSQL connection, got {dialect}")
+    cursor = connection.cursor()
+    try:
+        can_copy = dialect == 'postgresql' and (hasattr(cursor, 'copy') or hasattr(cursor, 'copy_expert'))
+        if method == 'copy' and not can_copy:
+            raise ValueError("method='copy' needs a cursor with copy() or copy_expert()")
+        if create:
+            cursor.execute(create_table_sql(model, table, dialect))
+            connection.commit()
+        use_copy = can_copy and method != 'executemany'
+        build = _row_builder(model, dialect)
+        paramstyle = _paramstyle(connection)
+        statement = insert_sql(model, table, paramstyle)
+        named = paramstyle == 'named'
+        columns = ', '.join(_quote(spec.name) for spec in field_specs(model))
+
+        written = 0
+        for batch in _batches(records, batch_size):
+            rows = [build(record) for record in batch]
+            if use_copy:
+                _copy_batch(cursor, table, columns, rows)
+            elif named:
+                cursor.executemany(statement, [{f"p{i}": v for i, v in enumerate(row)} for row in rows])
+            else:
+                cursor.executemany(statement, rows)
+            connection.commit()
+            written += len(rows)
+        return written
+    finally:
+        cursor.close()
+
+
+def load_tables(
+    paths: str | Path | Iterable[str | Path],
+    connect: Callable[[], Any],
+    *,
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    create: bool = True,
+    method: str = 'auto',
+) -> dict[str, int]:
+    """Load several Synthea CSV files into their tables in parallel.
+
+    Each file is loaded by ``to_sql`` on its own thread with its own
+    connection, since DB-API connections cannot be shared between threads.
+    Database round trips of one table overlap with validation of the others.
+
+    Args:
+        paths: An export directory, or the CSV files to load
+        connect: Factory returning a new connection; each is closed afterwards
+        workers: Maximum number of tables loaded at once
+        batch_size: Rows per batch and commit
+        create: Whether to create missing tables
+        method: ``'executemany'``, ``'copy'`` or ``'auto'``
+
+    Returns:
+        Rows written per table name
+    """
+    if isinstance(paths, (str, Path)) and Path(paths).is_dir():
+        paths = sorted(
+            path for path in Path(paths).iterdir()
+            if path.is_file() and table_name(path) in TABLES
+        )
+    elif isinstance(paths, (str, Path)):
+        paths = [paths]
+    paths = list(paths)
+
+    def load(path: str | Path) -> int:
+        connection = connect()
+        try:
+            return to_sql(path, connection, batch_size=batch_size, create=create, method=method)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(load, paths))
+    return {table_name(path): count for path, count in zip(paths, counts)}
@@ -0,0 +1,63 @@
+"""Registry of the Synthea CSV export tables and their models."""
+
+from pathlib import Path
+
+from .allergies import Allergy
+from .base import SyntheaBaseModel
+from .careplans import CarePlan
+from .claims import Claim
+from .claims_transactions import ClaimTransaction
+from .conditions import Condition
+from .devices import Device
+from .encounters import Encounter
+from .imaging_studies import ImagingStudy
+from .immunizations import Immunization
+from .medications import Medication
+from .observations import Observation
+from .organizations import Organization
+from .patients import Patient
+from .payer_transitions import PayerTransition
+from .payers import Payer
+from .procedures import Procedure
+from .providers import Provider
+from .supplies import Supply
+
+TABLES: dict[str, type[SyntheaBaseModel]] = {
+    'allergies': Allergy,
+    'careplans': CarePlan,
+    'claims': Claim,
+    'claims_transactions': ClaimTransaction,
+    'conditions': Condition,
+    'devices': Device,
+    'encounters': Encounter,
+    'imaging_studies': ImagingStudy,
+    'immunizations': Immunization,
+    'medications': Medication,
+    'observations': Observation,
+    'organizations': Organization,
+    'patients': Patient,
+    'payer_transitions': PayerTransition,
+    'payers': Payer,
+    'procedures': Procedure,
+    'providers': Provider,
+    'supplies': Supply,
+}
+"""Model for each table, keyed by CSV file name without extension."""
+
+
+def table_name(path: str | Path) -> str:
+    """Return the table name of an export file, e.g. ``'patients'`` for ``patients.csv.gz``."""
+    return Path(path).name.split('.', 1)[0]
+
+
+def model_for(path: str | Path) -> type[SyntheaBaseModel]:
+    """Return the model for an export file or table name.
+
+    Raises:
+        KeyError: If the file is not a known Synthea table
+    """
+    name = table_name(path)
+    try:
+        return TABLES[name]
+    except KeyError:
+        raise KeyError(f"Unknown Synthea table {name!r}") from None
@@ -0,0 +1,244 @@
+"""Per-patient time series extraction for numeric Synthea observations."""
+
+import csv
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+from uuid import UUID
+
+from ._io import open_csv
+from ._parsers import to_epoch_seconds
+from .observations import Observation
+
+SeriesKey = tuple[UUID, str]
+TimePoint = Union[int, date, datetime]
+
+
+def _as_epoch(when: TimePoint) -> int:
+    return when if isinstance(when, int) else to_epoch_seconds(when)
+
+
+class ObservationSeries:
+    """Columnar store of numeric observation values per patient and code.
+
+    Points are staged as they are added and packed by ``build()`` into two
+    contiguous buffers, ``epochs`` (``array('q')``, seconds since the Unix
+    epoch) and ``values`` (``array('d')``). Each ``(patient, code)`` series
+    occupies the half-open slice given by ``index`` and is sorted by time,
+    so lookups are a dictionary probe followed by a binary search.
+
+    Example:
+        >>> series = ObservationSeries.from_csv('observations.csv', codes={'4548-4', '8302-2'})
+        >>> series.as_of(patient_id, '4548-4', datetime(2020, 1, 1, tzinfo=timezone.utc))
+        5.8
+
+    Args:
+        codes: LOINC codes to keep. None keeps every numeric code.
+    """
+
+    def __init__(self, codes: Optional[Iterable[str]] = None):
+        self.codes = frozenset(codes) if codes is not None else None
+        self.epochs = array('q')
+        self.values = array('d')
+        self.index: dict[SeriesKey, tuple[int, int]] = {}
+        self.units: dict[str, Optional[str]] = {}
+        self._keys: dict[SeriesKey, int] = {}
+        self._staged_keys: Optional[array] = array('l')
+        self._built = True
+
+    @classmethod
+    def from_csv(cls, path: str | Path, codes: Optional[Iterable[str]] = None) -> 'ObservationSeries':
+        """Build series by streaming an observations CSV file.
+
+        Only rows with ``TYPE == numeric`` and a wanted ``CODE`` are parsed;
+        other rows are skipped without validation.
+
+        Args:
+            path: Path to observations.csv, optionally compressed
+            codes: LOINC codes to keep. None keeps every numeric code.
+
+        Returns:
+            Built ObservationSeries
+        """
+        series = cls(codes)
+        with open_csv(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return series.build()
+            date_i, patient_i, code_i, value_i, type_i = (
+                header.index(column) for column in ('DATE', 'PATIENT', 'CODE', 'VALUE', 'TYPE')
+            )
+            units_i = header.index('UNITS') if 'UNITS' in header else None
+            wanted = series.codes
+            for row in reader:
+                if row[type_i].strip() != 'numeric':
+                    continue
+                code = row[code_i].strip()
+                if wanted is not None and code not in wanted:
+                    continue
+                try:
+                    value = float(row[value_i])
+                except ValueError:
+                    continue
+                if code not in series.units:
+                    series.units[code] = (row[units_i].strip() or None) if units_i is not None else None
+                series.add_point(
+                    UUID(row[patient_i].strip()),
+                    code,
+                    to_epoch_seconds(datetime.fromisoformat(row[date_i].strip())),
+                    value,
+                )
+        return series.build()
+
+    def add(self, observation: Observation) -> None:
+        """Stage a validated Observation if it is numeric and its code is wanted."""
+        if observation.type != 'numeric' or not isinstance(observation.value, float):
+            return
+        if self.codes is not None and observation.code not in self.codes:
+            return
+        self.units.setdefault(observation.code, observation.units)
+        self.add_point(observation.patient, observation.code, to_epoch_seconds(observation.date), observation.value)
+
+    def update(self, observations: Iterable[Observation]) -> 'ObservationSeries':
+        """Stage an iterable (or ``iter_csv`` stream) of Observations."""
+        for observation in observations:
+            self.add(observation)
+        return self
+
+    def add_point(self, patient: UUID, code: str, epoch: int, value: float) -> None:
+        """Stage a single raw point; call ``build()`` before querying."""
+        key_id = self._keys.get((patient, code))
+        if key_id is None:
+            key_id = self._keys[(patient, code)] = len(self._keys)
+        if self._staged_keys is None:
+            # Re-stage the packed layout so a later build() can merge into it
+            self._staged_keys = array('l')
+            for existing_id, (first, last) in enumerate(self.index.values()):
+                self._staged_keys.extend([existing_id] * (last - first))
+        self._staged_keys.append(key_id)
+        self.epochs.append(epoch)
+        self.values.append(value)
+        self._built = False
+
+    def build(self) -> 'ObservationSeries':
+        """Pack staged points into per-series, time-sorted contiguous slices.
+
+        Points are grouped with a counting sort on the series key; a series
+        is only sorted by time when its points did not arrive in order, which
+        is rare for Synthea exports.
+        """
+        if self._built:
+            return self
+        keys = list(self._keys)
+        counts = [0] * len(keys)
+        for key_id in self._staged_keys:
+            counts[key_id] += 1
+        starts = [0] * len(keys)
+        offset = 0
+        for key_id, count in enumerate(counts):
+            starts[key_id] = offset
+            offset += count
+
+        epochs = array('q', bytes(8 * offset))
+        values = array('d', bytes(8 * offset))
+        cursor = starts[:]
+        for key_id, epoch, value in zip(self._staged_keys, self.epochs, self.values):
+            i = cursor[key_id]
+            epochs[i] = epoch
+            values[i] = value
+            cursor[key_id] = i + 1
+
+        self.index = {}
+        for key_id, key in enumerate(keys):
+            start, stop = starts[key_id], starts[key_id] + counts[key_id]
+            segment = epochs[start:stop]
+            if any(segment[i] > segment[i + 1] for i in range(len(segment) - 1)):
+                order = sorted(range(start, stop), key=epochs.__getitem__)
+                sorted_values = [values[i] for i in order]
+                epochs[start:stop] = array('q', sorted(segment))
+                values[start:stop] = array('d', sorted_values)
+            self.index[key] = (start, stop)
+
+        self.epochs, self.values = epochs, values
+        self._staged_keys = None
+        self._built = True
+        return self
+
+    def _slice(self, patient: UUID, code: str) -> Optional[tuple[int, int]]:
+        if not self._built:
+            raise RuntimeError("ObservationSeries has staged points; call build() first")
+        return self.index.get((patient, code))
+
+    def keys(self) -> Iterator[SeriesKey]:
+        """Iterate over the ``(patient, code)`` pairs that have points."""
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def get(self, patient: UUID, code: str) -> tuple[memoryview, memoryview]:
+        """Return zero-copy ``(epochs, values)`` views of one series.
+
+        Unknown series yield empty views. Release the views before staging
+        more points, since exported buffers cannot be resized.
+        """
+        bounds = self._slice(patient, code) or (0, 0)
+        return memoryview(self.epochs)[slice(*bounds)], memoryview(self.values)[slice(*bounds)]
+
+    def as_of(self, patient: UUID, code: str, when: TimePoint) -> Optional[float]:
+        """Return the last value recorded at or before ``when``, or None."""
+        bounds = self._slice(patient, code)
+        if bounds is None:
+            return None
+        i = bisect_right(self.epochs, _as_epoch(when), *bounds)
+        return self.values[i - 1] if i > bounds[0] else None
+
+    def between(self, patient: UUID, code: str, start: TimePoint, stop: TimePoint) -> tuple[memoryview, memoryview]:
+        """Return zero-copy views of the points in ``[start, stop)``."""
+        bounds = self._slice(patient, code) or (0, 0)
+        lo = bisect_left(self.epochs, _as_epoch(start), *bounds)
+        hi = bisect_left(self.epochs, _as_epoch(stop), lo, bounds[1])
+        return memoryview(self.epochs)[lo:hi], memoryview(self.values)[lo:hi]
+
+    def resample(
+        self,
+        patient: UUID,
+        code: str,
+        start: TimePoint,
+        stop: TimePoint,
+        step: Union[int, timedelta],
+    ) -> tuple[array, array]:
+        """Sample a series on a regular grid using last-value-as-of semantics.
+
+        Args:
+            patient: Patient id
+            code: LOINC code
+            start: First grid point (inclusive)
+            stop: End of the grid (exclusive)
+            step: Grid spacing, as a timedelta or in seconds
+
+        Returns:
+            ``(epochs, values)`` arrays for the grid; points before the first
+            observation are NaN
+        """
+        step_seconds = int(step.total_seconds()) if isinstance(step, timedelta) else step
+        if step_seconds <= 0:
+            raise ValueError("step must be positive")
+        grid = array('q', range(_as_epoch(start), _as_epoch(stop), step_seconds))
+        sampled = array('d', [float('nan')]) * len(grid)
+        bounds = self._slice(patient, code)
+        if bounds is None:
+            return grid, sampled
+        lo, hi = bounds
+        epochs, values = self.epochs, self.values
+        # Grid points are increasing, so walk the series once
+        i = lo
+        for g, t in enumerate(grid):
+            while i < hi and epochs[i] <= t:
+                i += 1
+            if i > lo:
+                sampled[g] = values[i - 1]
+        return grid, sampled
@@ -0,0 +1,154 @@
+"""Detection of Synthea CSV header layouts across generator versions."""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+
+from ._fields import field_specs
+
+if TYPE_CHECKING:
+    from .base import SyntheaBaseModel
+
+
+def year_of(value: str | int) -> int:
+    """Return the year of a ``YYYY``, ``YYYY-MM-DD`` or ISO timestamp string."""
+    if isinstance(value, int):
+        return value
+    value = value.strip()
+    return int(value[:4]) if len(value) > 4 and value[4] == '-' else int(value)
+
+
+@dataclass(frozen=True)
+class HeaderSchema:
+    """A known CSV layout of one Synthea table.
+
+    A header matches when it contains every column in ``signature`` and none
+    in ``absent``. Matching headers are mapped onto the model with
+    ``renames`` (CSV column to model alias), and ``converters`` (keyed by
+    model alias) turn non-empty raw values into their final form once per
+    value instead of through per-row model validators.
+    """
+
+    model: str
+    """Name of the model class the layout belongs to."""
+    version: str
+    """Synthea version label reported for matching files."""
+    signature: frozenset[str]
+    """Columns a header must contain."""
+    absent: frozenset[str] = frozenset()
+    """Columns a header must not contain."""
+    renames: dict[str, str] = field(default_factory=dict)
+    """CSV column to model alias."""
+    converters: dict[str, Callable[[str], Any]] = field(default_factory=dict)
+    """Model alias to value converter."""
+
+
+@dataclass(frozen=True)
+class SchemaMatch:
+    """Result of fingerprinting a CSV header against the known layouts."""
+
+    version: str
+    """Detected Synthea version label, or ``'unknown'``."""
+    schema: Optional[HeaderSchema]
+    """Matched layout, None for unknown headers."""
+    columns: tuple[str, ...]
+    """Model alias each header column maps to (the column itself if not renamed)."""
+    missing: tuple[str, ...]
+    """Model aliases with no column in the file."""
+    extra: tuple[str, ...]
+    """Header columns that are not model fields."""
+
+    @property
+    def converters(self) -> dict[str, Callable[[str], Any]]:
+        """Converters of the matched layout, keyed by model alias."""
+        return self.schema.converters if self.schema is not None else {}
+
+
+KNOWN_SCHEMAS: list[HeaderSchema] = [
+    HeaderSchema(
+        model='PayerTransition',
+        version='3.x',
+        signature=frozenset({'PATIENT', 'START_DATE', 'END_DATE', 'PAYER'}),
+        renames={
+            'START_DATE': 'START_YEAR',
+            'END_DATE': 'END_YEAR',
+            'PLAN_OWNERSHIP': 'OWNERSHIP',
+            'OWNER_NAME': 'OWNERNAME',
+        },
+        converters={'START_YEAR': year_of, 'END_YEAR': year_of},
+    ),
+    HeaderSchema(
+        model='PayerTransition',
+        version='2.x',
+        signature=frozenset({'PATIENT', 'START_YEAR', 'END_YEAR', 'PAYER'}),
+        # Some exports write full timestamps into the *_YEAR columns
+        converters={'START_YEAR': year_of, 'END_YEAR': year_of},
+    ),
+    HeaderSchema(
+        model='Observation',
+        version='3.x',
+        signature=frozenset({'DATE', 'PATIENT', 'CATEGORY', 'CODE', 'VALUE', 'TYPE'}),
+    ),
+    HeaderSchema(
+        model='Observation',
+        version='2.x',
+        signature=frozenset({'DATE', 'PATIENT', 'CODE', 'VALUE', 'TYPE'}),
+        absent=frozenset({'CATEGORY'}),
+    ),
+]
+"""Known layouts, checked in order; the first match wins."""
+
+
+def _clear_plans() -> None:
+    """Drop the cached row plans, which hold the layout detected for their header."""
+    from . import _rows, _trusted
+    _rows._PLANS.clear()
+    _trusted._PLANS.clear()
+
+
+def register_schema(schema: HeaderSchema) -> None:
+    """Register an additional layout, checked before the built-in ones.
+
+    Headers that were already read are planned again on their next use, so
+    the new layout applies to them too.
+    """
+    KNOWN_SCHEMAS.insert(0, schema)
+    _clear_plans()
+
+
+def detect_schema(model: type['SyntheaBaseModel'], header: Sequence[str]) -> SchemaMatch:
+    """Fingerprint a CSV header and pick the layout it was written with.
+
+    Tables without several known layouts match when the header contains
+    every required model column and are reported as ``'current'``.
+
+    Args:
+        model: Model class the file is loaded into
+        header: CSV header row
+
+    Returns:
+        SchemaMatch describing the detected version and column mapping
+    """
+    header_set = frozenset(header)
+    schema = next(
+        (
+            s for s in KNOWN_SCHEMAS
+            if s.model == model.__name__ and s.signature <= header_set and not s.absent & header_set
+        ),
+        None,
+    )
+    renames = schema.renames if schema is not None else {}
+    columns = tuple(renames.get(column, column) for column in header)
+
+    specs = field_specs(model)
+    keys = {spec.alias for spec in specs} | {spec.name for spec in specs}
+    present = set(columns)
+    missing = tuple(spec.alias for spec in specs if spec.alias not in present and spec.name not in present)
+    extra = tuple(column for column, target in zip(header, columns) if target not in keys)
+
+    if schema is not None:
+        version = schema.version
+    elif not any(spec.required and spec.alias in missing for spec in specs):
+        version = 'current'
+    else:
+        version = 'unknown'
+    return SchemaMatch(version=version, schema=schema, columns=columns, missing=missing, extra=extra)
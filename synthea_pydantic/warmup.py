@@ -0,0 +1,66 @@
+"""Building model validators once and sharing them with worker processes."""
+
+import multiprocessing
+from multiprocessing.context import BaseContext
+from typing import Iterable, Optional
+
+from .base import SyntheaBaseModel
+
+_PRELOAD_MODULE = 'synthea_pydantic._warm'
+
+
+def warm_up(models: Optional[Iterable[type[SyntheaBaseModel]]] = None) -> list[type[SyntheaBaseModel]]:
+    """Build the pydantic-core validators and serializers of models now.
+
+    Models defer their schema build until first use; calling this up front
+    moves that cost out of the hot path. Already built models are skipped.
+
+    Args:
+        models: Models to build. Defaults to every Synthea model.
+
+    Returns:
+        The models that were warmed
+    """
+    if models is None:
+        from .tables import TABLES
+        models = TABLES.values()
+    models = list(models)
+    for model in models:
+        if not model.__pydantic_complete__:
+            model.model_rebuild()
+    return models
+
+
+def worker_context(method: Optional[str] = None) -> BaseContext:
+    """Return a multiprocessing context whose workers start with built validators.
+
+    With ``fork`` the models are warmed in this process and inherited by every
+    child. With ``forkserver`` the fork server imports and warms them once and
+    forks workers from that template; this only takes effect if the fork
+    server has not been started yet. Both make worker startup independent of
+    how many models are used. ``spawn`` cannot share state, so use
+    ``warm_up`` as the pool ``initializer`` there.
+
+    Example:
+        >>> with ProcessPoolExecutor(mp_context=worker_context()) as pool:
+        ...     list(pool.map(load_chunk, chunks))
+
+    Args:
+        method: ``'fork'`` or ``'forkserver'``. Defaults to ``forkserver`` when
+            available, else ``fork``.
+
+    Returns:
+        Multiprocessing context for ``ProcessPoolExecutor(mp_context=...)``
+    """
+    available = multiprocessing.get_all_start_methods()
+    if method is None:
+        method = 'forkserver' if 'forkserver' in available else 'fork'
+    if method not in ('fork', 'forkserver') or method not in available:
+        raise ValueError(f"Start method {method!r} cannot share warmed validators; use warm_up as initializer")
+
+    context = multiprocessing.get_context(method)
+    if method == 'fork':
+        warm_up()
+    else:
+        context.set_forkserver_preload([_PRELOAD_MODULE])
+    return context
@@ -1,8 +1,10 @@
 """Shared test configuration and fixtures for synthea-pydantic tests."""
 
 import csv
+from datetime import datetime, timezone
 from itertools import islice
 from pathlib import Path
+from uuid import UUID, uuid4
 
 import pytest
 
@@ -52,6 +54,12 @@ ALL_MODELS = [
     (Supply, "supplies"),
 ]
 
+PATIENT = UUID('b9c610cd-28a6-4636-ccb6-c7a0d2a4cb85')
+OTHER_PATIENT = UUID('0a5ec3b4-b5a6-4d1e-9b6a-6b1a0e1d2c3f')
+ENCOUNTER = UUID('01efcc52-15d6-51e9-faa2-bee069fcbe44')
+PAYER = UUID('7c4411ce-02f1-39b5-b9ec-dfbea9ad3c1a')
+PROVIDER = UUID('e1e0cc3a-fbd3-3f8e-9d1e-5c5b0e6a8f4c')
+
 
 @pytest.fixture(params=ALL_MODELS, ids=lambda x: x[1])
 def model_and_csv(request):
@@ -95,4 +103,115 @@ def first_csv_row(model_and_csv):
         if row is None:
             pytest.skip(f"No data in {csv_path}")
         
-        return model_class, row
\ No newline at end of file
+        return model_class, row
+
+def write_csv(path, records):
+    """Write model instances to a Synthea-style CSV file (aliases as header)."""
+    rows = [record.model_dump(by_alias=True, mode='json') for record in records]
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def make_encounter(i=0, **columns):
+    """Build encounter ``i``: odd ones have a STOP, every third is an emergency.
+
+    Keyword arguments override columns by their CSV name, e.g. ``STOP=''``.
+    """
+    fields = {
+        'Id': str(uuid4()),
+        'START': '2020-01-01T10:00:00Z',
+        'STOP': '2020-01-01T10:30:00.250000Z' if i % 2 else '',
+        'PATIENT': str(PATIENT),
+        'ORGANIZATION': str(uuid4()),
+        'PROVIDER': str(uuid4()),
+        'PAYER': str(uuid4()),
+        'ENCOUNTERCLASS': 'wellness' if i % 3 else 'emergency',
+        'CODE': '410620009',
+        'DESCRIPTION': f"Visit {i}",
+        'BASE_ENCOUNTER_COST': '136.8',
+        'TOTAL_CLAIM_COST': f"{i}.125",
+        'PAYER_COVERAGE': '0.00',
+    }
+    fields.update(columns)
+    return Encounter(**fields)
+
+
+def make_observation(value='180.2', type_='numeric', **columns):
+    """Build a body height observation with the given VALUE and TYPE.
+
+    Keyword arguments override columns by their CSV name.
+    """
+    fields = {
+        'DATE': '2020-01-01T10:00:00Z', 'PATIENT': str(PATIENT), 'CODE': '8302-2', 'DESCRIPTION': 'Body Height',
+        'VALUE': value, 'UNITS': 'cm', 'TYPE': type_,
+    }
+    fields.update(columns)
+    return Observation(**fields)
+
+
+def make_patient(**columns):
+    """Build a patient with a new id; keyword arguments override columns by their CSV name."""
+    fields = {
+        'Id': str(uuid4()), 'BIRTHDATE': '1980-02-24', 'SSN': '999-52-8591', 'FIRST': 'Damon455',
+        'LAST': 'Langosh790', 'RACE': 'white', 'ETHNICITY': 'nonhispanic', 'GENDER': 'M', 'BIRTHPLACE': 'Boston',
+        'ADDRESS': '1 Main St', 'CITY': 'Boston', 'STATE': 'Massachusetts', 'HEALTHCARE_EXPENSES': '1000.00',
+        'HEALTHCARE_COVERAGE': '0.00',
+    }
+    fields.update(columns)
+    return Patient(**fields)
+
+
+def make_condition(**columns):
+    """Build a diabetes diagnosis; keyword arguments override columns by their CSV name."""
+    fields = {
+        'START': '2020-01-01', 'PATIENT': str(PATIENT), 'ENCOUNTER': str(ENCOUNTER), 'CODE': '44054006',
+        'DESCRIPTION': 'Diabetes',
+    }
+    fields.update(columns)
+    return Condition(**fields)
+
+
+def make_medication(**columns):
+    """Build a medication order; keyword arguments override columns by their CSV name."""
+    fields = {
+        'START': '2020-01-01T10:00:00Z', 'PATIENT': str(PATIENT), 'PAYER': str(PAYER), 'ENCOUNTER': str(ENCOUNTER),
+        'CODE': '860975', 'DESCRIPTION': 'Metformin', 'BASE_COST': '1.00', 'PAYER_COVERAGE': '0.00',
+        'DISPENSES': '1', 'TOTALCOST': '1.00',
+    }
+    fields.update(columns)
+    return Medication(**fields)
+
+
+def make_procedure(**columns):
+    """Build a procedure; keyword arguments override columns by their CSV name."""
+    fields = {
+        'START': '2020-01-01T10:00:00Z', 'PATIENT': str(PATIENT), 'ENCOUNTER': str(ENCOUNTER), 'CODE': '430193006',
+        'DESCRIPTION': 'Medication Reconciliation (procedure)', 'BASE_COST': '10.00',
+    }
+    fields.update(columns)
+    return Procedure(**fields)
+
+
+def write_export(directory, patients=12, encounters=40):
+    """Write patients.csv and encounters.csv to an export directory.
+
+    Encounters are dealt to the patients in turn and start on successive
+    days of January 2020.
+
+    Returns:
+        The patients and encounters written
+    """
+    patient_records = [make_patient() for _ in range(patients)]
+    encounter_records = [
+        make_encounter(i).model_copy(update={
+            'patient': patient_records[i % patients].id,
+            'start': datetime(2020, 1, 1 + i % 28, tzinfo=timezone.utc),
+        })
+        for i in range(encounters)
+    ]
+    write_csv(Path(directory) / 'patients.csv', patient_records)
+    write_csv(Path(directory) / 'encounters.csv', encounter_records)
+    return patient_records, encounter_records
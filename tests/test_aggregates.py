@@ -0,0 +1,92 @@
+"""Tests for the aggregates module."""
+
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from conftest import OTHER_PATIENT, PATIENT, PAYER, make_encounter, make_medication, make_procedure, write_csv
+from synthea_pydantic import Encounter, Patient
+from synthea_pydantic.aggregates import CostRollup
+
+
+def test_rollup_by_patient_and_year():
+    """Test that costs are summed per patient and year in separate columns."""
+    rollup = CostRollup()
+    rollup.update([
+        make_encounter(START='2019-02-24T05:07:38Z', TOTAL_CLAIM_COST='704.20', PAYER_COVERAGE='600.10'),
+        make_encounter(START='2019-08-01T05:07:38Z', TOTAL_CLAIM_COST='0.10', PAYER_COVERAGE='0.20'),
+        make_encounter(START='2020-02-24T05:07:38Z', TOTAL_CLAIM_COST='10.00', PAYER_COVERAGE='0.00'),
+        make_medication(START='2019-03-01T05:07:38Z', TOTALCOST='14.55', PAYER_COVERAGE='4.55'),
+        make_procedure(PATIENT=str(OTHER_PATIENT), START='2019-03-01T05:07:38Z', BASE_COST='516.65'),
+    ])
+
+    assert len(rollup) == 3
+    totals = rollup[(PATIENT, 2019)]
+    assert totals.encounters == 2
+    assert totals.encounter_cost == Decimal('704.30')
+    assert totals.encounter_coverage == Decimal('600.30')
+    assert totals.encounter_cost_cents == 70430
+    assert totals.medications == 1
+    assert totals.medication_cost == Decimal('14.55')
+    assert totals.medication_coverage == Decimal('4.55')
+    assert totals.procedures == 0
+
+    assert rollup[(OTHER_PATIENT, 2019)].procedure_cost == Decimal('516.65')
+    assert rollup.get((OTHER_PATIENT, 2020)) is None
+
+
+def test_rollup_missing_dimension_groups_under_none():
+    """Test that records without a grouping column are grouped under None."""
+    rollup = CostRollup(by=('payer',))
+    rollup.add(make_encounter(PAYER=str(PAYER), TOTAL_CLAIM_COST='1.00', PAYER_COVERAGE='1.00'))
+    rollup.add(make_procedure(BASE_COST='2.00'))
+
+    assert rollup[(PAYER,)].encounters == 1
+    assert rollup[(None,)].procedures == 1
+
+
+def test_merge_shards_matches_single_pass():
+    """Test that merging shard rollups gives the same result as one pass."""
+    records = [
+        make_encounter(START='2019-02-24T05:07:38Z', TOTAL_CLAIM_COST='704.20', PAYER_COVERAGE='600.10'),
+        make_encounter(
+            PATIENT=str(OTHER_PATIENT), START='2019-08-01T05:07:38Z', TOTAL_CLAIM_COST='3.33', PAYER_COVERAGE='1.11',
+        ),
+        make_medication(START='2019-03-01T05:07:38Z', TOTALCOST='14.55', PAYER_COVERAGE='4.55'),
+        make_procedure(PATIENT=str(OTHER_PATIENT), START='2020-03-01T05:07:38Z', BASE_COST='516.65'),
+    ]
+    single = CostRollup(by=('organization', 'year')).update(records)
+
+    left = CostRollup(by=('organization', 'year')).update(records[:2])
+    right = CostRollup(by=('organization', 'year')).update(records[2:])
+    # Shards are typically produced in worker processes
+    merged = left.merge(pickle.loads(pickle.dumps(right)))
+
+    assert dict(merged.items()) == dict(single.items())
+
+
+def test_merge_rejects_different_grouping():
+    """Test that rollups with different dimensions cannot be merged."""
+    with pytest.raises(ValueError):
+        CostRollup(by=('patient',)).merge(CostRollup(by=('payer',)))
+
+
+def test_invalid_dimension_and_record_type():
+    """Test that unsupported dimensions and record types are rejected."""
+    with pytest.raises(ValueError):
+        CostRollup(by=('encounterclass',))
+
+    patient = Patient.model_construct(id=PATIENT)
+    with pytest.raises(TypeError):
+        CostRollup().add(patient)
+
+
+def test_add_csv(tmp_path):
+    """Test streaming a CSV file into the rollup."""
+    encounter = make_encounter(START='2019-02-24T05:07:38Z', TOTAL_CLAIM_COST='704.20', PAYER_COVERAGE='600.10')
+    csv_path = write_csv(tmp_path / "encounters.csv", [encounter, encounter])
+
+    rollup = CostRollup(by=('year',)).add_csv(Encounter, csv_path)
+    assert rollup[(2019,)].encounters == 2
+    assert rollup[(2019,)].encounter_cost == Decimal('1408.40')
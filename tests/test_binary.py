@@ -0,0 +1,99 @@
+"""Tests for the binary encoding of records."""
+
+import pickle
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from conftest import make_encounter, make_observation, make_patient
+from synthea_pydantic import Claim, Encounter, Observation, Patient
+from synthea_pydantic._binary import codec
+
+
+def test_record_round_trip():
+    for record in (make_encounter(0), make_encounter(1), make_patient()):
+        decoded = type(record).from_bytes(record.to_bytes())
+        assert decoded == record
+        assert decoded.model_fields_set == record.model_fields_set
+
+
+def test_union_values_keep_their_type():
+    for record in (make_observation('180.5', 'numeric'), make_observation('Never smoker', 'text')):
+        decoded = Observation.from_bytes(record.to_bytes())
+        assert decoded.value == record.value
+        assert type(decoded.value) is type(record.value)
+
+
+def test_literal_ints_round_trip():
+    claim = Claim(
+        Id=str(uuid4()), PATIENTID=str(uuid4()), PROVIDERID=str(uuid4()), CURRENTILLNESSDATE='2020-01-01T10:00:00Z',
+        SERVICEDATE='2020-01-01T10:00:00Z', DEPARTMENTID='1', PATIENTDEPARTMENTID='1', STATUS1='CLOSED',
+        STATUSP='CLOSED', OUTSTANDING1='0', OUTSTANDINGP='0', HEALTHCARECLAIMTYPEID1='1', HEALTHCARECLAIMTYPEIDP='2',
+    )
+
+    assert Claim.from_bytes(claim.to_bytes()) == claim
+
+
+def test_decimals_are_exact():
+    for value in ('136.80', '-0.05', '12', '1E+5', '0.0000001', '12345678901234567890.123456789012345678'):
+        record = make_encounter(0).model_copy(update={'total_claim_cost': Decimal(value)})
+        decoded = Encounter.from_bytes(record.to_bytes())
+        assert str(decoded.total_claim_cost) == str(Decimal(value))
+
+
+def test_datetimes_keep_their_offset():
+    for tzinfo in (None, timezone.utc, timezone(timedelta(hours=-5, minutes=-30))):
+        start = datetime(2020, 3, 4, 5, 6, 7, 890, tzinfo=tzinfo)
+        record = make_encounter(0).model_copy(update={'start': start})
+        decoded = Encounter.from_bytes(record.to_bytes()).start
+        assert decoded == start
+        assert decoded.utcoffset() == start.utcoffset()
+
+
+def test_unset_fields_are_preserved():
+    record = Encounter.model_construct(**make_encounter(0).__dict__, _fields_set={'id', 'start'})
+
+    assert Encounter.from_bytes(record.to_bytes()).model_fields_set == {'id', 'start'}
+
+
+def test_trailing_bytes_rejected():
+    with pytest.raises(ValueError, match="trailing"):
+        Encounter.from_bytes(make_encounter(0).to_bytes() + b'\x00')
+
+
+def test_batch_round_trip():
+    records = [make_encounter(i) for i in range(50)]
+
+    assert Encounter.decode_batch(Encounter.encode_batch(records)) == records
+    assert Encounter.decode_batch(Encounter.encode_batch([])) == []
+
+
+def test_batch_from_another_model_rejected():
+    data = Patient.encode_batch([make_patient()])
+
+    with pytest.raises(ValueError, match="fingerprint"):
+        Encounter.decode_batch(data)
+
+
+def test_pickle_uses_binary_encoding():
+    records = [make_encounter(i) for i in range(20)]
+
+    assert pickle.loads(pickle.dumps(records)) == records
+    assert len(pickle.dumps(records)) < len(pickle.dumps([record.__dict__ for record in records]))
+
+
+def test_pickle_of_partial_instance():
+    record = Encounter.model_construct(START=None)
+
+    restored = pickle.loads(pickle.dumps(record))
+    assert restored.__dict__ == record.__dict__
+    assert restored.model_fields_set == record.model_fields_set
+
+
+def test_encoding_is_smaller_than_pydantic_state():
+    record = make_encounter(1)
+
+    assert len(record.to_bytes()) * 4 < len(pickle.dumps(record.__getstate__()))
+    assert codec(Encounter).encode(record) == record.to_bytes()
@@ -0,0 +1,116 @@
+"""Tests for the code_index module."""
+
+import random
+from datetime import date
+
+import pytest
+
+from conftest import make_condition, make_medication, make_observation, write_csv, write_export
+from synthea_pydantic import CodeIndex
+from synthea_pydantic._codec import pack_ints, read_varint, unpack_ints, unzigzag, write_varint, zigzag
+
+
+def write_coded_export(directory):
+    patients, encounters = write_export(directory, patients=5, encounters=5)
+    ids = [(str(patient.id), str(encounter.id)) for patient, encounter in zip(patients, encounters)]
+    conditions = [
+        make_condition(START='2015-03-01', PATIENT=ids[0][0], ENCOUNTER=ids[0][1]),
+        make_condition(START='2021-06-01', PATIENT=ids[1][0], ENCOUNTER=ids[1][1]),
+        make_condition(START='2019-01-01', PATIENT=ids[2][0], ENCOUNTER=ids[2][1], CODE='38341003',
+                       DESCRIPTION='Hypertension'),
+    ]
+    medications = [
+        make_medication(START=f"{year}-01-01T00:00:00Z", PATIENT=ids[i][0], ENCOUNTER=ids[i][1])
+        for i, year in ((0, 2016), (2, 2019), (0, 2017))
+    ]
+    observations = [
+        make_observation('6.1', 'numeric', DATE=f"{year}-05-01T00:00:00Z", PATIENT=ids[i][0], ENCOUNTER=ids[i][1],
+                         CODE='4548-4', DESCRIPTION='A1c', UNITS='%')
+        for i, year in ((0, 2020), (1, 2021), (3, 2019))
+    ]
+    write_csv(directory / 'conditions.csv', conditions)
+    write_csv(directory / 'medications.csv', medications)
+    write_csv(directory / 'observations.csv', observations)
+    return [patient.id for patient in patients], [encounter.id for encounter in encounters]
+
+
+def test_boolean_queries(tmp_path):
+    patients, _ = write_coded_export(tmp_path)
+    index = CodeIndex.build(tmp_path)
+
+    diabetic = index.cohort('44054006', table='conditions')
+    metformin = index.cohort('860975')
+    a1c = index.cohort('4548-4')
+
+    assert diabetic.patients() == [patients[0], patients[1]]
+    assert (diabetic & metformin & a1c).patients() == [patients[0]]
+    assert (diabetic | metformin).patients() == patients[:3]
+    assert (a1c - diabetic).patients() == [patients[3]]
+    assert (~(diabetic | metformin | a1c)).patients() == [patients[4]]
+    assert patients[0] in diabetic
+    assert len(index.cohort('unknown')) == 0
+
+
+def test_date_bounds(tmp_path):
+    patients, encounters = write_coded_export(tmp_path)
+    index = CodeIndex.build(tmp_path)
+
+    assert index.cohort('4548-4', start=date(2020, 1, 1)).patients() == [patients[0], patients[1]]
+    assert index.cohort('4548-4', start=date(2020, 1, 1), stop=date(2021, 1, 1)).patients() == [patients[0]]
+    assert index.cohort('44054006', stop=date(2016, 1, 1)).patients() == [patients[0]]
+    assert index.encounters('4548-4', stop=date(2021, 1, 1)) == [encounters[0], encounters[3]]
+    assert index.encounters('860975') == [encounters[0], encounters[2]]
+
+
+def test_save_and_memory_map(tmp_path):
+    export = tmp_path / 'csv'
+    export.mkdir()
+    patients, _ = write_coded_export(export)
+    built = CodeIndex.build(export)
+    built.save(tmp_path / 'codes.idx')
+
+    with CodeIndex.open(tmp_path / 'codes.idx') as index:
+        assert index.codes() == ['38341003', '44054006', '4548-4', '860975']
+        assert index.tables('860975') == ['medications']
+        assert (index.cohort('44054006') & index.cohort('860975')).patients() == [patients[0]]
+        assert index.cohort('4548-4', start=date(2021, 1, 1)).patients() == [patients[1]]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.idx'
+    path.write_bytes(b'not an index at all, but long enough to have a trailer')
+    with pytest.raises(ValueError):
+        CodeIndex.open(path)
+
+
+def test_cohorts_from_different_indexes(tmp_path):
+    write_coded_export(tmp_path)
+    first, second = CodeIndex.build(tmp_path), CodeIndex.build(tmp_path)
+    with pytest.raises(ValueError):
+        first.cohort('860975') & second.cohort('860975')
+
+
+@pytest.mark.parametrize('sorted_', [False, True])
+def test_packed_ints_round_trip(sorted_):
+    values = [random.randint(-2**40, 2**40) for _ in range(2500)]
+    if sorted_:
+        values.sort()
+    packed = pack_ints(values, sorted_=sorted_)
+
+    decoded, end = unpack_ints(packed + b'tail', sorted_=sorted_)
+
+    assert list(decoded) == values
+    assert end == len(packed)
+
+
+def test_varints():
+    out = bytearray()
+    for value in (0, 1, -1, 127, -300, 2**62):
+        write_varint(out, zigzag(value))
+    pos, decoded = 0, []
+    while pos < len(out):
+        value, pos = read_varint(out, pos)
+        decoded.append(unzigzag(value))
+    assert decoded == [0, 1, -1, 127, -300, 2**62]
+    with pytest.raises(ValueError):
+        pack_ints([2, 1], sorted_=True)
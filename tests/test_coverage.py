@@ -0,0 +1,99 @@
+"""Tests for the coverage module."""
+
+import random
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from conftest import make_encounter, write_csv
+from synthea_pydantic import Coverage, CoverageTimeline, PayerTransition
+
+PATIENT = uuid4()
+MEDICARE, MEDICAID, PRIVATE, SUPPLEMENT = (uuid4() for _ in range(4))
+
+
+def transition(patient, start, end, payer, secondary=None):
+    return PayerTransition(
+        PATIENT=str(patient), START_YEAR=str(start), END_YEAR=str(end), PAYER=str(payer),
+        SECONDARY_PAYER=str(secondary) if secondary else '',
+    )
+
+
+def test_segments_and_lookups():
+    timeline = CoverageTimeline([
+        transition(PATIENT, 2010, 2014, PRIVATE),
+        transition(PATIENT, 2015, 2019, MEDICARE, SUPPLEMENT),
+        transition(PATIENT, 2022, 2023, MEDICAID),
+    ])
+
+    assert timeline.segments(PATIENT) == [
+        (2010, 2014, Coverage(PRIVATE, None)),
+        (2015, 2019, Coverage(MEDICARE, SUPPLEMENT)),
+        (2022, 2023, Coverage(MEDICAID, None)),
+    ]
+    assert timeline.at(PATIENT, 2014) == Coverage(PRIVATE, None)
+    assert timeline.at(PATIENT, date(2015, 1, 1)) == Coverage(MEDICARE, SUPPLEMENT)
+    assert timeline.at(PATIENT, datetime(2019, 12, 31, tzinfo=timezone.utc)).secondary == SUPPLEMENT
+    assert timeline.at(PATIENT, 2020) == Coverage(None, None)
+    assert timeline.at(PATIENT, 2009) == Coverage(None, None)
+    assert timeline.at(PATIENT, 2024) == Coverage(None, None)
+    assert timeline.at(uuid4(), 2015) == Coverage(None, None)
+
+
+def test_overlaps_prefer_latest_start_and_merge():
+    timeline = CoverageTimeline([
+        transition(PATIENT, 2010, 2020, PRIVATE),
+        transition(PATIENT, 2015, 2016, MEDICAID),
+        transition(PATIENT, 2017, 2018, PRIVATE),
+    ])
+
+    assert timeline.segments(PATIENT) == [
+        (2010, 2014, Coverage(PRIVATE, None)),
+        (2015, 2016, Coverage(MEDICAID, None)),
+        (2017, 2020, Coverage(PRIVATE, None)),
+    ]
+    assert len(timeline) == 3
+
+
+def test_batch_matches_scan():
+    rng = random.Random(7)
+    patients = [uuid4() for _ in range(30)]
+    payers = [uuid4() for _ in range(5)]
+    transitions = []
+    for patient in patients:
+        year = rng.randint(1990, 2000)
+        for _ in range(rng.randint(1, 6)):
+            end = year + rng.randint(0, 4)
+            transitions.append(transition(patient, year, end, rng.choice(payers), rng.choice([None, *payers])))
+            year = end + rng.randint(1, 3)
+    timeline = CoverageTimeline(transitions)
+    lookups = [(rng.choice(patients), rng.randint(1985, 2030)) for _ in range(2000)]
+
+    def scan(patient, year):
+        covering = [t for t in transitions if t.patient == patient and t.start_year <= year <= t.end_year]
+        return Coverage(covering[-1].payer, covering[-1].secondary_payer) if covering else Coverage(None, None)
+
+    resolved = timeline.resolve([patient for patient, _ in lookups], [year for _, year in lookups])
+    assert resolved == [scan(patient, year) for patient, year in lookups]
+
+
+def test_annotate_records(tmp_path):
+    path = write_csv(tmp_path / 'payer_transitions.csv', [transition(PATIENT, 2019, 2020, MEDICARE)])
+    timeline = CoverageTimeline.from_csv(path)
+    encounters = [make_encounter(i).model_copy(update={'patient': PATIENT}) for i in range(5)]
+    encounters.append(encounters[0].model_copy(update={'start': datetime(2021, 1, 1, tzinfo=timezone.utc)}))
+
+    annotated = list(timeline.annotate(encounters, batch_size=2))
+
+    assert [record for record, _ in annotated] == encounters
+    assert [coverage.primary for _, coverage in annotated] == [MEDICARE] * 5 + [None]
+    with pytest.raises(TypeError, match="PayerTransition"):
+        timeline.resolve_records([transition(PATIENT, 2019, 2020, MEDICARE)])
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError, match="Invalid coverage years"):
+        CoverageTimeline([transition(PATIENT, 2020, 2019, MEDICARE)])
+    with pytest.raises(ValueError, match="dates"):
+        CoverageTimeline([]).resolve([PATIENT], [])
@@ -0,0 +1,132 @@
+"""Tests for the deidentify module."""
+
+import gzip
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import make_encounter, make_patient, write_csv, write_export
+from synthea_pydantic import Encounter, Patient, PayerTransition, Pseudonymizer, pseudonymize_export
+
+KEY = b'test-key'
+
+
+def test_mappings_are_keyed_and_deterministic():
+    pseudonymizer = Pseudonymizer(KEY, max_shift_days=3)
+    patient = str(make_patient().id)
+
+    mapped = pseudonymizer.uuid(patient)
+    assert mapped != patient and mapped == Pseudonymizer(KEY).uuid(patient.upper())
+    assert mapped != Pseudonymizer(b'other-key').uuid(patient)
+    assert mapped[14] == '4'
+    assert pseudonymizer.mask('SSN', '999-52-8591') == Pseudonymizer(KEY).mask('SSN', '999-52-8591')
+    assert pseudonymizer.mask('SSN', '999-52-8591') != pseudonymizer.mask('DRIVERS', '999-52-8591')
+    shifts = {pseudonymizer.shift(str(make_patient().id)).days for _ in range(200)}
+    assert shifts == {-3, -2, -1, 1, 2, 3}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_export_stays_consistent_across_tables(tmp_path, workers):
+    (tmp_path / 'src').mkdir()
+    patients, encounters = write_export(tmp_path / 'src', patients=4, encounters=12)
+    write_csv(tmp_path / 'src' / 'payer_transitions.csv', [
+        PayerTransition(
+            PATIENT=str(patient.id), START_YEAR='2010', END_YEAR='2020', PAYER=str(encounters[0].payer),
+            OWNERNAME='Damon455 Langosh790',
+        )
+        for patient in patients
+    ])
+
+    counts = pseudonymize_export(tmp_path / 'src', tmp_path / 'dst', KEY, workers=workers)
+
+    assert counts == {'encounters': 12, 'patients': 4, 'payer_transitions': 4}
+    pseudonymizer = Pseudonymizer(KEY)
+    shared_patients = Patient.from_csv(tmp_path / 'dst' / 'patients.csv')
+    shared_encounters = Encounter.from_csv(tmp_path / 'dst' / 'encounters.csv')
+    shared_transitions = PayerTransition.from_csv(tmp_path / 'dst' / 'payer_transitions.csv')
+    by_id = {patient.id: patient for patient in shared_patients}
+    for original, shared in zip(patients, shared_patients):
+        delta = pseudonymizer.shift(str(original.id))
+        assert delta != timedelta(0)
+        assert str(shared.id) == pseudonymizer.uuid(str(original.id))
+        assert shared.birthdate == original.birthdate + delta
+        assert shared.ssn != original.ssn and shared.first != original.first and shared.address != original.address
+        assert (shared.race, shared.gender, shared.state) == (original.race, original.gender, original.state)
+        assert shared.city != original.city
+    for original, shared in zip(encounters, shared_encounters):
+        assert shared.patient in by_id
+        assert shared.start == original.start + pseudonymizer.shift(str(original.patient))
+        assert str(shared.payer) == pseudonymizer.uuid(str(original.payer))
+        assert (shared.description, shared.total_claim_cost) == (original.description, original.total_claim_cost)
+    assert {transition.patient for transition in shared_transitions} == set(by_id)
+    assert all(transition.start_year == 2010 for transition in shared_transitions)
+    assert len({transition.owner_name for transition in shared_transitions}) == 1
+    assert shared_transitions[0].owner_name != 'Damon455 Langosh790'
+
+
+def test_start_date_layout_shifts_timestamps(tmp_path):
+    patient = str(make_patient().id)
+    payer = str(make_encounter(0).payer)
+    (tmp_path / 'payer_transitions.csv').write_text(
+        'PATIENT,MEMBERID,START_DATE,END_DATE,PAYER,SECONDARY_PAYER,PLAN_OWNERSHIP,OWNER_NAME\n'
+        f'{patient},,2010-01-03T08:00:00Z,2011-01-03T08:00:00Z,{payer},,Self,Damon455 Langosh790\n'
+        f'{patient},,2011,2012,{payer},,Self,Damon455 Langosh790\n'
+    )
+    pseudonymizer = Pseudonymizer(KEY)
+
+    pseudonymizer.pseudonymize_csv(tmp_path / 'payer_transitions.csv', tmp_path / 'shared.csv')
+
+    rows = [line.split(',') for line in (tmp_path / 'shared.csv').read_text().splitlines()[1:]]
+    delta = pseudonymizer.shift(patient)
+    assert rows[0][2] == (date(2010, 1, 3) + delta).isoformat() + 'T08:00:00Z'
+    assert rows[0][3] == (date(2011, 1, 3) + delta).isoformat() + 'T08:00:00Z'
+    assert rows[1][2:4] == ['2011', '2012']
+    assert rows[0][0] == pseudonymizer.uuid(patient)
+
+
+def test_patient_location_is_masked():
+    header = ['Id', 'BIRTHDATE', 'ADDRESS', 'CITY', 'STATE', 'COUNTY', 'ZIP', 'LAT']
+    patient = str(make_patient().id)
+    row = Pseudonymizer(KEY).row_function('patients', header)(
+        [patient, '1980-02-24', '1 Main St', 'Boston', 'Massachusetts', 'Suffolk County', '02108', '42.36']
+    )
+
+    assert row[4] == 'Massachusetts'
+    assert not {'1 Main St', 'Boston', 'Suffolk County', '02108'} & set(row)
+    assert row[7] == ''
+
+
+def test_short_rows_are_padded(tmp_path):
+    encounter = make_encounter()
+    path = write_csv(tmp_path / 'encounters.csv', [encounter])
+    header = path.read_text().splitlines()[0]
+    path.write_text(f"{header}\n{encounter.id},2020-01-01T10:00:00Z,,{encounter.patient},{encounter.organization}\n")
+    pseudonymizer = Pseudonymizer(KEY)
+
+    assert pseudonymizer.pseudonymize_csv(path, tmp_path / 'shared.csv') == 1
+
+    row = (tmp_path / 'shared.csv').read_text().splitlines()[1].split(',')
+    assert len(row) == len(header.split(','))
+    assert row[3] == pseudonymizer.uuid(str(encounter.patient))
+    assert row[5:] == [''] * (len(row) - 5)
+
+
+def test_compressed_export(tmp_path):
+    (tmp_path / 'src').mkdir()
+    write_export(tmp_path / 'src', patients=4, encounters=12)
+    for path in list((tmp_path / 'src').iterdir()):
+        path.with_name(path.name + '.gz').write_bytes(gzip.compress(path.read_bytes()))
+        path.unlink()
+
+    pseudonymize_export(tmp_path / 'src', tmp_path / 'a', KEY, workers=1)
+    pseudonymize_export(tmp_path / 'src', tmp_path / 'b', KEY, workers=1)
+
+    assert len(Encounter.from_csv(tmp_path / 'a' / 'encounters.csv.gz')) == 12
+    assert Patient.from_csv(tmp_path / 'a' / 'patients.csv.gz') == Patient.from_csv(tmp_path / 'b' / 'patients.csv.gz')
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError, match="key"):
+        pseudonymize_export(tmp_path, tmp_path / 'dst', b'')
+    with pytest.raises(ValueError, match="max_shift_days"):
+        Pseudonymizer(KEY, max_shift_days=0)
@@ -0,0 +1,82 @@
+"""Tests for the diff module."""
+
+import gzip
+from collections import Counter
+
+import pytest
+
+from conftest import make_encounter, make_observation, make_patient, write_csv
+from synthea_pydantic import diff_exports
+from synthea_pydantic.diff import diff_table
+
+
+def write_exports(tmp_path):
+    (tmp_path / 'old').mkdir()
+    (tmp_path / 'new').mkdir()
+    patients = [make_patient() for _ in range(3)]
+    encounters = [make_encounter(i) for i in range(50)]
+    observations = [make_observation('170', 'numeric'), make_observation('170', 'numeric')]
+    write_csv(tmp_path / 'old' / 'patients.csv', patients)
+    write_csv(tmp_path / 'old' / 'encounters.csv', encounters)
+    write_csv(tmp_path / 'old' / 'observations.csv', observations)
+
+    patients[1] = patients[1].model_copy(update={'last': 'Renamed'})
+    encounters = encounters[5:] + [make_encounter(50)]
+    encounters[0] = encounters[0].model_copy(update={'description': 'Edited', 'stop': None})
+    observations[1] = make_observation('171', 'numeric')
+    write_csv(tmp_path / 'new' / 'patients.csv', patients)
+    write_csv(tmp_path / 'new' / 'observations.csv', observations)
+    plain = write_csv(tmp_path / 'encounters.csv', encounters)
+    (tmp_path / 'new' / 'encounters.csv.gz').write_bytes(gzip.compress(plain.read_bytes()))
+    plain.unlink()
+    return patients, encounters
+
+
+@pytest.mark.parametrize('buckets', [1, 7])
+def test_change_sets(tmp_path, buckets):
+    patients, encounters = write_exports(tmp_path)
+
+    changes = list(diff_exports(tmp_path / 'old', tmp_path / 'new', buckets=buckets, tmp_dir=tmp_path))
+
+    assert Counter((change.table, change.kind) for change in changes) == {
+        ('encounters', 'removed'): 5,
+        ('encounters', 'added'): 1,
+        ('encounters', 'changed'): 1,
+        ('observations', 'changed'): 1,
+        ('patients', 'changed'): 1,
+    }
+    by_kind = {(change.table, change.kind): change for change in changes}
+    edited = by_kind['encounters', 'changed']
+    assert edited.key == (str(encounters[0].id),)
+    assert edited.fields == {
+        'STOP': ('2020-01-01T10:30:00.250000Z', ''),
+        'DESCRIPTION': ('Visit 5', 'Edited'),
+    }
+    assert by_kind['encounters', 'added'].fields['Id'] == ('', str(encounters[-1].id))
+    assert by_kind['patients', 'changed'].fields == {'LAST': ('Langosh790', 'Renamed')}
+    observation = by_kind['observations', 'changed']
+    assert observation.occurrence == 1 and observation.fields == {'VALUE': ('170.0', '171.0')}
+    assert list(tmp_path.glob('synthea-diff-*')) == []
+
+
+def test_missing_tables_and_versions(tmp_path):
+    for version in ('v1', 'v2', 'bad'):
+        (tmp_path / version).mkdir()
+    old = tmp_path / 'v1' / 'payer_transitions.csv'
+    new = tmp_path / 'v2' / 'payer_transitions.csv'
+    bad = tmp_path / 'bad' / 'payer_transitions.csv'
+    old.write_text('PATIENT,START_DATE,END_DATE,PAYER\np1,2010-01-01T00:00:00Z,2012-12-31,x\n')
+    new.write_text('PATIENT,START_YEAR,END_YEAR,PAYER\np1,2010,2013,x\n')
+    bad.write_text('PATIENT,PAYER\np1,x\n')
+
+    changes = list(diff_table(old, new))
+
+    assert [(change.kind, change.fields) for change in changes] == [('changed', {'END_YEAR': ('2012', '2013')})]
+    assert [change.kind for change in diff_table(None, new)] == ['added']
+    assert [change.kind for change in diff_table(old, None)] == ['removed']
+    with pytest.raises(ValueError, match="key column"):
+        list(diff_table(old, bad))
+    (tmp_path / 'v1' / 'encounters.csv').write_text('')
+    (tmp_path / 'v2' / 'encounters.csv').write_text('')
+    assert list(diff_table(tmp_path / 'v1' / 'encounters.csv', tmp_path / 'v2' / 'encounters.csv')) == []
+    assert list(diff_table(tmp_path / 'v1' / 'encounters.csv', None)) == []
@@ -0,0 +1,170 @@
+"""Tests for the fhir module."""
+
+import json
+from uuid import uuid4
+
+import pytest
+
+from conftest import (
+    PAYER,
+    PROVIDER,
+    make_condition,
+    make_encounter,
+    make_medication,
+    make_observation,
+    make_patient,
+    make_procedure,
+    write_csv,
+    write_export,
+)
+from synthea_pydantic import Allergy, CarePlan, Claim, Immunization, Supply
+from synthea_pydantic.fhir import bundle_json, iter_bundles, resource_json, write_bundles
+
+
+def make_records(patient, encounter=None):
+    if encounter is None:
+        encounter = make_encounter(
+            STOP='2020-01-01T10:30:00Z', PATIENT=str(patient.id), PROVIDER=str(PROVIDER), PAYER=str(PAYER),
+            CODE='50849002', DESCRIPTION='Emergency room admission', REASONCODE='444814009',
+            REASONDESCRIPTION='Viral sinusitis',
+        )
+    common = dict(PATIENT=str(patient.id), ENCOUNTER=str(encounter.id))
+    return [
+        encounter,
+        make_condition(CODE='444814009', DESCRIPTION='Viral sinusitis', **common),
+        make_observation('180.2', 'numeric', CATEGORY='vital-signs', **common),
+        make_observation(
+            'Never smoked', 'text', CODE='72166-2', DESCRIPTION='Tobacco smoking status', UNITS='', **common,
+        ),
+        make_medication(
+            CODE='313782', DESCRIPTION='Acetaminophen 325 MG', BASE_COST='8.00', TOTALCOST='8.00', **common,
+        ),
+        make_procedure(CODE='23426006', DESCRIPTION='Pulmonary test', **common),
+        Immunization(DATE='2020-01-01T10:00:00Z', CODE='140', DESCRIPTION='Influenza', BASE_COST='140.52', **common),
+        Allergy(
+            START='2020-01-01', CODE='300916003', SYSTEM='SNOMED-CT', DESCRIPTION='Latex allergy',
+            TYPE='allergy', CATEGORY='environment', REACTION1='247472004', DESCRIPTION1='Wheal', SEVERITY1='MILD',
+            **common,
+        ),
+        CarePlan(Id=str(uuid4()), START='2020-01-01', CODE='53950000', DESCRIPTION='Respiratory therapy', **common),
+        Claim(
+            Id=str(uuid4()), PATIENTID=str(patient.id), PROVIDERID=str(PROVIDER), PRIMARYPATIENTINSURANCEID=str(PAYER),
+            DEPARTMENTID='3', PATIENTDEPARTMENTID='3', DIAGNOSIS1='444814009', APPOINTMENTID=str(encounter.id),
+            CURRENTILLNESSDATE='2020-01-01T10:00:00Z', SERVICEDATE='2020-01-01T10:00:00Z', HEALTHCARECLAIMTYPEID1='1',
+        ),
+    ]
+
+
+def resources(bundle):
+    return [entry['resource'] for entry in json.loads(bundle)['entry']]
+
+
+def test_bundle_contains_every_resource_type():
+    patient = make_patient()
+    bundle = json.loads(bundle_json([patient, *make_records(patient)]))
+
+    assert bundle['resourceType'] == 'Bundle'
+    assert bundle['type'] == 'transaction'
+    types = [entry['resource']['resourceType'] for entry in bundle['entry']]
+    assert types == [
+        'Patient', 'Encounter', 'Condition', 'Observation', 'Observation', 'MedicationRequest',
+        'Procedure', 'Immunization', 'AllergyIntolerance', 'CarePlan', 'Claim',
+    ]
+    for entry in bundle['entry']:
+        assert entry['fullUrl'] == f"urn:uuid:{entry['resource']['id']}"
+        assert entry['request'] == {'method': 'POST', 'url': entry['resource']['resourceType']}
+
+
+def test_references_resolve_within_bundle():
+    patient = make_patient()
+    bundle = json.loads(bundle_json([patient, *make_records(patient)]))
+
+    full_urls = {entry['fullUrl'] for entry in bundle['entry']}
+    for entry in bundle['entry']:
+        resource = entry['resource']
+        for field in ('subject', 'patient', 'encounter'):
+            if isinstance(resource.get(field), dict):
+                assert resource[field]['reference'] in full_urls
+
+
+def test_patient_resource_escapes_strings():
+    patient = make_patient(MAIDEN='Müller', MARITAL='M', ADDRESS='1 "Main" Street')
+    resource = json.loads(resource_json(patient))
+
+    assert resource['id'] == str(patient.id)
+    assert resource['gender'] == 'male'
+    assert resource['birthDate'] == '1980-02-24'
+    assert resource['address'][0]['line'] == ['1 "Main" Street']
+    assert resource['name'][1] == {'use': 'maiden', 'family': 'Müller', 'given': ['Damon455']}
+    assert resource['maritalStatus']['coding'][0]['code'] == 'M'
+
+
+def test_observation_values():
+    patient = make_patient()
+    _, _, numeric, text, *_ = make_records(patient)
+
+    quantity = json.loads(resource_json(numeric, uuid4()))
+    string = json.loads(resource_json(text, uuid4()))
+
+    assert quantity['valueQuantity'] == {
+        'value': 180.2, 'unit': 'cm', 'system': 'http://unitsofmeasure.org', 'code': 'cm',
+    }
+    assert quantity['category'][0]['coding'][0]['code'] == 'vital-signs'
+    assert quantity['code']['coding'][0]['system'] == 'http://loinc.org'
+    assert string['valueString'] == 'Never smoked'
+
+
+def test_resource_ids_are_deterministic():
+    patient = make_patient()
+    records = [patient, *make_records(patient)]
+
+    assert bundle_json(records) == bundle_json(records)
+
+
+def test_unsupported_model():
+    supply = Supply(
+        DATE='2020-01-01', PATIENT=str(uuid4()), ENCOUNTER=str(uuid4()),
+        CODE='1', DESCRIPTION='Gloves', QUANTITY='1',
+    )
+    with pytest.raises(TypeError):
+        resource_json(supply)
+
+
+def write_fhir_export(directory, patients):
+    patients, encounters = write_export(directory, patients=patients, encounters=patients)
+    tables = ('conditions', 'observations', 'observations', 'medications', 'procedures', 'immunizations',
+              'allergies', 'careplans', 'claims')
+    records = {name: [] for name in tables}
+    for patient, encounter in zip(patients, encounters):
+        for record, name in zip(make_records(patient, encounter)[1:], tables):
+            records[name].append(record)
+    for name, rows in records.items():
+        write_csv(directory / f"{name}.csv", rows)
+    return patients
+
+
+def test_iter_bundles_groups_by_patient(tmp_path):
+    patients = write_fhir_export(tmp_path, 6)
+
+    bundles = dict(iter_bundles(tmp_path, partitions=3))
+
+    assert set(bundles) == {patient.id for patient in patients}
+    for patient in patients:
+        converted = resources(bundles[patient.id])
+        assert converted[0]['id'] == str(patient.id)
+        assert len(converted) == 11
+        assert {resource.get('subject', resource.get('patient', {})).get('reference')
+                for resource in converted[1:]} == {f"urn:uuid:{patient.id}"}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_write_bundles(tmp_path, workers):
+    export = tmp_path / 'csv'
+    export.mkdir()
+    patients = write_fhir_export(export, 4)
+
+    count = write_bundles(export, tmp_path / 'fhir', workers=workers, partitions=2)
+
+    assert count == 4
+    written = sorted(path.stem for path in (tmp_path / 'fhir').iterdir())
+    assert written == sorted(str(patient.id) for patient in patients)
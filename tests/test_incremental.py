@@ -0,0 +1,98 @@
+"""Tests for the incremental module."""
+
+import dataclasses
+
+import pytest
+
+from conftest import ENCOUNTER, PATIENT, make_condition, write_csv
+from synthea_pydantic import Condition
+from synthea_pydantic.incremental import Checkpoint, IncrementalLoader
+
+
+def append_rows(path, text):
+    with open(path, 'a', newline='') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return write_csv(tmp_path / "conditions.csv", [make_condition(CODE='1'), make_condition(CODE='2')])
+
+
+def test_initial_load_then_tail(csv_path):
+    """Test that only appended rows are validated after the first load."""
+    loader = IncrementalLoader(Condition, csv_path)
+
+    batch = loader.load()
+    assert batch.reloaded
+    assert [c.code for c in batch.records] == ['1', '2']
+    assert loader.checkpoint.rows == 2
+
+    batch = loader.load()
+    assert not batch.reloaded
+    assert batch.records == []
+
+    append_rows(csv_path, f"2019-04-01,,{PATIENT},{ENCOUNTER},3,Condition 3\r\n")
+    batch = loader.load()
+    assert not batch.reloaded
+    assert [c.code for c in batch.records] == ['3']
+    assert batch.records[0].patient == PATIENT
+    assert loader.checkpoint.rows == 3
+
+
+def test_partial_trailing_row_is_deferred(csv_path):
+    """Test that a row still being written is picked up on the next call."""
+    loader = IncrementalLoader(Condition, csv_path)
+    loader.load()
+
+    append_rows(csv_path, f"2019-04-01,,{PATIENT},{ENCOUNTER},3,Condi")
+    assert loader.load().records == []
+
+    append_rows(csv_path, "tion 3\r\n")
+    assert [c.description for c in loader.load().records] == ['Condition 3']
+
+
+def test_unclosed_multiline_row_is_deferred(csv_path):
+    """Test that a quoted multi-line value cut off at EOF is not consumed."""
+    loader = IncrementalLoader(Condition, csv_path)
+    loader.load()
+    checkpoint = loader.checkpoint
+
+    append_rows(csv_path, f'2019-04-01,,{PATIENT},{ENCOUNTER},3,"Condition\r\n')
+    assert loader.load().records == []
+    assert loader.checkpoint == checkpoint
+
+    append_rows(csv_path, '3 with ""notes"""\r\n')
+    assert [c.description for c in loader.load().records] == ['Condition\r\n3 with "notes"']
+    assert loader.checkpoint.rows == 3
+    assert loader.load().records == []
+
+
+def test_truncation_and_rewrite_trigger_full_reload(csv_path, tmp_path):
+    """Test that truncated or rewritten files are reloaded from scratch."""
+    loader = IncrementalLoader(Condition, csv_path)
+    loader.load()
+
+    write_csv(csv_path, [make_condition(CODE='9')])
+    batch = loader.load()
+    assert batch.reloaded
+    assert [c.code for c in batch.records] == ['9']
+
+    # Same size, different content in the last consumed row
+    write_csv(csv_path, [make_condition(CODE='8')])
+    batch = loader.load()
+    assert batch.reloaded
+    assert [c.code for c in batch.records] == ['8']
+
+
+def test_checkpoint_can_be_persisted(csv_path):
+    """Test resuming from a checkpoint saved by a previous run."""
+    first = IncrementalLoader(Condition, csv_path)
+    first.load()
+    saved = dataclasses.asdict(first.checkpoint)
+
+    append_rows(csv_path, f"2019-04-01,,{PATIENT},{ENCOUNTER},3,Condition 3\r\n")
+    resumed = IncrementalLoader(Condition, csv_path, checkpoint=Checkpoint(**saved))
+    batch = resumed.load()
+    assert not batch.reloaded
+    assert [c.code for c in batch.records] == ['3']
@@ -0,0 +1,100 @@
+"""Tests for the intervals module."""
+
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+import pytest
+
+from conftest import OTHER_PATIENT, PATIENT, PAYER, make_condition, make_medication, write_csv
+from synthea_pydantic import Condition, Medication, Patient, PayerTransition
+from synthea_pydantic.intervals import OPEN_END, IntervalIndex, interval_of
+
+
+@pytest.fixture
+def conditions():
+    return [
+        make_condition(START='2015-01-01', CODE='chronic'),
+        make_condition(START='2019-03-01', STOP='2019-03-15', CODE='acute'),
+        make_condition(START='2010-05-01', STOP='2010-06-01', CODE='old'),
+        make_condition(START='2019-03-10', STOP='2019-04-01', CODE='overlap'),
+        make_condition(PATIENT=str(OTHER_PATIENT), START='2019-03-01', STOP='2019-03-15', CODE='other-patient'),
+    ]
+
+
+def codes(records):
+    return [record.code for record in records]
+
+
+def test_active_at(conditions):
+    """Test point-in-time queries, including open-ended intervals."""
+    index = IntervalIndex().update(conditions)
+
+    assert codes(index.active_at(PATIENT, date(2019, 3, 12))) == ['chronic', 'acute', 'overlap']
+    assert codes(index.active_at(PATIENT, date(2019, 3, 15))) == ['chronic', 'overlap']
+    assert codes(index.active_at(PATIENT, date(2010, 5, 15))) == ['old']
+    assert codes(index.active_at(PATIENT, date(2050, 1, 1))) == ['chronic']
+    assert index.active_at(PATIENT, date(2000, 1, 1)) == []
+    assert index.active_at(UUID(int=0), date(2019, 3, 12)) == []
+
+
+def test_same_day_intervals_are_active_on_that_day():
+    index = IntervalIndex().update([make_condition(START='2019-03-01', STOP='2019-03-01', CODE='same-day')])
+
+    assert codes(index.active_at(PATIENT, date(2019, 3, 1))) == ['same-day']
+    assert codes(index.active_at(PATIENT, datetime(2019, 3, 1, 18, tzinfo=timezone.utc))) == ['same-day']
+    assert index.active_at(PATIENT, date(2019, 3, 2)) == []
+    assert codes(index.overlapping(PATIENT, date(2019, 3, 1), date(2019, 3, 2))) == ['same-day']
+
+
+def test_overlapping(conditions):
+    """Test range-overlap queries."""
+    index = IntervalIndex().update(conditions)
+
+    assert codes(index.overlapping(PATIENT, date(2010, 1, 1), date(2015, 1, 1))) == ['old']
+    assert codes(index.overlapping(PATIENT, date(2019, 3, 14), date(2019, 3, 16))) == \
+        ['chronic', 'acute', 'overlap']
+    assert codes(index.overlapping(PATIENT, date(2019, 4, 1))) == ['chronic']
+
+
+def test_matches_linear_scan(conditions):
+    """Test that the index agrees with a brute-force scan."""
+    index = IntervalIndex().update(conditions)
+    for day in range(1, 400, 7):
+        when = datetime(2018, 12, 1, tzinfo=timezone.utc).timestamp() + day * 86400
+        expected = sorted(
+            c.code for c in conditions
+            if c.patient == PATIENT and interval_of(c)[0] <= when < interval_of(c)[1]
+        )
+        assert sorted(codes(index.active_at(PATIENT, int(when)))) == expected
+
+
+def test_kinds_and_payer_transitions(conditions):
+    """Test filtering by model and inclusive payer transition years."""
+    transition = PayerTransition(
+        PATIENT=str(PATIENT), START_YEAR='2018', END_YEAR='2019', PAYER=str(PAYER),
+    )
+    index = IntervalIndex().update(conditions)
+    index.add(make_medication(START='2019-03-01T10:00:00Z', CODE='834061'))
+    index.add(transition)
+
+    when = date(2019, 12, 31)
+    assert codes(index.active_at(PATIENT, when, kinds=(Medication,))) == ['834061']
+    assert index.active_at(PATIENT, when, kinds=(PayerTransition,)) == [transition]
+    assert index.active_at(PATIENT, date(2020, 1, 1), kinds=(PayerTransition,)) == []
+    assert len(index.active_at(PATIENT, when)) == 3
+    assert len(index) == 7
+
+
+def test_interval_of_and_unsupported_records(conditions):
+    """Test interval conversion and rejection of models without intervals."""
+    assert interval_of(conditions[0])[1] == OPEN_END
+    with pytest.raises(TypeError):
+        IntervalIndex().add(Patient.model_construct(id=PATIENT))
+
+
+def test_add_csv(tmp_path, conditions):
+    """Test building the index in a streaming pass over a CSV file."""
+    csv_path = write_csv(tmp_path / "conditions.csv", conditions)
+    index = IntervalIndex().add_csv(Condition, csv_path)
+    assert set(index.patients()) == {PATIENT, OTHER_PATIENT}
+    assert codes(index.active_at(OTHER_PATIENT, date(2019, 3, 1))) == ['other-patient']
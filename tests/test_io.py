@@ -0,0 +1,109 @@
+"""Tests for reading compressed CSV exports."""
+
+import bz2
+import gzip
+import lzma
+import struct
+import zlib
+
+import pytest
+
+from conftest import make_condition, write_csv
+from synthea_pydantic import Condition, open_csv
+from synthea_pydantic._io import detect_compression, open_binary
+
+@pytest.fixture
+def plain_csv(tmp_path):
+    conditions = [
+        make_condition(CODE=str(i), DESCRIPTION=f'Condition {i}') for i in range(500)
+    ]
+    return write_csv(tmp_path / "conditions.csv", conditions)
+
+
+def bgzf_compress(data, block_size=1000):
+    """Compress data as BGZF: gzip members with a BC subfield holding their size."""
+    out = bytearray()
+    for i in range(0, len(data), block_size):
+        chunk = data[i:i + block_size]
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        deflated = compressor.compress(chunk) + compressor.flush()
+        block_size_field = 18 + len(deflated) + 8 - 1
+        out += b'\x1f\x8b\x08\x04' + b'\x00' * 4 + b'\x00\xff' + struct.pack('<H', 6)
+        out += b'BC' + struct.pack('<HH', 2, block_size_field)
+        out += deflated + struct.pack('<II', zlib.crc32(chunk), len(chunk))
+    return bytes(out)
+
+
+def zstd_seekable_compress(zstandard, data, frame_size=1000):
+    """Compress data as independent zstd frames followed by a seek table."""
+    frames, entries = [], []
+    for i in range(0, len(data), frame_size):
+        frame = zstandard.ZstdCompressor().compress(data[i:i + frame_size])
+        frames.append(frame)
+        entries.append(struct.pack('<II', len(frame), len(data[i:i + frame_size])))
+    footer = struct.pack('<IBI', len(entries), 0, 0x8F92EAB1)
+    table = b''.join(entries) + footer
+    skippable = struct.pack('<II', 0x184D2A5E, len(table))
+    return b''.join(frames) + skippable + table
+
+
+def load(path, threads=None):
+    with open_csv(path, threads=threads) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("suffix,compress,expected", [
+    ('.gz', gzip.compress, 'gzip'),
+    ('.bz2', bz2.compress, 'bz2'),
+    ('.xz', lzma.compress, 'xz'),
+    ('.bgz', bgzf_compress, 'gzip'),
+])
+def test_stdlib_formats(tmp_path, plain_csv, suffix, compress, expected):
+    """Test transparent decompression of stdlib-supported formats."""
+    data = plain_csv.read_bytes()
+    # Misleading extension: detection relies on magic bytes
+    path = tmp_path / "conditions.dat"
+    path.write_bytes(compress(data))
+
+    assert detect_compression(path) == expected
+    assert load(path) == load(plain_csv)
+    assert load(path, threads=1) == load(plain_csv)
+    assert Condition.from_csv(path) == Condition.from_csv(plain_csv)
+
+
+def test_bgzf_parallel_reads_all_blocks(tmp_path, plain_csv):
+    """Test that block-parallel BGZF decoding preserves order and content."""
+    data = plain_csv.read_bytes()
+    path = tmp_path / "conditions.csv.gz"
+    path.write_bytes(bgzf_compress(data, block_size=97))
+
+    with open_binary(path, threads=3) as f:
+        assert f.read() == data
+    assert [c.code for c in Condition.iter_csv(path)] == [str(i) for i in range(500)]
+
+
+def test_zstd_formats(tmp_path, plain_csv):
+    """Test streaming multi-frame and block-parallel seekable zstd."""
+    zstandard = pytest.importorskip("zstandard")
+    data = plain_csv.read_bytes()
+
+    multi_frame = tmp_path / "multi.csv.zst"
+    multi_frame.write_bytes(b''.join(
+        zstandard.ZstdCompressor().compress(data[i:i + 1000]) for i in range(0, len(data), 1000)
+    ))
+    seekable = tmp_path / "seekable.csv.zst"
+    seekable.write_bytes(zstd_seekable_compress(zstandard, data))
+
+    for path in (multi_frame, seekable):
+        assert detect_compression(path) == 'zstd'
+        with open_binary(path, threads=4) as f:
+            assert f.read() == data
+        assert Condition.from_csv(path) == Condition.from_csv(plain_csv)
+
+
+def test_plain_and_empty_files(tmp_path, plain_csv):
+    """Test that plain files pass through and short files fall back to the suffix."""
+    assert detect_compression(plain_csv) is None
+    empty = tmp_path / "empty.csv.gz"
+    empty.write_bytes(b'')
+    assert detect_compression(empty) == 'gzip'
@@ -0,0 +1,130 @@
+"""Tests for JSON Lines export and import."""
+
+import gzip
+import json
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+
+from conftest import PATIENT, make_encounter, make_observation, make_patient
+from synthea_pydantic import Claim, Encounter, Observation, Patient, PayerTransition
+from synthea_pydantic._io import ChunkWriter, open_binary
+
+PAYER = UUID('7c4411ce-02f1-39b5-b9ec-dfbea9ad3c1a')
+PROVIDER = UUID('e1e0cc3a-fbd3-3f8e-9d1e-5c5b0e6a8f4c')
+
+
+def test_lines_use_csv_column_names(tmp_path):
+    path = tmp_path / 'encounters.jsonl'
+    encounter = make_encounter(1, STOP='')
+
+    assert Encounter.to_jsonl([encounter], path) == 1
+
+    [line] = path.read_text().splitlines()
+    obj = json.loads(line)
+    assert obj['Id'] == str(encounter.id)
+    assert obj['ENCOUNTERCLASS'] == 'wellness'
+    assert obj['TOTAL_CLAIM_COST'] == '1.125'
+    assert obj['STOP'] is None
+
+
+@pytest.mark.parametrize('suffix', ['.jsonl', '.jsonl.gz', '.jsonl.bz2', '.jsonl.xz'])
+def test_round_trip(tmp_path, suffix):
+    path = tmp_path / f"encounters{suffix}"
+    records = [make_encounter(i) for i in range(250)]
+
+    assert Encounter.to_jsonl(records, path, chunk_size=32, threads=3) == 250
+
+    loaded = Encounter.from_jsonl(path)
+    assert loaded == records
+    assert loaded[7].total_claim_cost == Decimal('7.125')
+
+
+def test_zstd_round_trip(tmp_path):
+    pytest.importorskip('zstandard')
+    path = tmp_path / 'encounters.jsonl.zst'
+    records = [make_encounter(i) for i in range(100)]
+
+    Encounter.to_jsonl(records, path, chunk_size=10)
+
+    assert list(Encounter.iter_jsonl(path, threads=2)) == records
+    assert Encounter.from_jsonl(path, threads=2) == records
+
+
+def test_round_trip_with_null_literals(tmp_path):
+    path = tmp_path / 'patients.jsonl'
+    patients = [make_patient(), make_patient().model_copy(update={'marital': 'M'})]
+    assert patients[0].marital is None
+
+    Patient.to_jsonl(patients, path)
+
+    assert Patient.from_jsonl(path) == patients
+
+
+def test_gzip_output_is_readable_by_stdlib(tmp_path):
+    path = tmp_path / 'observations.jsonl.gz'
+    records = [make_observation('180.2', 'numeric'), make_observation('Never smoked', 'text')]
+
+    Observation.to_jsonl(records, path, chunk_size=1)
+
+    with gzip.open(path, 'rt') as f:
+        values = [json.loads(line)['VALUE'] for line in f]
+    assert values == [180.2, 'Never smoked']
+
+
+def test_explicit_compression_overrides_suffix(tmp_path):
+    path = tmp_path / 'encounters.out'
+
+    Encounter.to_jsonl([make_encounter(1)], path, compression='gzip')
+
+    assert path.read_bytes()[:2] == b'\x1f\x8b'
+    assert len(Encounter.from_jsonl(path)) == 1
+
+
+def test_lines_are_preprocessed_like_csv(tmp_path):
+    path = tmp_path / 'claims.jsonl'
+    line = {
+        'Id': str(uuid4()), 'PATIENTID': str(PATIENT), 'PROVIDERID': str(PROVIDER),
+        'PRIMARYPATIENTINSURANCEID': '0', 'DEPARTMENTID': 3, 'PATIENTDEPARTMENTID': 3,
+        'CURRENTILLNESSDATE': '2020-01-01T10:00:00Z', 'SERVICEDATE': '2020-01-01T10:00:00Z',
+        'STATUS1': 'closed', 'HEALTHCARECLAIMTYPEID1': '1', 'DIAGNOSIS1': '',
+    }
+    path.write_text(json.dumps(line) + '\n\n')
+
+    [claim] = Claim.from_jsonl(path)
+
+    assert claim.primarypatientinsuranceid is None
+    assert claim.status1 == 'CLOSED'
+    assert claim.healthcareclaimtypeid1 == 1
+    assert claim.diagnosis1 is None
+
+
+def test_older_layouts_and_missing_trailing_newline(tmp_path):
+    path = tmp_path / 'payer_transitions.jsonl'
+    lines = [
+        {'PATIENT': str(PATIENT), 'START_DATE': '2019-02-24T05:07:38Z', 'END_DATE': '2020-01-01', 'PAYER': str(PAYER)},
+        {'PATIENT': str(PATIENT), 'START_YEAR': 2021, 'END_YEAR': 2022, 'PAYER': str(PAYER)},
+    ]
+    path.write_text('\n'.join(json.dumps(line) for line in lines))
+
+    records = PayerTransition.from_jsonl(path)
+
+    assert [(r.start_year, r.end_year) for r in records] == [(2019, 2020), (2021, 2022)]
+
+
+def test_chunk_writer_preserves_order(tmp_path):
+    path = tmp_path / 'chunks.gz'
+    chunks = [bytes([i]) * (1000 + i) for i in range(50)]
+
+    with ChunkWriter(path, 'gzip', threads=4) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    with open_binary(path, threads=4) as f:
+        assert f.read() == b''.join(chunks)
+
+
+def test_chunk_writer_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        ChunkWriter(tmp_path / 'out', 'lz4')
@@ -0,0 +1,64 @@
+"""Tests for lazy package imports and deferred schema building."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import synthea_pydantic
+
+# Generous bound: a lazy import takes a few milliseconds, an eager one that
+# pulls in pydantic and builds every model takes hundreds.
+MAX_IMPORT_MICROSECONDS = 100_000
+
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).parent.parent,
+    )
+    return result.stdout, result.stderr
+
+
+def test_import_does_not_load_models():
+    """Test that importing the package loads neither pydantic nor any model module."""
+    stdout, _ = run_python(
+        "import sys, synthea_pydantic; "
+        "print(sorted(m for m in sys.modules if m.startswith(('synthea_pydantic.', 'pydantic'))))"
+    )
+    assert stdout.strip() == "[]"
+
+
+def test_import_time_budget():
+    """Benchmark guard: the cumulative import time of the package stays small."""
+    _, stderr = run_python("import synthea_pydantic")
+    line = next(line for line in stderr.splitlines() if line.rstrip().endswith("| synthea_pydantic"))
+    cumulative = int(line.split("|")[1])
+    assert cumulative < MAX_IMPORT_MICROSECONDS, line
+
+
+def test_accessing_one_model_imports_only_its_module():
+    """Test that touching Patient does not import the other model modules."""
+    stdout, _ = run_python(
+        "import sys; from synthea_pydantic import Patient; "
+        "Patient.model_json_schema(); "
+        "print(sorted(m for m in sys.modules if m.startswith('synthea_pydantic.')))"
+    )
+    modules = eval(stdout)
+    assert 'synthea_pydantic.patients' in modules
+    assert 'synthea_pydantic.claims_transactions' not in modules
+    assert 'synthea_pydantic.encounters' not in modules
+
+
+def test_all_names_resolve():
+    """Test that every name in __all__ is reachable and listed by dir()."""
+    for name in synthea_pydantic.__all__:
+        assert getattr(synthea_pydantic, name) is not None
+        assert name in dir(synthea_pydantic)
+
+
+def test_unknown_attribute():
+    """Test that unknown attributes still raise AttributeError."""
+    with pytest.raises(AttributeError):
+        synthea_pydantic.NotAModel
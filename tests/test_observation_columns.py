@@ -0,0 +1,90 @@
+"""Tests for the observation_columns module."""
+
+from datetime import datetime, timezone
+
+from conftest import PATIENT, make_observation, write_csv
+from synthea_pydantic import Observation, ObservationColumns
+from synthea_pydantic.observation_columns import NULL, NUMERIC, TEXT
+
+SMOKING = {'CODE': '72166-2', 'UNITS': ''}
+
+
+def make_observations():
+    return [
+        make_observation('180.2', DATE='2020-01-01T10:00:00Z'),
+        make_observation('Never smoked', 'text', DATE='2020-01-02T10:00:00Z', **SMOKING),
+        make_observation('80.5', DATE='2020-01-03T10:00:00Z', CODE='29463-7', UNITS='kg'),
+        make_observation('181.0', DATE='2020-01-04T10:00:00Z'),
+        make_observation('Never smoked', 'text', DATE='2020-01-05T10:00:00Z', **SMOKING),
+        make_observation('', DATE='2020-01-06T10:00:00Z'),
+        make_observation('unknown', DATE='2020-01-07T10:00:00Z'),
+    ]
+
+
+def test_values_are_split_by_type(tmp_path):
+    path = tmp_path / 'observations.csv'
+    write_csv(path, make_observations())
+
+    columns = ObservationColumns.from_csv(path)
+
+    assert len(columns) == 7
+    assert list(columns.tags) == [NUMERIC, TEXT, NUMERIC, NUMERIC, TEXT, NULL, TEXT]
+    assert list(columns.numbers) == [180.2, 80.5, 181.0]
+    assert list(columns.number_rows) == [0, 2, 3]
+    assert columns.texts == ['Never smoked', 'unknown']
+    assert list(columns.text_ids) == [0, 0, 1]
+
+
+def test_numeric_and_text_by_code(tmp_path):
+    path = tmp_path / 'observations.csv'
+    write_csv(path, make_observations())
+    columns = ObservationColumns.from_csv(path)
+
+    assert list(columns.numeric('8302-2')) == [180.2, 181.0]
+    assert list(columns.numeric_rows('8302-2')) == [0, 3]
+    assert columns.numeric() is columns.numbers
+    assert list(columns.numeric('missing')) == []
+    assert columns.text('72166-2') == ['Never smoked', 'Never smoked']
+    assert columns.text() == ['Never smoked', 'Never smoked', 'unknown']
+
+
+def test_rows_round_trip_to_observations(tmp_path):
+    path = tmp_path / 'observations.csv'
+    records = make_observations()
+    write_csv(path, records)
+
+    columns = ObservationColumns.from_csv(path)
+
+    assert list(columns) == Observation.from_csv(path) == records
+    assert columns[0].value == 180.2
+    assert columns[-1].value == 'unknown'
+    assert columns[1].date == datetime(2020, 1, 2, 10, tzinfo=timezone.utc)
+    assert columns.value(5) is None
+
+
+def test_from_observations_matches_from_csv(tmp_path):
+    path = tmp_path / 'observations.csv'
+    records = make_observations()
+    write_csv(path, records)
+
+    from_records = ObservationColumns.from_observations(records)
+    from_csv = ObservationColumns.from_csv(path)
+
+    assert list(from_records.tags) == list(from_csv.tags)
+    assert from_records.numbers == from_csv.numbers
+    assert list(from_records) == list(from_csv)
+    assert from_records.patients[0] is from_records.patients[1]
+
+
+def test_older_layout_without_category(tmp_path):
+    path = tmp_path / 'observations.csv'
+    path.write_text(
+        'DATE,PATIENT,ENCOUNTER,CODE,DESCRIPTION,VALUE,UNITS,TYPE\n'
+        f"2020-01-01T10:00:00Z,{PATIENT},,8302-2,Body Height,180.2,cm,numeric\n"
+    )
+
+    [observation] = ObservationColumns.from_csv(path)
+
+    assert observation.category is None
+    assert observation.encounter is None
+    assert observation.value == 180.2
@@ -0,0 +1,77 @@
+"""Tests for thread-parallel validation."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import make_encounter, write_csv
+from synthea_pydantic import Encounter
+from synthea_pydantic._jsonl import iter_jsonl
+from synthea_pydantic._parallel import default_workers, free_threaded, parallel_map
+from synthea_pydantic._rows import row_plan
+
+
+@pytest.fixture(scope='module')
+def encounters():
+    return [make_encounter(i) for i in range(2500)]
+
+
+def test_build_detection(monkeypatch):
+    gil = getattr(sys, '_is_gil_enabled', None)
+    assert free_threaded() == (gil is not None and not gil())
+
+    monkeypatch.setattr(sys, '_is_gil_enabled', lambda: False, raising=False)
+    assert free_threaded()
+    assert default_workers() >= 1
+    monkeypatch.setattr(sys, '_is_gil_enabled', lambda: True)
+    assert not free_threaded()
+    assert default_workers() == 1
+
+
+def test_parallel_map_keeps_order():
+    assert list(parallel_map(lambda x: x * x, range(5000), workers=4, chunk_size=7)) == [x * x for x in range(5000)]
+    assert list(parallel_map(str, [], workers=4)) == []
+
+
+def test_parallel_map_raises_first_error():
+    def check(x):
+        if x >= 100:
+            raise ValueError(f"bad {x}")
+        return x
+
+    with pytest.raises(ValueError, match="bad 100"):
+        list(parallel_map(check, range(1000), workers=3, chunk_size=10))
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_iter_csv_workers(tmp_path, encounters, workers):
+    path = write_csv(tmp_path / 'encounters.csv', encounters)
+
+    assert Encounter.from_csv(path, workers=workers) == encounters
+    assert Encounter.from_csv(path, trusted=Encounter.schema_fingerprint(), workers=workers) == encounters
+
+
+def test_iter_csv_workers_report_invalid_rows(tmp_path):
+    path = tmp_path / 'encounters.csv'
+    path.write_text('Id,START\nnot-a-uuid,2020-01-01\n')
+
+    with pytest.raises(ValueError):
+        Encounter.from_csv(path, workers=2)
+
+
+def test_iter_jsonl_workers(tmp_path, encounters):
+    path = tmp_path / 'encounters.jsonl'
+    Encounter.to_jsonl(encounters, path)
+
+    assert list(iter_jsonl(Encounter, path, read_size=16_384, workers=4)) == encounters
+    assert Encounter.from_jsonl(path, workers=2) == encounters
+
+
+def test_plan_cache_shared_between_threads():
+    header = tuple(make_encounter(0).model_dump(by_alias=True))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        plans = set(map(id, pool.map(lambda _: row_plan(Encounter, header), range(64))))
+
+    assert len(plans) == 1
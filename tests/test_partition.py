@@ -0,0 +1,65 @@
+"""Tests for partitioned export writing."""
+
+import pytest
+
+from conftest import write_export
+from synthea_pydantic import Encounter, Patient, partition_export
+from synthea_pydantic._partition import partition_of
+
+ORGANIZATIONS = 'Id,NAME,ADDRESS\n5b9c06b4-7a3b-3ef5-9c0e-2b6d3d0fd27e,"General, Hospital",1 Main St\n'
+
+
+def test_rows_follow_their_patient(tmp_path):
+    (tmp_path / 'src').mkdir()
+    patients, encounters = write_export(tmp_path / 'src')
+    (tmp_path / 'src' / 'organizations.csv').write_text(ORGANIZATIONS)
+
+    directories = partition_export(tmp_path / 'src', tmp_path / 'dst', 3, buffer_size=256)
+
+    assert [directory.name for directory in directories] == ['part-00000', 'part-00001', 'part-00002']
+    loaded_patients, loaded_encounters = [], []
+    for i, directory in enumerate(directories):
+        part_patients = Patient.from_csv(directory / 'patients.csv')
+        part_encounters = Encounter.from_csv(directory / 'encounters.csv')
+        assert all(partition_of(str(patient.id), 3) == i for patient in part_patients)
+        assert {encounter.patient for encounter in part_encounters} <= {patient.id for patient in part_patients}
+        assert (directory / 'organizations.csv').read_text() == ORGANIZATIONS
+        loaded_patients += part_patients
+        loaded_encounters += part_encounters
+    assert sorted(loaded_patients, key=lambda p: str(p.id)) == sorted(patients, key=lambda p: str(p.id))
+    assert len(loaded_encounters) == len(encounters)
+
+
+@pytest.mark.parametrize('compression,suffix', [('gzip', '.gz'), ('zstd', '.zst'), ('bz2', '.bz2')])
+def test_compressed_partitions(tmp_path, compression, suffix):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    (tmp_path / 'src').mkdir()
+    _, encounters = write_export(tmp_path / 'src')
+
+    directories = partition_export(tmp_path / 'src', tmp_path / 'dst', 2, compression=compression, buffer_size=512)
+
+    loaded = [
+        encounter
+        for directory in directories
+        for encounter in Encounter.from_csv(directory / f"encounters.csv{suffix}")
+    ]
+    assert sorted(loaded, key=lambda e: str(e.id)) == sorted(encounters, key=lambda e: str(e.id))
+
+
+def test_partitioning_is_deterministic(tmp_path):
+    (tmp_path / 'src').mkdir()
+    write_export(tmp_path / 'src')
+
+    first = partition_export(tmp_path / 'src', tmp_path / 'a', 4)
+    second = partition_export(tmp_path / 'src', tmp_path / 'b', 4)
+
+    for a, b in zip(first, second):
+        assert (a / 'encounters.csv').read_bytes() == (b / 'encounters.csv').read_bytes()
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError, match="at least 1"):
+        partition_export(tmp_path, tmp_path / 'dst', 0)
+    with pytest.raises(ValueError, match="compression"):
+        partition_export(tmp_path, tmp_path / 'dst', 2, compression='lz4')
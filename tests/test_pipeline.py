@@ -0,0 +1,127 @@
+"""Tests for the pipeline module."""
+
+import operator
+import threading
+import time
+
+import pytest
+
+from conftest import make_encounter, make_patient, write_csv
+from synthea_pydantic import Patient, Pipeline, Stage, ingest
+
+
+def jitter(item):
+    # Later items finish first
+    time.sleep(0.001 * (10 - item % 10))
+    return item
+
+
+def chunks(item):
+    for i in range(3):
+        yield item * 3 + i
+
+
+def test_ordered_output_keeps_source_order():
+    pipeline = Pipeline(range(40), [Stage('jitter', jitter, workers=4), Stage('double', lambda x: 2 * x)])
+
+    assert list(pipeline) == [2 * i for i in range(40)]
+    assert pipeline.metrics['jitter'].items_in == 40
+    assert pipeline.metrics['double'].items_out == 40
+    assert pipeline.metrics['jitter'].busy > 0
+    assert pipeline.metrics['jitter'].throughput > 0
+
+
+def test_unordered_output_has_every_item():
+    pipeline = Pipeline(range(40), [Stage('jitter', jitter, workers=4)], ordered=False)
+
+    assert sorted(pipeline) == list(range(40))
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_expanding_stages(ordered):
+    stages = [
+        Stage('chunks', chunks, workers=3, expand=True),
+        Stage('neg', operator.neg, workers=2, executor='process'),
+    ]
+    pipeline = Pipeline(range(20), stages, ordered=ordered, queue_size=2)
+
+    results = list(pipeline)
+
+    assert sorted(results) == sorted(-i for i in range(60))
+    if ordered:
+        assert results == [-i for i in range(60)]
+    assert pipeline.metrics['chunks'].items_out == 60
+
+
+def test_stage_error_stops_pipeline():
+    def fail(item):
+        if item == 5:
+            raise ValueError("bad item")
+        return item
+
+    with pytest.raises(ValueError, match="bad item"):
+        Pipeline(range(1000), [Stage('fail', fail, workers=2), Stage('pass', jitter)]).run()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('pipeline-')]
+
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise RuntimeError("source broke")
+
+    with pytest.raises(RuntimeError, match="source broke"):
+        Pipeline(source(), [Stage('same', jitter)]).run()
+
+
+def test_leaving_early_shuts_down():
+    results = iter(Pipeline(range(10_000), [Stage('chunks', chunks, expand=True)], queue_size=1))
+
+    assert next(results) == 0
+    results.close()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('pipeline-')]
+
+
+def test_pipeline_runs_once():
+    pipeline = Pipeline([1], [Stage('same', jitter)])
+    pipeline.run()
+
+    with pytest.raises(ValueError, match="once"):
+        pipeline.run()
+
+
+def test_invalid_stages():
+    with pytest.raises(ValueError, match="executor"):
+        Stage('bad', jitter, executor='fiber')
+    with pytest.raises(ValueError, match="unique"):
+        Pipeline([], [Stage('same', jitter), Stage('same', jitter)])
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_ingest(tmp_path, executor):
+    encounters = [make_encounter(i) for i in range(25)]
+    patients = [make_patient() for _ in range(3)]
+    write_csv(tmp_path / 'encounters.csv', encounters)
+    write_csv(tmp_path / 'patients.csv', patients)
+
+    batches = list(ingest(tmp_path, batch_size=10, validators=2, executor=executor))
+
+    assert [(batch.table, batch.index) for batch in batches] == [
+        ('encounters', 0), ('encounters', 1), ('encounters', 2), ('patients', 0),
+    ]
+    assert [record for batch in batches[:3] for record in batch.records] == encounters
+    assert batches[3].records == patients
+
+
+def test_ingest_sink_and_errors(tmp_path):
+    write_csv(tmp_path / 'patients.csv', [make_patient() for _ in range(5)])
+    stored = []
+
+    pipeline = ingest(tmp_path / 'patients.csv', sink=lambda batch: stored.extend(batch.records), executor='thread')
+    assert pipeline.run() == 1
+    assert len(stored) == 5 and all(isinstance(record, Patient) for record in stored)
+
+    (tmp_path / 'encounters.csv').write_text('Id,START\nnot-a-uuid,2020-01-01\n')
+    with pytest.raises(ValueError):
+        ingest(tmp_path / 'encounters.csv', executor='thread').run()
+    with pytest.raises(KeyError, match="Unknown Synthea table"):
+        ingest(tmp_path / 'unknown.csv')
@@ -0,0 +1,81 @@
+"""Tests for the profiling module."""
+
+import pickle
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from conftest import make_patient, write_export
+from synthea_pydantic import HyperLogLog, partition_export, profile_export
+from synthea_pydantic.profiling import profile_table
+
+
+@pytest.mark.parametrize('distinct', [0, 10, 1000, 50_000])
+def test_hyperloglog_estimates_and_merges(distinct):
+    values = [f"value-{i}" for i in range(distinct)]
+    whole, first, second = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    whole.update(values)
+    first.update(values[::2] + values[:10])
+    second.update(values[1::2])
+
+    assert whole.count() == pytest.approx(distinct, rel=0.05, abs=1)
+    assert first.merge(second).registers == whole.registers
+    assert pickle.loads(pickle.dumps(whole)).count() == whole.count()
+    with pytest.raises(ValueError, match="precision"):
+        whole.merge(HyperLogLog(10))
+
+
+def test_column_statistics(tmp_path):
+    patients, encounters = write_export(tmp_path, patients=30, encounters=300)
+    ids = HyperLogLog()
+    ids.update(str(patient.id) for patient in patients)
+
+    profile = profile_table(tmp_path / 'encounters.csv', batch_size=64)
+
+    assert profile.rows == 300
+    assert profile['STOP'].null_rate == 0.5
+    assert profile['START'].minimum == datetime(2020, 1, 1, tzinfo=timezone.utc)
+    assert profile['START'].maximum == datetime(2020, 1, 28, tzinfo=timezone.utc)
+    assert profile['TOTAL_CLAIM_COST'].maximum == Decimal('299.125')
+    assert profile['ENCOUNTERCLASS'].histogram == {'wellness': 200, 'emergency': 100}
+    assert profile['PATIENT'].distinct_count == ids.count()
+    assert profile['Id'].distinct_count == pytest.approx(300, rel=0.05)
+    assert profile['ENCOUNTERCLASS'].distinct is None
+
+
+def test_start_date_layout_is_converted(tmp_path):
+    patient = str(make_patient().id)
+    (tmp_path / 'payer_transitions.csv').write_text(
+        'PATIENT,MEMBERID,START_DATE,END_DATE,PAYER,SECONDARY_PAYER,PLAN_OWNERSHIP,OWNER_NAME\n'
+        f'{patient},,2010-01-03T08:00:00Z,2011-01-03T08:00:00Z,{patient},,Self,Damon455 Langosh790\n'
+        f'{patient},,2011-01-03T08:00:00Z,,{patient},,Self,Damon455 Langosh790\n'
+    )
+
+    profile = profile_table(tmp_path / 'payer_transitions.csv')
+
+    assert (profile['START_YEAR'].minimum, profile['START_YEAR'].maximum) == (2010, 2011)
+    assert profile['END_YEAR'].maximum == 2011 and profile['END_YEAR'].nulls == 1
+
+
+def test_shard_profiles_merge_into_the_whole(tmp_path):
+    (tmp_path / 'src').mkdir()
+    write_export(tmp_path / 'src', patients=30, encounters=300)
+    whole = profile_export(tmp_path / 'src', workers=2)
+    parts = [profile_export(part, workers=1) for part in partition_export(tmp_path / 'src', tmp_path / 'parts', 3)]
+
+    merged = parts[0]['encounters']
+    for part in parts[1:]:
+        merged.merge(part['encounters'])
+
+    expected = whole['encounters']
+    assert merged.rows == expected.rows == 300
+    for column, stats in expected.columns.items():
+        other = merged[column]
+        assert (other.nulls, other.minimum, other.maximum, other.histogram) == (
+            stats.nulls, stats.minimum, stats.maximum, stats.histogram
+        )
+        assert other.distinct_count == stats.distinct_count
+    assert whole['patients']['BIRTHDATE'].minimum == date(1980, 2, 24)
+    with pytest.raises(ValueError, match="patients"):
+        merged.merge(whole['patients'])
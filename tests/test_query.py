@@ -0,0 +1,188 @@
+"""Tests for the query module."""
+
+from datetime import date
+
+import pytest
+
+from conftest import OTHER_PATIENT, PATIENT, make_encounter, make_observation, write_csv
+from synthea_pydantic import Encounter, Observation
+from synthea_pydantic.query import Export, Expr, Predicate, Table, col
+
+A1C = '4548-4'
+
+
+def during(encounter):
+    return {'DATE': encounter.start.isoformat(), 'PATIENT': str(encounter.patient), 'ENCOUNTER': str(encounter.id)}
+
+
+@pytest.fixture
+def export():
+    encounters = [
+        make_encounter(PATIENT=str(PATIENT), START='2019-03-01T10:00:00Z', ENCOUNTERCLASS='wellness'),
+        make_encounter(PATIENT=str(PATIENT), START='2020-03-01T10:00:00Z', ENCOUNTERCLASS='wellness'),
+        make_encounter(PATIENT=str(OTHER_PATIENT), START='2020-05-01T10:00:00Z', ENCOUNTERCLASS='ambulatory'),
+        make_encounter(PATIENT=str(OTHER_PATIENT), START='2020-06-01T10:00:00Z', ENCOUNTERCLASS='wellness'),
+    ]
+    observations = [
+        make_observation('6.0', CODE=A1C, **during(encounters[0])),
+        make_observation('7.0', CODE=A1C, **during(encounters[1])),
+        make_observation('8.0', CODE=A1C, **during(encounters[2])),
+        make_observation('5.0', CODE=A1C, **during(encounters[3])),
+        make_observation('Never smoked', 'text', CODE='72166-2', **during(encounters[3])),
+    ]
+    return Export({
+        'encounters': Table.from_records(Encounter, encounters),
+        'observations': Table.from_records(Observation, observations),
+    })
+
+
+def test_table_is_columnar(export):
+    table = export['observations']
+
+    assert len(table) == 5
+    assert table.columns['code'][:2] == [A1C, A1C]
+    assert table.column_name('ENCOUNTER') == 'encounter'
+
+
+def test_filter_and_select(export):
+    result = (
+        export.query('observations')
+        .filter(col('code') == A1C, col('value') > 5.5)
+        .select('value', year=col('date').year)
+        .collect()
+    )
+
+    assert result == {'value': [6.0, 7.0, 8.0], 'year': [2019, 2020, 2020]}
+
+
+def test_boolean_predicates(export):
+    query = export.query('observations')
+
+    assert query.filter(col('code').isin([A1C])).count() == 4
+    assert query.filter(~(col('code') == A1C)).count() == 1
+    assert query.filter((col('value') == 5.0) | (col('value') == 6.0)).count() == 2
+    assert query.filter(col('encounter').is_null()).count() == 0
+
+
+def test_uuid_and_datetime_constants_are_coerced(export):
+    query = export.query('observations')
+
+    assert query.filter(col('patient') == str(PATIENT)).count() == 2
+    assert query.filter(col('date') >= date(2020, 1, 1)).count() == 4
+    assert query.filter(col('date').between('2020-01-01T00:00:00', '2020-05-31T00:00:00')).count() == 2
+
+
+def test_mean_a1c_per_encounterclass_per_year(export):
+    result = (
+        export.query('observations')
+        .filter(col('code') == A1C)
+        .join('encounters')
+        .group_by('encounters.encounterclass', year=col('date').year)
+        .agg(mean=('value', 'mean'), n=('value', 'count'))
+        .collect()
+    )
+
+    assert result == {
+        'encounters.encounterclass': ['ambulatory', 'wellness', 'wellness'],
+        'year': [2020, 2019, 2020],
+        'mean': [8.0, 6.0, 6.0],
+        'n': [1, 1, 2],
+    }
+
+
+def test_aggregate_without_keys(export):
+    result = export.query('observations').filter(col('code') == A1C).agg(high=('value', 'max')).collect()
+
+    assert result == {'high': [8.0]}
+
+    empty = (
+        export.query('observations')
+        .filter(col('code') == 'missing')
+        .agg(n=('value', 'count'), patients=('patient', 'count_distinct'), high=('value', 'max'))
+        .collect()
+    )
+    assert empty == {'n': [0], 'patients': [0], 'high': [None]}
+    grouped = export.query('observations').filter(col('code') == 'missing').group_by('code').agg(n=('value', 'count'))
+    assert grouped.collect() == {'code': [], 'n': []}
+
+
+def test_expression_bases_are_abstract():
+    with pytest.raises(TypeError):
+        Expr()
+    with pytest.raises(TypeError):
+        Predicate()
+
+
+def test_predicates_pushed_into_joined_scan(export):
+    query = (
+        export.query('observations')
+        .join('encounters')
+        .filter(col('encounterclass') == 'ambulatory', col('code') == A1C)
+    )
+
+    steps = query.explain()
+
+    assert steps[0] == 'scan observations'
+    assert steps.index('scan encounters') < steps.index(
+        'hash join encounters ON observations.encounter = encounters.id'
+    )
+    assert query.select('value').collect() == {'value': [8.0]}
+
+
+def test_index_lookup_is_planned(export):
+    export['observations'].create_index('patient')
+    query = export.query('observations').filter(col('patient') == OTHER_PATIENT, col('code') == A1C)
+
+    assert query.explain()[0].startswith('index lookup observations: patient ==')
+    assert query.select('value').collect() == {'value': [8.0, 5.0]}
+
+
+def test_one_to_many_join(export):
+    query = export.query('encounters').join('observations', on=('id', 'encounter'))
+
+    assert query.count() == 5
+    export['observations'].create_index('encounter')
+    assert query.explain()[-1] == 'index join observations ON encounters.id = observations.encounter'
+    assert query.count() == 5
+
+
+def test_nulls_match_nothing_with_or_without_index():
+    encounter = make_encounter()
+    observations = [
+        make_observation('6.0', CODE=A1C, **during(encounter)),
+        make_observation('7.0', CODE=A1C, **during(encounter)).model_copy(update={'encounter': None}),
+    ]
+    export = Export({
+        'encounters': Table.from_records(Encounter, [encounter]),
+        'observations': Table.from_records(Observation, observations),
+    })
+    queries = [
+        export.query('observations').filter(col('encounter') == None),  # noqa: E711
+        export.query('observations').filter(col('encounter').isin([None, encounter.id])),
+        export.query('encounters').join('observations', on=('reasoncode', 'encounter')),
+    ]
+
+    scanned = [query.count() for query in queries]
+    export['observations'].create_index('encounter')
+
+    assert [query.count() for query in queries] == scanned == [0, 1, 0]
+    assert queries[0].explain()[0].startswith('index lookup')
+
+
+def test_unknown_column_and_missing_foreign_key(export):
+    with pytest.raises(KeyError):
+        export.query('observations').filter(col('missing') == 1).count()
+    with pytest.raises(ValueError):
+        export.query('encounters').join('observations')
+
+
+def test_export_load(tmp_path):
+    encounter = make_encounter()
+    write_csv(tmp_path / 'encounters.csv', [encounter])
+    write_csv(tmp_path / 'observations.csv', [make_observation('6.0', CODE=A1C, **during(encounter))])
+
+    export = Export.load(tmp_path, indexes=('patient', 'encounter'))
+
+    assert sorted(export.tables) == ['encounters', 'observations']
+    assert set(export['observations'].indexes) == {'patient', 'encounter'}
+    assert export.query('observations').join('encounters').count() == 1
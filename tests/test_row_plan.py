@@ -0,0 +1,78 @@
+"""Tests for header-driven row plans used by the CSV loaders."""
+
+import csv
+
+import pytest
+from pydantic import ValidationError
+
+from conftest import ENCOUNTER, PATIENT, PAYER, PROVIDER
+from synthea_pydantic import Claim, ClaimTransaction, Observation, PayerTransition
+from synthea_pydantic._rows import PreparedRow, row_plan
+
+CSV_TEXT = {
+    PayerTransition: (
+        "PATIENT,MEMBERID,START_YEAR,END_YEAR,PAYER,SECONDARY_PAYER,OWNERSHIP,OWNERNAME\r\n"
+        f"{PATIENT},,2019-02-24T05:07:38Z,2020-03-01T05:07:38Z,{PAYER},,self,Damon455 Langosh790\r\n"
+        "\r\n"
+        f"{PATIENT},,2020,2021,{PAYER},,  Guardian  ,\r\n"
+    ),
+    Observation: (
+        "DATE,PATIENT,ENCOUNTER,CATEGORY,CODE,DESCRIPTION,VALUE,UNITS,TYPE\r\n"
+        f"2020-01-01T10:00:00Z,{PATIENT},{ENCOUNTER},vital-signs,29463-7,Body Weight,75.5,kg,numeric\r\n"
+        f"2020-01-01T10:00:00Z,{PATIENT},{ENCOUNTER},survey,72166-2,Tobacco,\"Never, smoked\",,text\r\n"
+    ),
+    Claim: (
+        "Id,PATIENTID,PROVIDERID,PRIMARYPATIENTINSURANCEID,SECONDARYPATIENTINSURANCEID,DEPARTMENTID,"
+        "PATIENTDEPARTMENTID,DIAGNOSIS1,APPOINTMENTID,CURRENTILLNESSDATE,SERVICEDATE,STATUS1,"
+        "OUTSTANDING1,HEALTHCARECLAIMTYPEID1,HEALTHCARECLAIMTYPEID2,EXTRA\r\n"
+        f"{ENCOUNTER},{PATIENT},{PROVIDER},{PAYER},0,3,3,44054006,{ENCOUNTER},"
+        "2019-02-24T05:07:38Z,2019-02-24T05:07:38Z,closed,12.50,1,0,ignored\r\n"
+    ),
+    ClaimTransaction: (
+        "ID,CLAIMID,CHARGEID,PATIENTID,TYPE,AMOUNT,METHOD,PLACEOFSERVICE,PROCEDURECODE,"
+        "DIAGNOSISREF1,PATIENTINSURANCEID,PROVIDERID,TRANSFERTYPE\r\n"
+        f"{ENCOUNTER},{ENCOUNTER},1,{PATIENT},charge,129.16,,{PAYER},185349003,1,0,{PROVIDER},p\r\n"
+    ),
+}
+
+
+@pytest.mark.parametrize("model", list(CSV_TEXT), ids=lambda m: m.__name__)
+def test_row_plan_matches_dict_reader(tmp_path, model):
+    """Test that the positional loader yields exactly what Model(**row) does."""
+    path = tmp_path / "data.csv"
+    path.write_text(CSV_TEXT[model], newline='')
+
+    with open(path, newline='') as f:
+        expected = [model(**row) for row in csv.DictReader(f)]
+
+    loaded = model.from_csv(path)
+    assert loaded == expected
+    assert [r.model_fields_set for r in loaded] == [r.model_fields_set for r in expected]
+
+
+def test_prepared_row_applies_preprocessing_once():
+    """Test that a plan prepares one dict and preprocess_csv passes it through."""
+    header = next(csv.reader([CSV_TEXT[Claim].splitlines()[0]]))
+    row = next(csv.reader([CSV_TEXT[Claim].splitlines()[1]]))
+    plan = row_plan(Claim, header)
+
+    prepared = plan.prepare(row)
+    assert isinstance(prepared, PreparedRow)
+    assert 'EXTRA' not in prepared
+    assert prepared['SECONDARYPATIENTINSURANCEID'] is None
+    assert prepared['HEALTHCARECLAIMTYPEID1'] == 1
+    assert prepared['STATUS1'] == 'CLOSED'
+    assert Claim.preprocess_csv(prepared) is prepared
+    assert row_plan(Claim, header) is plan
+
+
+def test_row_plan_row_length_handling():
+    """Test short rows are padded with None and long rows are rejected."""
+    header = ['PATIENT', 'START_YEAR', 'END_YEAR', 'PAYER', 'OWNERSHIP']
+    plan = row_plan(PayerTransition, header)
+
+    assert plan.prepare([str(PATIENT), '2019', '2020', str(PAYER)])['OWNERSHIP'] is None
+    with pytest.raises(ValueError):
+        plan.prepare([str(PATIENT), '2019', '2020', str(PAYER), 'Self', 'extra'])
+    with pytest.raises(ValidationError):
+        plan.validate([str(PATIENT), 'not-a-year', '2020', str(PAYER), 'Self'])
@@ -0,0 +1,103 @@
+"""Tests for the shared module."""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from conftest import make_encounter, make_observation, make_patient, write_csv
+from synthea_pydantic import Encounter, Observation, Patient, SharedTable, load_shared
+from synthea_pydantic.shared import share_records
+
+
+def test_records_round_trip():
+    records = [make_encounter(i) for i in range(10)]
+
+    with SharedTable(share_records(Encounter, records), owner=True) as table:
+        assert len(table) == 10
+        assert list(table) == records
+        assert table[-1] == records[-1]
+        assert table.column('stop')[:2] == [None, records[1].stop]
+        assert table.value(3, 'total_claim_cost') == Decimal('3.125')
+
+
+def test_raw_columns_are_zero_copy_views():
+    records = [make_encounter(i) for i in range(4)]
+
+    with SharedTable(share_records(Encounter, records), owner=True) as table:
+        costs = table.raw('total_claim_cost')
+        assert table.info.columns['total_claim_cost'].scale == 3
+        assert costs.tolist() == [125, 1125, 2125, 3125]
+        assert bytes(table.raw('id')[:16]) == records[0].id.bytes
+        costs.release()
+
+
+def test_decimals_beyond_fixed_point_are_kept_as_text():
+    records = [
+        make_encounter(i).model_copy(update={'total_claim_cost': cost})
+        for i, cost in enumerate([Decimal('NaN'), Decimal('1e30'), None, Decimal('0.125')])
+    ]
+
+    with SharedTable(share_records(Encounter, records), owner=True) as table:
+        assert table.info.columns['total_claim_cost'].kind == 'decimal_text'
+        assert table.value(1, 'total_claim_cost') == Decimal('1e30')
+        assert table.value(0, 'total_claim_cost').is_nan()
+        assert table.column('total_claim_cost')[2:] == [None, Decimal('0.125')]
+        codes = table.raw('total_claim_cost')
+        assert codes.tolist() == [0, 1, 2, 3]
+        codes.release()
+
+
+def test_union_and_date_columns():
+    observations = [make_observation('180.2', 'numeric'), make_observation('12', 'text')]
+    patient = make_patient()
+
+    with SharedTable(share_records(Observation, observations), owner=True) as table:
+        assert [observation.value for observation in table] == [180.2, '12']
+    with SharedTable(share_records(Patient, [patient]), owner=True) as table:
+        assert table[0] == patient
+        assert table[0].birthdate == date(1980, 2, 24)
+
+
+def _sum_costs(info):
+    with SharedTable.attach(info) as table:
+        return sum(table.column('total_claim_cost'))
+
+
+def test_info_is_picklable_and_attachable_elsewhere():
+    records = [make_encounter(i) for i in range(5)]
+
+    with SharedTable(share_records(Encounter, records), owner=True) as table:
+        info = pickle.loads(pickle.dumps(table.info))
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(_sum_costs, info).result() == sum(r.total_claim_cost for r in records)
+        assert table[0] == records[0]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_shared(tmp_path, workers):
+    encounters = [make_encounter(i) for i in range(20)]
+    patients = [make_patient() for _ in range(3)]
+    write_csv(tmp_path / 'encounters.csv', encounters)
+    write_csv(tmp_path / 'patients.csv', patients)
+    (tmp_path / 'notes.txt').write_text('ignored')
+
+    tables = load_shared(tmp_path, workers=workers)
+    try:
+        assert set(tables) == {'encounters', 'patients'}
+        assert list(tables['encounters']) == encounters
+        assert list(tables['patients']) == patients
+    finally:
+        for table in tables.values():
+            table.unlink()
+
+
+def test_load_shared_validates(tmp_path):
+    path = tmp_path / 'patients.csv'
+    path.write_text('Id,BIRTHDATE\nnot-a-uuid,1980-01-01\n')
+
+    with pytest.raises(Exception):
+        load_shared(path, workers=1)
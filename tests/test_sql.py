@@ -0,0 +1,119 @@
+"""Tests for the sql module."""
+
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from conftest import PATIENT, PAYER, make_encounter, make_observation, write_csv
+from synthea_pydantic import Claim, Encounter, PayerTransition, load_tables, to_sql
+from synthea_pydantic.sql import create_table_sql, insert_sql
+
+
+def make_transition(start_year, ownership='Self'):
+    return PayerTransition(
+        PATIENT=str(PATIENT),
+        START_YEAR=start_year,
+        END_YEAR=start_year + 1,
+        PAYER=str(PAYER),
+        OWNERSHIP=ownership,
+    )
+
+
+def test_create_table_sql():
+    ddl = create_table_sql(PayerTransition, dialect='postgresql')
+
+    assert ddl.startswith('CREATE TABLE IF NOT EXISTS "payer_transitions"')
+    assert '"patient" UUID NOT NULL' in ddl
+    assert '"memberid" UUID,' in ddl
+    assert """CHECK ("ownership" IN ('Guardian', 'Self', 'Spouse'))""" in ddl
+    assert '"total_claim_cost" NUMERIC NOT NULL' in create_table_sql(Encounter)
+    assert '"total_claim_cost" TEXT NOT NULL' in create_table_sql(Encounter, dialect='sqlite')
+
+
+def test_create_table_sql_integer_literals():
+    ddl = create_table_sql(Claim, dialect='postgresql')
+
+    assert '"healthcareclaimtypeid1" BIGINT CHECK ("healthcareclaimtypeid1" IN (1, 2))' in ddl
+    assert '"healthcareclaimtypeid1" INTEGER CHECK' in create_table_sql(Claim, dialect='sqlite')
+
+
+def test_insert_sql_paramstyles():
+    assert insert_sql(PayerTransition, 'pt', 'qmark').endswith('VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+    assert insert_sql(PayerTransition, 'pt', 'format').endswith('VALUES (%s, %s, %s, %s, %s, %s, %s, %s)')
+    assert insert_sql(PayerTransition, 'pt', 'numeric').endswith('VALUES (:1, :2, :3, :4, :5, :6, :7, :8)')
+
+
+def test_to_sql_records_in_batches():
+    connection = sqlite3.connect(':memory:')
+    records = [make_transition(2000 + i) for i in range(25)]
+
+    assert to_sql(records, connection, batch_size=10) == 25
+
+    rows = connection.execute('SELECT patient, start_year, ownership FROM payer_transitions ORDER BY start_year').fetchall()
+    assert len(rows) == 25
+    assert rows[0] == (str(PATIENT), 2000, 'Self')
+
+
+def test_to_sql_check_constraint():
+    connection = sqlite3.connect(':memory:')
+    record = make_transition(2000).model_copy(update={'ownership': 'Nobody'})
+
+    with pytest.raises(sqlite3.IntegrityError):
+        to_sql([record], connection)
+
+
+def test_to_sql_values_round_trip():
+    connection = sqlite3.connect(':memory:')
+    to_sql([make_encounter(TOTAL_CLAIM_COST='704.20')], connection)
+    to_sql([make_observation('75.5', 'numeric'), make_observation('Never smoked', 'text')], connection)
+
+    to_sql([make_encounter(TOTAL_CLAIM_COST='12345678901234567.89')], connection)
+
+    rows = connection.execute('SELECT start, total_claim_cost FROM encounters ORDER BY rowid').fetchall()
+    assert rows[0] == ('2020-01-01T10:00:00+00:00', '704.20')
+    assert Decimal(rows[1][1]) == Decimal('12345678901234567.89')
+    values = [row[0] for row in connection.execute('SELECT value FROM observations ORDER BY rowid')]
+    assert values == ['75.5', 'Never smoked']
+
+
+def test_to_sql_copy_needs_postgresql():
+    connection = sqlite3.connect(':memory:')
+
+    with pytest.raises(ValueError, match="PostgreSQL"):
+        to_sql([make_transition(2000)], connection, method='copy')
+    assert connection.execute("SELECT count(*) FROM sqlite_master").fetchone() == (0,)
+
+
+def test_to_sql_from_csv(tmp_path):
+    path = tmp_path / 'payer_transitions.csv'
+    write_csv(path, [make_transition(2000), make_transition(2001, 'Guardian')])
+    connection = sqlite3.connect(':memory:')
+
+    assert to_sql(path, connection, table='coverage') == 2
+    assert connection.execute('SELECT count(*) FROM coverage').fetchone() == (2,)
+
+
+def test_to_sql_empty_iterable():
+    assert to_sql([], sqlite3.connect(':memory:')) == 0
+
+
+def test_to_sql_unknown_method():
+    with pytest.raises(ValueError):
+        to_sql([], sqlite3.connect(':memory:'), method='bulk')
+
+
+def test_load_tables_in_parallel(tmp_path):
+    export = tmp_path / 'csv'
+    export.mkdir()
+    write_csv(export / 'payer_transitions.csv', [make_transition(2000 + i) for i in range(5)])
+    write_csv(export / 'encounters.csv', [make_encounter(TOTAL_CLAIM_COST='10.00') for _ in range(3)])
+    (export / 'notes.txt').write_text('not a table')
+    database = tmp_path / 'synthea.db'
+
+    counts = load_tables(export, lambda: sqlite3.connect(database, timeout=30), workers=2, batch_size=2)
+
+    assert counts == {'encounters': 3, 'payer_transitions': 5}
+    connection = sqlite3.connect(database)
+    assert connection.execute('SELECT count(*) FROM encounters').fetchone() == (3,)
+    assert connection.execute('SELECT count(*) FROM payer_transitions').fetchone() == (5,)
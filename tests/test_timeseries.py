@@ -0,0 +1,98 @@
+"""Tests for the timeseries module."""
+
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import OTHER_PATIENT, PATIENT, make_observation, write_csv
+from synthea_pydantic.timeseries import ObservationSeries
+
+A1C = {'CODE': '4548-4', 'UNITS': '%'}
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def observations():
+    return [
+        make_observation('5.8', DATE='2020-01-01T00:00:00Z', **A1C),
+        make_observation('6.1', PATIENT=str(OTHER_PATIENT), DATE='2019-06-01T00:00:00Z', **A1C),
+        # Out of order on purpose
+        make_observation('5.6', DATE='2019-01-01T00:00:00Z', **A1C),
+        make_observation('6.2', DATE='2021-01-01T00:00:00Z', **A1C),
+        make_observation('170.1', DATE='2020-01-01T00:00:00Z'),
+        make_observation('Never smoker', 'text', DATE='2020-01-01T00:00:00Z', CODE='72166-2', UNITS=''),
+    ]
+
+
+def test_from_csv_filters_and_sorts(tmp_path, observations):
+    """Test that only numeric rows for wanted codes are kept, sorted by time."""
+    csv_path = write_csv(tmp_path / "observations.csv", observations)
+    series = ObservationSeries.from_csv(csv_path, codes={'4548-4', '72166-2'})
+
+    assert len(series) == 4
+    assert set(series.keys()) == {(PATIENT, '4548-4'), (OTHER_PATIENT, '4548-4')}
+    assert series.units == {'4548-4': '%'}
+
+    epochs, values = series.get(PATIENT, '4548-4')
+    assert list(values) == [5.6, 5.8, 6.2]
+    assert list(epochs) == sorted(epochs)
+    assert epochs[0] == int(utc(2019, 1, 1).timestamp())
+
+    start, stop = series.index[(PATIENT, '4548-4')]
+    assert list(series.values[start:stop]) == [5.6, 5.8, 6.2]
+
+
+def test_from_models_matches_from_csv(tmp_path, observations):
+    """Test that staging validated models matches the CSV fast path."""
+    csv_path = write_csv(tmp_path / "observations.csv", observations)
+    from_csv = ObservationSeries.from_csv(csv_path)
+    from_models = ObservationSeries().update(observations).build()
+
+    assert set(from_csv.keys()) == set(from_models.keys())
+    for patient, code in from_csv.keys():
+        assert [list(view) for view in from_csv.get(patient, code)] == \
+            [list(view) for view in from_models.get(patient, code)]
+
+
+def test_as_of_and_between(observations):
+    """Test last-value-as-of and range queries."""
+    series = ObservationSeries().update(observations).build()
+
+    assert series.as_of(PATIENT, '4548-4', utc(2018, 1, 1)) is None
+    assert series.as_of(PATIENT, '4548-4', utc(2019, 1, 1)) == 5.6
+    assert series.as_of(PATIENT, '4548-4', utc(2020, 6, 1)) == 5.8
+    assert series.as_of(PATIENT, '4548-4', utc(2030, 1, 1)) == 6.2
+    assert series.as_of(OTHER_PATIENT, '8302-2', utc(2030, 1, 1)) is None
+
+    epochs, values = series.between(PATIENT, '4548-4', utc(2019, 1, 1), utc(2021, 1, 1))
+    assert list(values) == [5.6, 5.8]
+
+
+def test_resample(observations):
+    """Test resampling a series on a regular grid."""
+    series = ObservationSeries().update(observations).build()
+    grid, values = series.resample(PATIENT, '4548-4', utc(2018, 7, 1), utc(2021, 7, 1), timedelta(days=365))
+
+    assert len(grid) == len(values) == 4
+    assert math.isnan(values[0])
+    assert list(values[1:]) == [5.6, 5.8, 6.2]
+
+    with pytest.raises(ValueError):
+        series.resample(PATIENT, '4548-4', utc(2018, 1, 1), utc(2019, 1, 1), 0)
+
+
+def test_incremental_build(observations):
+    """Test that points staged after a build are merged on the next build."""
+    series = ObservationSeries().update(observations[:2]).build()
+    series.update(observations[2:])
+
+    with pytest.raises(RuntimeError):
+        series.as_of(PATIENT, '4548-4', utc(2020, 1, 1))
+
+    series.build()
+    assert list(series.get(PATIENT, '4548-4')[1]) == [5.6, 5.8, 6.2]
+    assert list(series.get(OTHER_PATIENT, '4548-4')[1]) == [6.1]
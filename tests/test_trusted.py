@@ -0,0 +1,103 @@
+"""Tests for trusted (non-validating) loading."""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+
+from conftest import PATIENT, make_encounter, make_observation, write_csv
+from synthea_pydantic import Claim, Encounter, Observation, Patient
+
+PROVIDER = UUID('e1e0cc3a-fbd3-3f8e-9d1e-5c5b0e6a8f4c')
+
+
+def test_fingerprint_is_stable_and_per_model():
+    assert Encounter.schema_fingerprint() == Encounter.schema_fingerprint()
+    assert len(Encounter.schema_fingerprint()) == 16
+    assert Encounter.schema_fingerprint() != Patient.schema_fingerprint()
+
+
+def test_csv_round_trip_matches_validation(tmp_path):
+    path = tmp_path / 'encounters.csv'
+    records = [make_encounter(i) for i in range(20)]
+    write_csv(path, records)
+
+    loaded = Encounter.from_csv(path, trusted=Encounter.schema_fingerprint())
+
+    assert loaded == Encounter.from_csv(path) == records
+    assert loaded[3].total_claim_cost == Decimal('3.125')
+    assert loaded[1].stop == datetime(2020, 1, 1, 10, 30, 0, 250000, tzinfo=timezone.utc)
+    assert loaded[0].stop is None
+    assert loaded[0].model_fields_set == Encounter.from_csv(path)[0].model_fields_set
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = tmp_path / 'observations.jsonl.gz'
+    records = [make_observation('180.2', 'numeric'), make_observation('Never smoked', 'text')]
+    Observation.to_jsonl(records, path)
+
+    loaded = Observation.from_jsonl(path, trusted=Observation.schema_fingerprint())
+
+    assert loaded == records
+    assert [r.value for r in loaded] == [180.2, 'Never smoked']
+
+
+def test_model_hooks_still_apply(tmp_path):
+    path = tmp_path / 'observations.csv'
+    write_csv(path, [make_observation('180.2', 'numeric'), make_observation('12', 'text')])
+
+    numeric, text = Observation.from_csv(path, trusted=Observation.schema_fingerprint())
+
+    assert numeric.value == 180.2
+    assert text.value == '12'
+
+
+def test_construct_trusted_accepts_names_and_typed_values():
+    claim = Claim.construct_trusted(
+        {
+            'id': uuid4(), 'patientid': str(PATIENT), 'providerid': PROVIDER,
+            'PRIMARYPATIENTINSURANCEID': '0', 'departmentid': 3, 'patientdepartmentid': '3',
+            'currentillnessdate': '2020-01-01T10:00:00Z', 'servicedate': datetime(2020, 1, 1),
+            'HEALTHCARECLAIMTYPEID1': '1',
+        },
+        Claim.schema_fingerprint(),
+    )
+
+    assert claim.patientid == PATIENT
+    assert claim.primarypatientinsuranceid is None
+    assert claim.healthcareclaimtypeid1 == 1
+    assert claim.patientdepartmentid == 3
+    assert claim.currentillnessdate.tzinfo is not None
+    assert claim.model_dump()['status1'] is None
+
+
+def test_patient_dates():
+    patient = Patient.construct_trusted(
+        {
+            'Id': str(uuid4()), 'BIRTHDATE': '1980-02-24', 'DEATHDATE': '', 'SSN': '999-52-8591',
+            'FIRST': 'Damon455', 'LAST': 'Langosh790', 'RACE': 'white', 'ETHNICITY': 'nonhispanic',
+            'GENDER': 'M', 'BIRTHPLACE': 'Boston', 'ADDRESS': '1 Main St', 'CITY': 'Boston',
+            'STATE': 'Massachusetts', 'HEALTHCARE_EXPENSES': '1000.00', 'HEALTHCARE_COVERAGE': '0.00',
+        },
+        Patient.schema_fingerprint(),
+    )
+
+    assert patient.birthdate == date(1980, 2, 24)
+    assert patient.deathdate is None
+    assert patient.healthcare_expenses == Decimal('1000.00')
+
+
+def test_fingerprint_mismatch_is_refused(tmp_path):
+    path = tmp_path / 'encounters.csv'
+    write_csv(path, [make_encounter(1)])
+
+    with pytest.raises(ValueError, match='fingerprint'):
+        Encounter.from_csv(path, trusted=Patient.schema_fingerprint())
+    with pytest.raises(ValueError, match='fingerprint'):
+        Encounter.construct_trusted({}, 'stale')
+
+
+def test_missing_required_column():
+    with pytest.raises(ValueError, match='START'):
+        Encounter.construct_trusted({'Id': str(uuid4())}, Encounter.schema_fingerprint())
@@ -0,0 +1,137 @@
+"""Tests for Synthea CSV header layout detection."""
+
+import pytest
+
+from conftest import ENCOUNTER, PATIENT, PAYER
+from synthea_pydantic import (
+    Claim,
+    HeaderSchema,
+    IncrementalLoader,
+    Observation,
+    PayerTransition,
+    register_schema,
+)
+from synthea_pydantic._rows import row_plan
+from synthea_pydantic.versions import KNOWN_SCHEMAS, _clear_plans, detect_schema, year_of
+
+PAYER_TRANSITIONS_V2 = (
+    "PATIENT,MEMBERID,START_YEAR,END_YEAR,PAYER,SECONDARY_PAYER,OWNERSHIP,OWNERNAME\n"
+    f"{PATIENT},,2019,2020,{PAYER},,Self,Damon455 Langosh790\n"
+)
+PAYER_TRANSITIONS_V3 = (
+    "PATIENT,MEMBERID,START_DATE,END_DATE,PAYER,SECONDARY_PAYER,PLAN_OWNERSHIP,OWNER_NAME\n"
+    f"{PATIENT},,2019-02-24T05:07:38Z,2020-03-01T05:07:38Z,{PAYER},,self,Damon455 Langosh790\n"
+)
+OBSERVATIONS_V2 = (
+    "DATE,PATIENT,ENCOUNTER,CODE,DESCRIPTION,VALUE,UNITS,TYPE\n"
+    f"2020-01-01T10:00:00Z,{PATIENT},{ENCOUNTER},29463-7,Body Weight,75.5,kg,numeric\n"
+)
+
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+
+@pytest.mark.parametrize('value, year', [
+    ('2019', 2019),
+    (' 2019 ', 2019),
+    ('2019-02-24', 2019),
+    ('2019-02-24T05:07:38Z', 2019),
+])
+def test_year_of(value, year):
+    assert year_of(value) == year
+
+
+def test_detect_payer_transition_versions(tmp_path):
+    v2 = PayerTransition.detect_schema(write(tmp_path / 'v2.csv', PAYER_TRANSITIONS_V2))
+    v3 = PayerTransition.detect_schema(write(tmp_path / 'v3.csv', PAYER_TRANSITIONS_V3))
+
+    assert v2.version == '2.x'
+    assert v3.version == '3.x'
+    assert v3.columns[2:4] == ('START_YEAR', 'END_YEAR')
+    assert v3.missing == ()
+    assert v3.extra == ()
+
+
+def test_load_renamed_payer_transition_columns(tmp_path):
+    path = write(tmp_path / 'payer_transitions.csv', PAYER_TRANSITIONS_V3)
+
+    [record] = PayerTransition.from_csv(path)
+
+    assert record.patient == PATIENT
+    assert (record.start_year, record.end_year) == (2019, 2020)
+    assert record.ownership == 'Self'
+    assert record.owner_name == 'Damon455 Langosh790'
+
+
+def test_converters_run_in_plan(tmp_path):
+    header = PAYER_TRANSITIONS_V3.splitlines()[0].split(',')
+    row = PAYER_TRANSITIONS_V3.splitlines()[1].split(',')
+
+    prepared = row_plan(PayerTransition, header).prepare(row)
+
+    assert prepared['START_YEAR'] == 2019
+    assert prepared['OWNERNAME'] == 'Damon455 Langosh790'
+
+
+def test_observation_without_category(tmp_path):
+    path = write(tmp_path / 'observations.csv', OBSERVATIONS_V2)
+
+    assert Observation.detect_schema(path).version == '2.x'
+    [record] = Observation.from_csv(path)
+    assert record.category is None
+    assert record.value == 75.5
+
+
+def test_current_and_unknown_layouts():
+    header = [spec for spec in Claim.model_fields.values() if spec.is_required()]
+    current = detect_schema(Claim, [field.alias for field in header] + ['NEWCOLUMN'])
+    unknown = detect_schema(Claim, ['Id', 'PATIENTID'])
+
+    assert current.version == 'current'
+    assert current.extra == ('NEWCOLUMN',)
+    assert unknown.version == 'unknown'
+    assert 'PROVIDERID' in unknown.missing
+
+
+def test_detect_empty_file(tmp_path):
+    assert Observation.detect_schema(write(tmp_path / 'empty.csv', '')) is None
+
+
+def test_register_schema(tmp_path):
+    schema = HeaderSchema(
+        model='PayerTransition',
+        version='custom',
+        signature=frozenset({'PATIENT', 'FROM', 'TO', 'PAYER'}),
+        renames={'FROM': 'START_YEAR', 'TO': 'END_YEAR'},
+        converters={'START_YEAR': year_of, 'END_YEAR': year_of},
+    )
+    path = write(tmp_path / 'custom.csv', f"PATIENT,FROM,TO,PAYER\n{PATIENT},2001-01-01,2002-12-31,{PAYER}\n")
+    # Plan the header under the built-in layouts first
+    with pytest.raises(ValueError):
+        PayerTransition.from_csv(path)
+
+    register_schema(schema)
+    try:
+        assert PayerTransition.detect_schema(path).version == 'custom'
+        [record] = PayerTransition.from_csv(path)
+        assert (record.start_year, record.end_year) == (2001, 2002)
+    finally:
+        KNOWN_SCHEMAS.remove(schema)
+        _clear_plans()
+
+
+def test_malformed_converted_value_reports_validation_error(tmp_path):
+    path = write(tmp_path / 'bad.csv', PAYER_TRANSITIONS_V3.replace('2019-02-24T05:07:38Z', 'soon'))
+
+    with pytest.raises(ValueError):
+        PayerTransition.from_csv(path)
+
+
+def test_incremental_loader_uses_detected_layout(tmp_path):
+    path = write(tmp_path / 'payer_transitions.csv', PAYER_TRANSITIONS_V3)
+
+    batch = IncrementalLoader(PayerTransition, path).load()
+
+    assert [record.start_year for record in batch.records] == [2019]
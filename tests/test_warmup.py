@@ -0,0 +1,56 @@
+"""Tests for warming model validators for worker processes."""
+
+import multiprocessing
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from synthea_pydantic.tables import TABLES, model_for, table_name
+from synthea_pydantic.warmup import warm_up, worker_context
+
+
+def completed_models():
+    return sorted(name for name, model in TABLES.items() if model.__pydantic_complete__)
+
+
+def test_models_defer_build_until_warm_up():
+    """Test in a fresh interpreter that models are built by warm_up, not on import."""
+    code = (
+        "from synthea_pydantic.tables import TABLES; "
+        "from synthea_pydantic.warmup import warm_up; "
+        "print(sum(m.__pydantic_complete__ for m in TABLES.values())); "
+        "warm_up(); "
+        "print(sum(m.__pydantic_complete__ for m in TABLES.values()))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+    assert result.stdout.split() == ['0', str(len(TABLES))]
+
+
+@pytest.mark.parametrize("method", ["fork", "forkserver"])
+def test_workers_start_with_built_validators(method):
+    """Test that pool workers find every model already built."""
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} start method not available")
+    with ProcessPoolExecutor(max_workers=1, mp_context=worker_context(method)) as pool:
+        assert pool.submit(completed_models).result() == sorted(TABLES)
+
+
+def test_worker_context_rejects_spawn():
+    """Test that spawn is refused because it cannot inherit warmed state."""
+    with pytest.raises(ValueError):
+        worker_context('spawn')
+
+
+def test_warm_up_subset_and_table_registry():
+    """Test warming specific models and resolving table names."""
+    assert warm_up([TABLES['patients']]) == [TABLES['patients']]
+    assert table_name('/exports/csv/claims_transactions.csv.zst') == 'claims_transactions'
+    assert model_for('patients.csv') is TABLES['patients']
+    with pytest.raises(KeyError):
+        model_for('notes.csv')